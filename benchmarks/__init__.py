@@ -0,0 +1 @@
+"""Performance benchmarks for sinvest hot paths (run with ``python -m benchmarks.run``)."""
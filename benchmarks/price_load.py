@@ -0,0 +1,116 @@
+"""Offline load test of price providers against the local quote server.
+
+Serves a recorded tape (or a synthetic one) through ``sinvest.quote_server``
+with the requested latency/jitter/error rate, hammers a provider from several
+threads and emits JSON timings:
+
+    python -m benchmarks.price_load --tape quotes.json --latency 0.05 --jitter 0.02 --threads 8
+    python -m benchmarks.price_load --symbols 200 --provider resilient --error-rate 0.1
+    python -m benchmarks.price_load --symbols 20 --provider singleflight --threads 16 --latency 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROVIDERS = ('http', 'batch', 'resilient', 'singleflight')
+
+
+def synthetic_tape(symbols: int, seed: int = 0):
+    from sinvest.domain.price_replay import QuoteTape
+
+    rng = random.Random(seed)
+    return QuoteTape(prices={f'SYM{i:04d}': round(rng.uniform(5, 500), 2) for i in range(symbols)})
+
+
+def make_provider(kind: str, base_url: str):
+    """Build the client for `kind`; ``singleflight`` is the app's stack (coalescing over resilient over HTTP)."""
+    from sinvest.domain.price_coalescing import SingleFlightPriceProvider
+    from sinvest.domain.price_resilience import ResilientPriceProvider
+    from sinvest.quote_server import HttpPriceProvider
+
+    provider = HttpPriceProvider(base_url)
+    if kind == 'resilient':
+        return ResilientPriceProvider(provider)
+    if kind == 'singleflight':
+        return SingleFlightPriceProvider(ResilientPriceProvider(provider))
+    return provider
+
+
+def run_price_load(tape, provider: str = 'http', threads: int = 4, lookups: int = 200, latency: float = 0.0,
+                   jitter: float = 0.0, error_rate: float = 0.0, batch_size: int = 50, seed: int = 0) -> dict:
+    """Run `lookups` price requests over `threads` threads and return timing statistics.
+
+    With ``provider='batch'`` each request asks for `batch_size` symbols via
+    ``get_prices``. `coalesced` counts lookups that joined another thread's
+    in-flight fetch (``singleflight`` only).
+    """
+    from sinvest.quote_server import QuoteServer
+
+    symbols = sorted(tape.prices)
+    rng = random.Random(seed)
+    if provider == 'batch':
+        work = [rng.sample(symbols, min(batch_size, len(symbols))) for _ in range(lookups)]
+    else:
+        work = [rng.choice(symbols) for _ in range(lookups)]
+
+    with QuoteServer(tape, latency=latency, jitter=jitter, error_rate=error_rate, seed=seed) as server:
+        client = make_provider(provider, server.url)
+
+        def one(item):
+            start = time.perf_counter()
+            result = client.get_prices(item) if provider == 'batch' else {item: client.get_price(item)}
+            return time.perf_counter() - start, sum(1 for price in result.values() if not price)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            samples = list(pool.map(one, work))
+        elapsed = time.perf_counter() - started
+        upstream_requests = server.requests
+        coalesced = getattr(client, 'coalesced', 0)
+
+    latencies = sorted(s[0] for s in samples)
+    return {
+        'provider': provider,
+        'threads': threads,
+        'lookups': lookups,
+        'upstream_requests': upstream_requests,
+        'coalesced': coalesced,
+        'failed_prices': sum(s[1] for s in samples),
+        'seconds': elapsed,
+        'lookups_per_second': lookups / max(elapsed, 1e-9),
+        'p50': statistics.median(latencies),
+        'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        'max': latencies[-1],
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Load-test price providers against the local quote server.')
+    parser.add_argument('--tape', help='recorded JSON tape (default: synthetic prices)')
+    parser.add_argument('--symbols', type=int, default=100, help='synthetic tape size')
+    parser.add_argument('--provider', choices=PROVIDERS, default='http')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from sinvest.domain.price_replay import QuoteTape
+
+    tape = QuoteTape.load(args.tape) if args.tape else synthetic_tape(args.symbols, args.seed)
+    report = run_price_load(tape, provider=args.provider, threads=args.threads, lookups=args.lookups,
+                            latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                            batch_size=args.batch_size, seed=args.seed)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
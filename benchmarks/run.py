@@ -0,0 +1,185 @@
+"""Standalone benchmark runner for the repository, valuation and HTTP hot paths.
+
+Generates a synthetic dataset, times each benchmark and emits the results as
+JSON so runs can be compared against a stored baseline:
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json --threshold 0.2
+
+When run as a script the benchmark uses a throw-away SQLite database in a
+temporary directory (set through ``SINVEST_DATABASE_URL`` before the app is
+imported), so the development database is never touched.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+
+@dataclass
+class BenchmarkConfig:
+    portfolios: int = 5
+    holdings: int = 20
+    transactions: int = 50
+    latency: float = 0.0
+    repeat: int = 5
+    seed: int = 42
+
+
+def time_call(func, repeat: int) -> dict:
+    """Run `func` `repeat` times and return timing statistics in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {
+        'repeat': repeat,
+        'min': min(samples),
+        'max': max(samples),
+        'mean': statistics.fmean(samples),
+        'median': statistics.median(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def seed_dataset(db, config: BenchmarkConfig) -> list[int]:
+    """Create `config.portfolios` portfolios with holdings and transactions; return their ids."""
+    from sinvest.synthetic import SyntheticSpec, seed_synthetic
+
+    spec = SyntheticSpec(
+        portfolios=config.portfolios,
+        investments=config.holdings,
+        transactions=config.transactions,
+        seed=config.seed,
+    )
+    return seed_synthetic(db.session, spec).portfolio_ids
+
+
+def run_benchmarks(app, db, config: BenchmarkConfig) -> dict:
+    """Seed the database bound to `app` and time every benchmark.
+
+    Must be called inside an application context with an empty schema.
+    """
+    import sinvest.app as app_module
+    from sinvest.domain.price_provider import MockPriceProvider
+    from sinvest.domain.services import aggregate_portfolio
+    from sinvest.repositories.sqlalchemy_impl import SQLAlchemyPortfolioRepository
+
+    portfolio_ids = seed_dataset(db, config)
+    target_id = portfolio_ids[0]
+    repo = SQLAlchemyPortfolioRepository()
+    provider = MockPriceProvider(default=123.45, latency=config.latency)
+    portfolio = repo.get_portfolio(target_id)
+
+    results = {}
+
+    def get_portfolio():
+        db.session.expire_all()
+        repo.get_portfolio(target_id)
+
+    results['repository.get_portfolio'] = time_call(get_portfolio, config.repeat)
+    results['domain.aggregate_portfolio'] = time_call(lambda: aggregate_portfolio(portfolio, provider), config.repeat)
+
+    client = app.test_client()
+    original_provider = app_module.price_provider
+    app_module.price_provider = provider
+    try:
+        def get(path):
+            resp = client.get(path)
+            if resp.status_code != 200:
+                raise RuntimeError(f'GET {path} returned {resp.status_code}')
+
+        results['http.index'] = time_call(lambda: get('/'), config.repeat)
+        results['http.view_portfolio'] = time_call(lambda: get(f'/portfolio/{target_id}'), config.repeat)
+    finally:
+        app_module.price_provider = original_provider
+
+    return {
+        'meta': {
+            'config': asdict(config),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+        },
+        'results': results,
+    }
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = 0.2) -> dict:
+    """Compare median timings against a baseline.
+
+    Returns a mapping of benchmark name to ``{'ratio', 'regressed'}`` where
+    ratio is current/baseline median and `regressed` is True when the slowdown
+    exceeds `threshold` (0.2 == 20% slower).
+    """
+    comparison = {}
+    for name, stats in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base or not base.get('median'):
+            continue
+        ratio = stats['median'] / base['median']
+        comparison[name] = {'ratio': ratio, 'regressed': ratio > 1 + threshold}
+    return comparison
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Run sinvest benchmarks and emit JSON results.')
+    parser.add_argument('--portfolios', type=int, default=BenchmarkConfig.portfolios)
+    parser.add_argument('--holdings', type=int, default=BenchmarkConfig.holdings, help='investments per portfolio')
+    parser.add_argument('--transactions', type=int, default=BenchmarkConfig.transactions, help='transactions per holding')
+    parser.add_argument('--latency', type=float, default=BenchmarkConfig.latency, help='injected price latency in seconds')
+    parser.add_argument('--repeat', type=int, default=BenchmarkConfig.repeat)
+    parser.add_argument('--seed', type=int, default=BenchmarkConfig.seed)
+    parser.add_argument('--output', help='write JSON results to this file (default: stdout)')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown before flagging a regression')
+    args = parser.parse_args(argv)
+
+    config = BenchmarkConfig(
+        portfolios=args.portfolios,
+        holdings=args.holdings,
+        transactions=args.transactions,
+        latency=args.latency,
+        repeat=args.repeat,
+        seed=args.seed,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['SINVEST_DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from sinvest.app import app, db
+
+        with app.app_context():
+            db.create_all()
+            report = run_benchmarks(app, db, config)
+            db.session.remove()
+            db.engine.dispose()
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            report['comparison'] = compare_results(report, json.load(fh), args.threshold)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(payload + '\n')
+    else:
+        print(payload)
+
+    regressions = [name for name, c in report.get('comparison', {}).items() if c['regressed']]
+    if regressions:
+        print(f"Regressions detected: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
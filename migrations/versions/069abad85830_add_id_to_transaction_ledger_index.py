@@ -0,0 +1,32 @@
+"""Add id to the transaction ledger index for keyset pagination
+
+Revision ID: 069abad85830
+Revises: 7917dcc50eca
+Create Date: 2026-10-19 11:20:05.530941
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '069abad85830'
+down_revision = '7917dcc50eca'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (investment_id, transaction_date, id) matches the keyset ORDER BY, so
+    # pages are read straight from the index without a sort step.
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_investment_date')
+        batch_op.create_index('ix_transaction_investment_date',
+                              ['investment_id', 'transaction_date', 'id', 'quantity', 'unit_price'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_investment_date')
+        batch_op.create_index('ix_transaction_investment_date',
+                              ['investment_id', 'transaction_date', 'quantity', 'unit_price'], unique=False)
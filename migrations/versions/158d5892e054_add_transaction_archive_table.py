@@ -0,0 +1,42 @@
+"""Add transaction_archive table for ledger compaction
+
+Revision ID: 158d5892e054
+Revises: f678b30f4a89
+Create Date: 2026-10-19 15:22:04.530118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '158d5892e054'
+down_revision = 'f678b30f4a89'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('transaction_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('investment_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.BigInteger(), nullable=False),
+        sa.Column('unit_price', sa.BigInteger(), nullable=False),
+        sa.Column('transaction_date', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('opening_transaction_id', sa.Integer(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['investment_id'], ['investment.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('transaction_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_archive_investment', ['investment_id'], unique=False)
+        batch_op.create_index('ix_transaction_archive_opening', ['opening_transaction_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transaction_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_archive_opening')
+        batch_op.drop_index('ix_transaction_archive_investment')
+
+    op.drop_table('transaction_archive')
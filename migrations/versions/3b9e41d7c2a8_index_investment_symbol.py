@@ -0,0 +1,26 @@
+"""Index investment.symbol for symbol enumeration
+
+Revision ID: 3b9e41d7c2a8
+Revises: c47caa45d5f1
+Create Date: 2026-10-19 18:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9e41d7c2a8'
+down_revision = 'c47caa45d5f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('investment', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_investment_symbol'), ['symbol'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('investment', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_investment_symbol'))
@@ -0,0 +1,50 @@
+"""Store quantities and prices as fixed-point integers
+
+Revision ID: 7917dcc50eca
+Revises: f7db91d355a0
+Create Date: 2026-10-19 10:03:47.118260
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7917dcc50eca'
+down_revision = 'f7db91d355a0'
+branch_labels = None
+depends_on = None
+
+# Scales mirror sinvest.domain.money (copied so the migration stays stable
+# if the application constants change later).
+PRICE_SCALE = 1_000_000
+QUANTITY_SCALE = 10_000
+
+COLUMNS = (
+    ('investment', 'quantity', QUANTITY_SCALE),
+    ('investment', 'purchase_price', PRICE_SCALE),
+    ('transaction', 'quantity', QUANTITY_SCALE),
+    ('transaction', 'unit_price', PRICE_SCALE),
+)
+
+
+def upgrade():
+    for table, column, scale in COLUMNS:
+        op.execute(f'UPDATE "{table}" SET {column} = ROUND({column} * {scale})')
+    for table in ('investment', 'transaction'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for tbl, column, _ in COLUMNS:
+                if tbl == table:
+                    batch_op.alter_column(column, existing_type=sa.Float(), type_=sa.BigInteger(),
+                                          existing_nullable=False, postgresql_using=f'{column}::bigint')
+
+
+def downgrade():
+    for table in ('investment', 'transaction'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for tbl, column, _ in COLUMNS:
+                if tbl == table:
+                    batch_op.alter_column(column, existing_type=sa.BigInteger(), type_=sa.Float(),
+                                          existing_nullable=False)
+    for table, column, scale in COLUMNS:
+        op.execute(f'UPDATE "{table}" SET {column} = {column} * 1.0 / {scale}')
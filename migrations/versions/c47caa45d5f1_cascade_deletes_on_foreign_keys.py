@@ -0,0 +1,44 @@
+"""Cascade deletes through the portfolio -> investment -> transaction foreign keys
+
+Revision ID: c47caa45d5f1
+Revises: ea4c4817a08d
+Create Date: 2026-10-19 16:48:12.906337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47caa45d5f1'
+down_revision = 'ea4c4817a08d'
+branch_labels = None
+depends_on = None
+
+# The original foreign keys are unnamed; SQLite batch mode reflects them under
+# these names so they can be dropped and recreated.
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+# (table, column, referred table)
+CASCADING_KEYS = [
+    ('investment', 'portfolio_id', 'portfolio'),
+    ('transaction', 'investment_id', 'investment'),
+    ('transaction_archive', 'investment_id', 'investment'),
+    ('portfolio_snapshot', 'portfolio_id', 'portfolio'),
+]
+
+
+def _replace_foreign_keys(ondelete):
+    for table, column, referred in CASCADING_KEYS:
+        name = f'fk_{table}_{column}_{referred}'
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _replace_foreign_keys(None)
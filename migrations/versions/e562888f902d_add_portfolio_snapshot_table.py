@@ -0,0 +1,34 @@
+"""Add portfolio_snapshot table
+
+Revision ID: e562888f902d
+Revises: 069abad85830
+Create Date: 2026-10-19 12:41:18.207733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e562888f902d'
+down_revision = '069abad85830'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('portfolio_snapshot',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('portfolio_id', sa.Integer(), nullable=False),
+        sa.Column('taken_at', sa.DateTime(), nullable=False),
+        sa.Column('currency', sa.String(length=3), nullable=False),
+        sa.Column('total_value', sa.BigInteger(), nullable=False),
+        sa.Column('gain_loss', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['portfolio_id'], ['portfolio.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('portfolio_id', 'taken_at', 'currency', name='uix_snapshot_portfolio_time_currency')
+    )
+
+
+def downgrade():
+    op.drop_table('portfolio_snapshot')
@@ -0,0 +1,51 @@
+"""Add security table and link investments to it
+
+Revision ID: ea4c4817a08d
+Revises: 158d5892e054
+Create Date: 2026-10-19 16:03:51.274410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ea4c4817a08d'
+down_revision = '158d5892e054'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('security',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('isin', sa.String(length=12), nullable=False),
+        sa.Column('symbol', sa.String(length=10), nullable=False),
+        sa.Column('currency', sa.String(length=3), nullable=False),
+        sa.Column('type', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('isin')
+    )
+    with op.batch_alter_table('investment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('security_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_investment_security_id'), ['security_id'], unique=False)
+        batch_op.create_foreign_key('fk_investment_security_id_security', 'security', ['security_id'], ['id'])
+
+    # One security per ISIN; details come from its earliest investment
+    op.execute(
+        'INSERT INTO security (isin, symbol, currency, type, created_at) '
+        'SELECT i.isin, i.symbol, i.currency, i.type, CURRENT_TIMESTAMP FROM investment AS i '
+        'WHERE i.id = (SELECT MIN(j.id) FROM investment AS j WHERE j.isin = i.isin) '
+        'ORDER BY i.id'
+    )
+    op.execute('UPDATE investment SET security_id = (SELECT s.id FROM security AS s WHERE s.isin = investment.isin)')
+
+
+def downgrade():
+    with op.batch_alter_table('investment', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_investment_security_id_security', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_investment_security_id'))
+        batch_op.drop_column('security_id')
+
+    op.drop_table('security')
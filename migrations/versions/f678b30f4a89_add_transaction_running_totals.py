@@ -0,0 +1,43 @@
+"""Add running-total columns to the transaction ledger
+
+Revision ID: f678b30f4a89
+Revises: e562888f902d
+Create Date: 2026-10-19 14:05:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f678b30f4a89'
+down_revision = 'e562888f902d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('running_quantity_units', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('running_cost_units', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('running_count', sa.Integer(), nullable=True))
+
+    # Backfill with one window-function pass (UPDATE ... FROM needs SQLite >= 3.33)
+    op.execute(
+        'UPDATE "transaction" SET running_quantity_units = r.quantity_units, '
+        'running_cost_units = r.cost_units, running_count = r.row_count '
+        'FROM (SELECT id, '
+        'SUM(quantity) OVER w AS quantity_units, '
+        'SUM(quantity * unit_price) OVER w AS cost_units, '
+        'ROW_NUMBER() OVER w AS row_count '
+        'FROM "transaction" '
+        'WINDOW w AS (PARTITION BY investment_id ORDER BY transaction_date, id)) AS r '
+        'WHERE "transaction".id = r.id'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_column('running_count')
+        batch_op.drop_column('running_cost_units')
+        batch_op.drop_column('running_quantity_units')
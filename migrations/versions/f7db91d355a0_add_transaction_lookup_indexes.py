@@ -0,0 +1,31 @@
+"""Add covering (investment_id, transaction_date) and transaction_date indexes
+
+Revision ID: f7db91d355a0
+Revises: edf3035192be
+Create Date: 2026-10-19 09:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7db91d355a0'
+down_revision = 'edf3035192be'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # investment.portfolio_id lookups are already served by the
+    # uix_portfolio_isin unique index (portfolio_id is its leading column).
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_investment_date',
+                              ['investment_id', 'transaction_date', 'quantity', 'unit_price'], unique=False)
+        batch_op.create_index('ix_transaction_date', ['transaction_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_date')
+        batch_op.drop_index('ix_transaction_investment_date')
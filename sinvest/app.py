@@ -1,14 +1,26 @@
 """Main Flask application module"""
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from datetime import datetime
+import json
+import os
+import queue
+import threading
 import yfinance as yf
+from sinvest.db_config import apply_sqlite_pragmas, database_config_from_env
+from sinvest.db_routing import RoutingSession, create_replica_engine, set_read_replica
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key'  # Change this in production
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///portfolio.db'
+# Database URL, pool options and SQLite PRAGMAs come from SINVEST_* env vars
+app.config.update(database_config_from_env())
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# JSON-lines tick file replayed into the live valuation stream (see sinvest.quote_stream)
+app.config['QUOTE_STREAM_FILE'] = os.environ.get('SINVEST_QUOTE_STREAM')
+app.config['QUOTE_STREAM_SPEED'] = float(os.environ.get('SINVEST_QUOTE_STREAM_SPEED', 1.0))
+# Directory of the columnar daily close store (see sinvest.price_store); defaults to instance/price_history
+app.config['PRICE_HISTORY_DIR'] = os.environ.get('SINVEST_PRICE_HISTORY_DIR')
 
 
 def create_app(config: dict | None = None) -> Flask:
@@ -21,17 +33,42 @@ def create_app(config: dict | None = None) -> Flask:
         app.config.update(config)
     return app
 
-db = SQLAlchemy(app)
+# Repository reads may be routed to a read replica (see sinvest.db_routing)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
 migrate = Migrate(app, db)
 
+with app.app_context():
+    apply_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+if app.config.get('READ_REPLICA_DATABASE_URI'):
+    set_read_replica(create_replica_engine(app.config['READ_REPLICA_DATABASE_URI'], app.config['SQLITE_PRAGMAS']))
+
 # Import models after db initialization to avoid circular imports
 from sinvest.models.portfolio import Portfolio as PortfolioModel, Investment as InvestmentModel
 from sinvest.models.portfolio import Transaction as TransactionModel
+from sinvest.repositories.abstract import DuplicateInvestmentError, SecurityConflictError
 from sinvest.repositories.sqlalchemy_impl import SQLAlchemyPortfolioRepository
 from sinvest.domain.services import compute_investment_values, aggregate_portfolio
+from sinvest.domain.price_provider import YFinancePriceProvider
+from sinvest.domain.price_resilience import ResilientPriceProvider
+from sinvest.domain.price_coalescing import SingleFlightPriceProvider
+from sinvest.domain.entities import PositionTotals
+from sinvest.instrumentation import InstrumentedPriceProvider, InstrumentedRepository, init_instrumentation, registry, track_domain
+from sinvest.profiling import init_profiling
 
 # Repository instance (persistence implementation)
-repo = SQLAlchemyPortfolioRepository()
+repo = InstrumentedRepository(SQLAlchemyPortfolioRepository())
+# Shared market price provider used by all valuation routes; failing symbols
+# are backed off, a circuit breaker guards against upstream outages and
+# concurrent requests for the same symbol share one in-flight fetch
+resilient_price_provider = ResilientPriceProvider(YFinancePriceProvider())
+price_provider = InstrumentedPriceProvider(SingleFlightPriceProvider(resilient_price_provider))
+registry.add_metric_source(resilient_price_provider.stats)
+
+init_instrumentation(app)
+init_profiling(app)
+
+from sinvest.cli import register_cli
+register_cli(app)
 
 @app.route('/')
 def index():
@@ -61,13 +98,15 @@ def view_portfolio(portfolio_id):
         return abort(404)
 
     # Compose display data using domain services so templates are presentation-only
-    totals_by_currency, gains_by_currency = aggregate_portfolio(portfolio)
+    with track_domain():
+        totals_by_currency, gains_by_currency = aggregate_portfolio(portfolio, price_provider)
 
     import traceback, sys
     investments_display = []
     try:
         for inv in portfolio.investments:
-            vals = compute_investment_values(inv)
+            with track_domain():
+                vals = compute_investment_values(inv, price_provider)
             txs = []
             for t in (getattr(inv, 'transactions', []) or []):
                 txs.append({
@@ -78,8 +117,9 @@ def view_portfolio(portfolio_id):
                     'created_at': t.created_at.strftime('%Y-%m-%d %H:%M:%S') if getattr(t, 'created_at', None) else '',
                 })
             if txs:
-                cost_basis = sum((t['quantity'] or 0.0) * (t['unit_price'] or 0.0) for t in txs)
-                current_qty = sum((t['quantity'] or 0.0) for t in txs)
+                totals = PositionTotals.of(inv.transactions)
+                cost_basis = totals.cost_basis
+                current_qty = totals.quantity
             else:
                 cost_basis = (getattr(inv, 'purchase_price', 0.0) or 0.0) * (getattr(inv, 'quantity', 0.0) or 0.0)
                 current_qty = getattr(inv, 'quantity', 0.0) or 0.0
@@ -111,16 +151,160 @@ def view_portfolio(portfolio_id):
         return abort(500)
 
 
+@app.route('/portfolio/<int:portfolio_id>/snapshots')
+def portfolio_snapshots(portfolio_id):
+    """Return stored valuation snapshots as JSON, optionally limited by ?start=&end= (ISO dates)."""
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+        if end is not None and len(request.args['end']) == len('YYYY-MM-DD'):
+            end = end.date()  # a date-only end covers the whole day
+    except ValueError:
+        from flask import abort
+        return abort(400)
+    snapshots = repo.list_snapshots(portfolio_id, start=start, end=end)
+    return jsonify([
+        {
+            'taken_at': s.taken_at.isoformat(),
+            'currency': s.currency,
+            'total_value': s.total_value,
+            'gain_loss': s.gain_loss,
+        }
+        for s in snapshots
+    ])
+
+
+@app.route('/portfolio/<int:portfolio_id>/positions')
+def portfolio_positions(portfolio_id):
+    """Return quantity and cost basis per investment as of ?as_of= (ISO date, default today) as JSON."""
+    try:
+        as_of = datetime.fromisoformat(request.args['as_of']).date() if request.args.get('as_of') else datetime.utcnow().date()
+    except ValueError:
+        from flask import abort
+        return abort(400)
+    positions = repo.positions_as_of(portfolio_id, as_of)
+    return jsonify([
+        {
+            'investment_id': investment_id,
+            'quantity': totals.quantity,
+            'cost_basis': totals.cost_basis,
+            'transaction_count': totals.transaction_count,
+        }
+        for investment_id, totals in sorted(positions.items())
+    ])
+
+
+# --- Live valuation stream ---
+SSE_KEEPALIVE_SECONDS = 15
+QUOTE_STREAM_PAGE_SIZE = 500
+_quote_stream_lock = threading.Lock()
+
+
+def _quote_stream():
+    """Return the running QuoteStream, starting it on first use if a tick file is configured.
+
+    Holdings are read a page at a time with ledger totals summed in SQL, so
+    building the stream never loads transactions.
+    """
+    from sinvest.cli import _portfolio_batches
+    from sinvest.quote_stream import ReplayQuoteSource, build_quote_stream
+
+    with _quote_stream_lock:
+        stream = app.extensions.get('sinvest_quote_stream')
+        if stream is None and app.config.get('QUOTE_STREAM_FILE'):
+            source = ReplayQuoteSource(app.config['QUOTE_STREAM_FILE'], speed=app.config['QUOTE_STREAM_SPEED'])
+            portfolios, positions = [], {}
+            for page, totals in _portfolio_batches(repo, QUOTE_STREAM_PAGE_SIZE):
+                portfolios.extend(page)
+                positions.update(totals)
+            stream = build_quote_stream(portfolios, price_provider, source, positions=positions).start()
+            app.extensions['sinvest_quote_stream'] = stream
+        return stream
+
+
+def _sse_valuation(valuation) -> str:
+    payload = {
+        'portfolio_id': valuation.portfolio_id,
+        'totals_by_currency': valuation.totals_by_currency,
+        'gains_by_currency': valuation.gains_by_currency,
+    }
+    return f"event: valuation\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.route('/portfolio/<int:portfolio_id>/stream')
+def portfolio_stream(portfolio_id):
+    """Push live per-currency totals of a portfolio as Server-Sent Events."""
+    stream = _quote_stream()
+    if stream is None or stream.valuator.valuation(portfolio_id) is None:
+        from flask import abort
+        return abort(404)
+    updates = stream.subscribe()
+
+    def events():
+        try:
+            yield _sse_valuation(stream.valuator.valuation(portfolio_id))
+            while True:
+                try:
+                    changed = set(updates.get(timeout=SSE_KEEPALIVE_SECONDS))
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                while not updates.empty():  # collapse a backlog into one event
+                    changed |= updates.get_nowait()
+                if portfolio_id in changed:
+                    yield _sse_valuation(stream.valuator.valuation(portfolio_id))
+        finally:
+            stream.unsubscribe(updates)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 # --- Investment detail page ---
+TRANSACTIONS_PAGE_SIZE = 50
+
+
+def _format_cursor(key):
+    """Encode a (transaction_date, id) keyset position for use in a URL."""
+    if key is None:
+        return None
+    return f"{key[0].isoformat()}_{key[1]}"
+
+
+def _parse_cursor(value):
+    """Decode a cursor produced by `_format_cursor`; raises ValueError if malformed."""
+    if not value:
+        return None
+    date_part, _, id_part = value.rpartition('_')
+    return datetime.fromisoformat(date_part), int(id_part)
+
+
 @app.route('/investment/<int:investment_id>')
 def investment_detail(investment_id):
     inv = InvestmentModel.query.get_or_404(investment_id)
     portfolio = PortfolioModel.query.get(inv.portfolio_id)
-    vals = compute_investment_values(inv)
-    txs = inv.transactions or []
-    cost_basis = sum((t.quantity or 0.0) * (t.unit_price or 0.0) for t in txs) if txs else (inv.purchase_price or 0.0) * (inv.quantity or 0.0)
-    current_qty = sum((t.quantity or 0.0) for t in txs) if txs else inv.quantity
-    return render_template('investment_detail.html', investment=inv, portfolio=portfolio, transactions=txs, cost_basis=cost_basis, current_qty=current_qty, vals=vals)
+    try:
+        after = _parse_cursor(request.args.get('after'))
+        limit = int(request.args.get('limit', TRANSACTIONS_PAGE_SIZE))
+    except ValueError:
+        from flask import abort
+        return abort(400)
+
+    # Only one page of the ledger is loaded; header totals come from a SQL aggregate
+    page = repo.list_transactions(investment_id, after=after, limit=limit)
+    totals = repo.get_position_totals([investment_id])[investment_id]
+    with track_domain():
+        vals = compute_investment_values(inv, price_provider, totals=totals)
+    if totals.transaction_count:
+        cost_basis = totals.cost_basis
+        current_qty = totals.quantity
+    else:
+        cost_basis = (inv.purchase_price or 0.0) * (inv.quantity or 0.0)
+        current_qty = inv.quantity
+    return render_template('investment_detail.html', investment=inv, portfolio=portfolio,
+                           transactions=page.items, transaction_count=totals.transaction_count,
+                           next_cursor=_format_cursor(page.next_after), is_first_page=after is None,
+                           cost_basis=cost_basis, current_qty=current_qty, vals=vals)
 
 
 # --- Delete transaction ---
@@ -141,12 +325,12 @@ def delete_transaction(investment_id, transaction_id):
 @app.route('/portfolio/<int:portfolio_id>/add_investment', methods=['GET', 'POST'])
 def add_investment(portfolio_id):
     """Add investment to portfolio route"""
-    portfolio = repo.get_portfolio(portfolio_id)
-    if not portfolio:
-        from flask import abort
-        abort(404)
+    from flask import abort
 
     if request.method == 'POST':
+        # Indexed existence checks only: the write path never loads the ledger
+        if not repo.portfolio_exists(portfolio_id):
+            abort(404)
         symbol = request.form.get('symbol')
         isin = request.form.get('isin')
         currency = request.form.get('currency') or 'USD'
@@ -155,11 +339,9 @@ def add_investment(portfolio_id):
         purchase_price = float(request.form.get('purchase_price'))
         purchase_date = datetime.strptime(request.form.get('purchase_date'), '%Y-%m-%d')
         # Prevent adding duplicate ISINs within the same portfolio
-        existing_port = repo.get_portfolio(portfolio_id)
-        if existing_port and any(i.isin == isin for i in existing_port.investments):
+        if repo.investment_exists(portfolio_id, isin):
             flash('An investment with this ISIN already exists in the portfolio.', 'warning')
             return redirect(url_for('view_portfolio', portfolio_id=portfolio_id))
-            return redirect(url_for('view_portfolio', portfolio_id=portfolio_id))
 
         # Build domain entity with initial transaction and persist through repository
         from sinvest.domain.entities import InvestmentEntity, TransactionEntity
@@ -187,11 +369,22 @@ def add_investment(portfolio_id):
             transactions=[initial_transaction]  # Include initial transaction
         )
 
-        repo.add_investment(inv_entity)
+        try:
+            repo.add_investment(inv_entity)
+        except DuplicateInvestmentError:
+            # Lost a race with a concurrent add of the same ISIN
+            flash('An investment with this ISIN already exists in the portfolio.', 'warning')
+            return redirect(url_for('view_portfolio', portfolio_id=portfolio_id))
+        except SecurityConflictError as e:
+            flash(f'{e}. Use the symbol and currency already recorded for this ISIN.', 'error')
+            return redirect(url_for('view_portfolio', portfolio_id=portfolio_id))
         
         flash('Investment added successfully with initial transaction!', 'success')
         return redirect(url_for('view_portfolio', portfolio_id=portfolio_id))
 
+    portfolio = repo.get_portfolio(portfolio_id)
+    if not portfolio:
+        abort(404)
     return render_template('investment_form.html', portfolio=portfolio)
 
 @app.route('/portfolio/<int:portfolio_id>/investment/<int:investment_id>/delete', methods=['POST'])
@@ -0,0 +1,317 @@
+"""Flask CLI commands (``flask --app sinvest.app <command>``)."""
+from datetime import datetime
+
+import click
+from flask import Flask
+
+
+def _portfolio_batches(repo, batch_size: int):
+    """Yield (portfolios, position totals) a page of `batch_size` portfolios at a time.
+
+    Ledgers are summed by the database; no transactions are loaded.
+    """
+    after_id = None
+    while True:
+        portfolios = repo.list_portfolios_page(after_id, batch_size)
+        if not portfolios:
+            return
+        after_id = portfolios[-1].id
+        yield portfolios, repo.get_position_totals([inv.id for p in portfolios for inv in p.investments])
+
+
+def register_cli(app: Flask) -> None:
+    """Attach the sinvest maintenance commands to `app`."""
+    from sinvest.app import db
+
+    @app.cli.command('seed-synthetic')
+    @click.option('--portfolios', '-n', default=10, show_default=True, help='Number of portfolios to create.')
+    @click.option('--investments', '-m', default=10, show_default=True, help='Investments per portfolio.')
+    @click.option('--transactions', '-k', default=10, show_default=True, help='Transactions per investment.')
+    @click.option('--seed', default=0, show_default=True, help='Random seed; same seed gives the same data.')
+    @click.option('--batch-size', default=50_000, show_default=True, help='Rows per INSERT batch.')
+    def seed_synthetic_command(portfolios, investments, transactions, seed, batch_size):
+        """Bulk-load a deterministic synthetic dataset."""
+        from sinvest.synthetic import SyntheticSpec, seed_synthetic
+
+        spec = SyntheticSpec(portfolios=portfolios, investments=investments, transactions=transactions, seed=seed)
+        stats = seed_synthetic(db.session, spec, batch_size=batch_size)
+        click.echo(
+            f'Created {stats.portfolios} portfolios, {stats.investments} investments and '
+            f'{stats.transactions} transactions in {stats.seconds:.2f}s '
+            f'({stats.rows / max(stats.seconds, 1e-9):,.0f} rows/s)'
+        )
+
+    @app.cli.command('snapshot-portfolios')
+    @click.option('--at', 'taken_at', type=click.DateTime(), default=None,
+                  help='Snapshot timestamp (default: now, UTC).')
+    @click.option('--batch-size', default=500, show_default=True, help='Portfolios valued per insert batch.')
+    def snapshot_portfolios_command(taken_at, batch_size):
+        """Store a valuation snapshot of every portfolio (suitable for cron).
+
+        Re-running with the same ``--at`` replaces the snapshots taken then.
+        """
+        import sinvest.app as app_module
+        from sinvest.domain.services import resolve_prices, snapshot_portfolios
+        from sinvest.revaluation import distinct_symbols
+
+        taken_at = taken_at or datetime.utcnow().replace(microsecond=0)
+        repo = app_module.repo
+        prices = resolve_prices(distinct_symbols(db.session), app_module.price_provider)
+        valued = written = 0
+        with repo.unit_of_work():
+            for portfolios, positions in _portfolio_batches(repo, batch_size):
+                batch = snapshot_portfolios(portfolios, taken_at, prices=prices, positions=positions)
+                repo.delete_snapshots([p.id for p in portfolios], taken_at)
+                written += repo.add_snapshots(batch)
+                valued += len(portfolios)
+        click.echo(f'Wrote {written} snapshot rows for {valued} portfolios at {taken_at.isoformat()}')
+
+    @app.cli.command('value-all')
+    @click.option('--batch-size', default=500, show_default=True, help='Portfolios valued per batch.')
+    def value_all_command(batch_size):
+        """Value every portfolio, pricing each distinct symbol once for the whole run."""
+        import time
+
+        import sinvest.app as app_module
+        from sinvest.domain.services import resolve_prices, value_portfolios
+        from sinvest.revaluation import distinct_symbols
+
+        started = time.perf_counter()
+        prices = resolve_prices(distinct_symbols(db.session), app_module.price_provider)
+        totals = {}
+        valued = 0
+        for batch, positions in _portfolio_batches(app_module.repo, batch_size):
+            for valuation in value_portfolios(batch, prices=prices, positions=positions):
+                for cur, value in valuation.totals_by_currency.items():
+                    totals[cur] = totals.get(cur, 0.0) + value
+            valued += len(batch)
+        elapsed = time.perf_counter() - started
+        for cur in sorted(totals):
+            click.echo(f'{cur}: {totals[cur]:,.2f}')
+        click.echo(
+            f'Valued {valued} portfolios ({len(prices)} distinct symbols) in {elapsed:.2f}s '
+            f'({valued / max(elapsed, 1e-9):,.1f} portfolios/s)'
+        )
+
+    @app.cli.command('revalue-all')
+    @click.option('--at', 'taken_at', type=click.DateTime(), default=None,
+                  help='Snapshot timestamp (default: now, UTC).')
+    @click.option('--workers', '-w', default=None, type=int, help='Worker processes (default: CPU count).')
+    @click.option('--shards', default=None, type=int, help='Portfolio id ranges to split into (default: 4 per worker).')
+    @click.option('--batch-size', default=1000, show_default=True, help='Portfolios valued per insert batch.')
+    def revalue_all_command(taken_at, workers, shards, batch_size):
+        """Snapshot every portfolio using a process pool (nightly job)."""
+        import sinvest.app as app_module
+        from sinvest.domain.services import resolve_prices
+        from sinvest.revaluation import distinct_symbols, run_revaluation
+
+        taken_at = taken_at or datetime.utcnow().replace(microsecond=0)
+        prices = resolve_prices(distinct_symbols(db.session), app_module.price_provider)
+        db.session.remove()
+        stats = run_revaluation(db.engine.url.render_as_string(hide_password=False), prices, taken_at,
+                                workers=workers, shards=shards, batch_size=batch_size)
+        click.echo(
+            f'Wrote {stats.snapshots} snapshot rows for {stats.portfolios} portfolios '
+            f'({len(prices)} distinct symbols) with {stats.workers} workers / {stats.shards} shards '
+            f'in {stats.seconds:.2f}s ({stats.portfolios_per_second:,.1f} portfolios/s)'
+        )
+
+    @app.cli.command('record-quotes')
+    @click.argument('output', type=click.Path(dir_okay=False))
+    @click.option('--history', 'history_period', default=None, help='Also record daily closes for this yfinance period (e.g. 1y).')
+    def record_quotes_command(output, history_period):
+        """Record live prices of every held symbol to a replayable JSON tape."""
+        from sinvest.domain.price_provider import YFinancePriceProvider
+        from sinvest.domain.price_replay import RecordingPriceProvider
+        from sinvest.revaluation import distinct_symbols
+
+        recorder = RecordingPriceProvider(YFinancePriceProvider())
+        symbols = distinct_symbols(db.session)
+        for symbol in symbols:
+            recorder.get_price(symbol)
+            if history_period:
+                recorder.get_history(symbol, history_period)
+        recorder.tape.save(output)
+        click.echo(f'Recorded {len(recorder.tape.prices)} of {len(symbols)} symbols to {output}')
+
+    @app.cli.command('import-history')
+    @click.option('--period', default='1mo', show_default=True, help='yfinance period fetched for symbols already stored.')
+    @click.option('--full-period', default='max', show_default=True, help='yfinance period fetched for new symbols.')
+    def import_history_command(period, full_period):
+        """Append new daily closes of every held symbol to the local price history store."""
+        import os
+
+        from sinvest.domain.price_provider import YFinancePriceProvider
+        from sinvest.price_store import PriceHistoryStore, import_history
+        from sinvest.revaluation import distinct_symbols
+
+        root = app.config.get('PRICE_HISTORY_DIR') or os.path.join(app.instance_path, 'price_history')
+        store = PriceHistoryStore(root)
+        added = import_history(store, YFinancePriceProvider(), distinct_symbols(db.session), period, full_period)
+        click.echo(f'Appended {sum(added.values())} rows for {len(added)} symbols to {root}')
+
+    @app.cli.command('risk-report')
+    @click.option('--years', default=10, show_default=True, help='Years of daily closes to use.')
+    @click.option('--confidence', default=0.95, show_default=True, help='VaR/CVaR confidence level.')
+    @click.option('--batch-size', default=500, show_default=True, help='Portfolios evaluated per batch.')
+    def risk_report_command(years, confidence, batch_size):
+        """Print risk metrics of every portfolio as JSON lines (from the price history store).
+
+        Portfolios of a page that hold the same priced symbols share one returns
+        matrix and are evaluated together by ``portfolio_risk_batch``.
+        """
+        import json
+        import os
+        from datetime import date, timedelta
+
+        import numpy as np
+
+        import sinvest.app as app_module
+        from sinvest.domain.risk import (RiskReport, align_closes, portfolio_risk_batch, portfolio_weights,
+                                         returns_matrix)
+        from sinvest.domain.services import resolve_prices
+        from sinvest.price_store import PriceHistoryStore, StoredHistoricalPriceProvider
+        from sinvest.revaluation import distinct_symbols
+
+        root = app.config.get('PRICE_HISTORY_DIR') or os.path.join(app.instance_path, 'price_history')
+        history = StoredHistoricalPriceProvider(PriceHistoryStore(root))
+        start = date.today() - timedelta(days=round(365.25 * years))
+        prices = resolve_prices(distinct_symbols(db.session), app_module.price_provider)
+        series = {}
+
+        def closes(symbol):
+            if symbol not in series:
+                series[symbol] = history.get_closes(symbol, start)
+            return series[symbol]
+
+        for portfolios, positions in _portfolio_batches(app_module.repo, batch_size):
+            rows = {}
+            groups = {}  # usable symbols -> [(portfolio id, normalised weights)]
+            for portfolio in portfolios:
+                symbols, weights = portfolio_weights(portfolio, prices, positions=positions)
+                usable = [i for i, symbol in enumerate(symbols) if len(closes(symbol)) > 1]
+                if not usable or weights[usable].sum() <= 0:
+                    rows[portfolio.id] = {'portfolio_id': portfolio.id, 'error': 'no price history'}
+                    continue
+                key = tuple(symbols[i] for i in usable)
+                groups.setdefault(key, []).append((portfolio.id, weights[usable] / weights[usable].sum()))
+            for symbols, members in groups.items():
+                _, aligned = align_closes([closes(symbol) for symbol in symbols])
+                returns = returns_matrix(aligned)
+                metrics = portfolio_risk_batch(returns, np.vstack([w for _, w in members]), confidence)
+                for n, (pid, _) in enumerate(members):
+                    report = RiskReport(confidence=confidence, observations=len(returns),
+                                        **{name: float(values[n]) for name, values in metrics.items()})
+                    rows[pid] = {'portfolio_id': pid, **report.__dict__}
+            for portfolio in portfolios:
+                click.echo(json.dumps(rows[portfolio.id]))
+
+    @app.cli.command('rebalance')
+    @click.argument('targets_file', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--by', type=click.Choice(['investment', 'type']), default='investment', show_default=True,
+                  help='Targets are keyed by ISIN or by investment type.')
+    @click.option('--whole-units/--fractional', default=True, show_default=True)
+    @click.option('--min-trade', 'min_trade_value', default=0.0, show_default=True, help='Skip smaller trades (value).')
+    @click.option('--no-sell', is_flag=True, help='Only buy (needs cash in the targets file).')
+    @click.option('--persist', is_flag=True, help='Write the proposed orders as transactions.')
+    @click.option('--batch-size', default=5000, show_default=True,
+                  help='Portfolios per page and transactions per insert batch.')
+    def rebalance_command(targets_file, by, whole_units, min_trade_value, no_sell, persist, batch_size):
+        """Propose (and optionally record) trades moving every portfolio to target weights.
+
+        TARGETS_FILE is JSON: {"targets": {key: weight} or {portfolio_id: {key: weight}},
+        "cash": {portfolio_id: amount}}. Portfolios are read a page at a time and
+        valued from ledger totals; with --persist every page is recorded in one
+        transaction.
+        """
+        import json
+        from contextlib import nullcontext
+
+        import sinvest.app as app_module
+        from sinvest.domain.rebalancing import RebalanceConstraints, opening_balances, rebalance_portfolios
+        from sinvest.domain.services import resolve_prices
+        from sinvest.revaluation import distinct_symbols
+
+        with open(targets_file) as fh:
+            spec = json.load(fh)
+        repo = app_module.repo
+        prices = resolve_prices(distinct_symbols(db.session), app_module.price_provider)
+        constraints = RebalanceConstraints(whole_units=whole_units, min_trade_value=min_trade_value,
+                                           allow_sells=not no_sell)
+        cash = {int(pid): float(amount) for pid, amount in spec.get('cash', {}).items()}
+        at = datetime.now().replace(microsecond=0)
+        orders = ordered = 0
+        with repo.unit_of_work() if persist else nullcontext():
+            for portfolios, positions in _portfolio_batches(repo, batch_size):
+                page = rebalance_portfolios(portfolios, spec['targets'], prices, constraints, by=by, cash=cash,
+                                            positions=positions, at=at)
+                trades = [tx for txs in page.values() for tx in txs]
+                for pid, txs in sorted(page.items()):
+                    for tx in txs:
+                        click.echo(f'portfolio {pid} investment {tx.investment_id}: '
+                                   f'{"BUY" if tx.quantity > 0 else "SELL"} {abs(tx.quantity):g} @ {tx.unit_price:.2f}')
+                if persist:
+                    # Holdings valued from their quantity field need an opening row first
+                    trades = opening_balances(portfolios, page, positions=positions) + trades
+                    for start in range(0, len(trades), batch_size):
+                        repo.add_transactions(trades[start:start + batch_size])
+                orders += len(trades)
+                ordered += len(page)
+        click.echo(f'{orders} orders for {ordered} portfolios' + (' recorded' if persist else ''))
+
+    @app.cli.command('compact-ledger')
+    @click.option('--before', 'cutoff', type=click.DateTime(), required=True,
+                  help='Roll transactions dated before this into opening-balance rows.')
+    @click.option('--investment', 'investment_ids', type=int, multiple=True, help='Only these investments (repeatable).')
+    @click.option('--dry-run', is_flag=True, help='Only report rows and bytes that would be saved.')
+    def compact_ledger_command(cutoff, investment_ids, dry_run):
+        """Archive old transactions behind one opening-balance row per investment."""
+        from sinvest.ledger_compaction import compact_ledger
+
+        stats = compact_ledger(db.session, cutoff, investment_ids or None, dry_run=dry_run)
+        if not dry_run:
+            db.session.commit()
+        saved = f'{stats.bytes_saved:,} bytes' if stats.bytes_saved is not None else 'unknown bytes'
+        click.echo(
+            f'{"Would compact" if dry_run else "Compacted"} {stats.holdings} investments: '
+            f'{stats.rows_archived} rows -> {stats.rows_written} ({stats.rows_saved} rows, ~{saved} saved); '
+            f'{stats.skipped_holdings} skipped (flat, short or negative cost)'
+        )
+
+    @app.cli.command('restore-ledger')
+    @click.option('--investment', 'investment_ids', type=int, multiple=True, help='Only these investments (repeatable).')
+    def restore_ledger_command(investment_ids):
+        """Undo ledger compaction: move archived transactions back."""
+        from sinvest.ledger_compaction import restore_ledger
+
+        restored = restore_ledger(db.session, investment_ids or None)
+        db.session.commit()
+        click.echo(f'Restored {restored} transactions')
+
+    @app.cli.command('verify-ledger')
+    @click.option('--investment', 'investment_ids', type=int, multiple=True, help='Only these investments (repeatable).')
+    def verify_ledger_command(investment_ids):
+        """Check that every opening-balance row matches the transactions it replaced."""
+        from sinvest.ledger_compaction import verify_compaction
+
+        mismatches = verify_compaction(db.session, investment_ids or None)
+        for m in mismatches:
+            click.echo(f'opening row {m.opening_transaction_id} (investment {m.investment_id}): '
+                       f'quantity off by {m.quantity_diff_units} units, cost off by {m.cost_diff_units} units')
+        if mismatches:
+            raise click.ClickException(f'{len(mismatches)} opening-balance rows do not match the archive')
+        click.echo('Ledger archive is consistent')
+
+    @app.cli.command('profile-url')
+    @click.argument('path')
+    def profile_url_command(path):
+        """Print PATH with a signed flag that profiles the request under cProfile."""
+        from urllib.parse import urlencode
+
+        from sinvest.profiling import QUERY_FLAG, profile_token
+
+        try:
+            token = profile_token(app, path)
+        except RuntimeError as exc:
+            raise click.ClickException(str(exc)) from exc
+        click.echo(f'{path}?{urlencode({QUERY_FLAG: token})}')
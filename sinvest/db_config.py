@@ -0,0 +1,106 @@
+"""Database engine configuration read from the environment.
+
+SQLite (default) is tuned through PRAGMAs applied to every new connection:
+WAL journaling lets readers proceed while a writer holds the write lock,
+``synchronous=NORMAL`` avoids an fsync per commit in WAL mode, ``mmap_size``
+serves reads from the page cache, ``busy_timeout`` makes writers wait for
+the lock instead of failing immediately, and ``foreign_keys`` turns on
+constraint enforcement (off by default in SQLite), which the schema's
+``ON DELETE CASCADE`` keys rely on.
+
+Server databases (PostgreSQL, MySQL, ...) get pool sizing, overflow,
+pre-ping and recycle options instead.
+
+Environment variables:
+    SINVEST_DATABASE_URL          SQLAlchemy URL (default ``sqlite:///portfolio.db``)
+    SINVEST_READ_REPLICA_URL      optional read replica URL (see sinvest.db_routing)
+    SINVEST_SQLITE_JOURNAL_MODE   default ``WAL``
+    SINVEST_SQLITE_SYNCHRONOUS    default ``NORMAL``
+    SINVEST_SQLITE_MMAP_SIZE      bytes, default 268435456 (256 MiB)
+    SINVEST_SQLITE_BUSY_TIMEOUT   milliseconds, default 5000
+    SINVEST_SQLITE_FOREIGN_KEYS   default ``ON``
+    SINVEST_DB_POOL_SIZE          default 5
+    SINVEST_DB_MAX_OVERFLOW       default 10
+    SINVEST_DB_POOL_TIMEOUT       seconds, default 30
+    SINVEST_DB_POOL_RECYCLE       seconds, default 1800
+    SINVEST_DB_POOL_PRE_PING      default ``true``
+"""
+from __future__ import annotations
+
+import os
+from collections.abc import Mapping
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+DEFAULT_DATABASE_URL = 'sqlite:///portfolio.db'
+
+SQLITE_PRAGMA_DEFAULTS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 268435456,
+    'busy_timeout': 5000,
+    'foreign_keys': 'ON',
+}
+
+
+def _env_bool(value: str) -> bool:
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def is_sqlite_url(url: str) -> bool:
+    return make_url(url).get_backend_name() == 'sqlite'
+
+
+def sqlite_pragmas_from_env(environ: Mapping[str, str] = os.environ) -> dict:
+    """Return the PRAGMAs to apply to each SQLite connection."""
+    return {
+        'journal_mode': environ.get('SINVEST_SQLITE_JOURNAL_MODE', SQLITE_PRAGMA_DEFAULTS['journal_mode']),
+        'synchronous': environ.get('SINVEST_SQLITE_SYNCHRONOUS', SQLITE_PRAGMA_DEFAULTS['synchronous']),
+        'mmap_size': int(environ.get('SINVEST_SQLITE_MMAP_SIZE', SQLITE_PRAGMA_DEFAULTS['mmap_size'])),
+        'busy_timeout': int(environ.get('SINVEST_SQLITE_BUSY_TIMEOUT', SQLITE_PRAGMA_DEFAULTS['busy_timeout'])),
+        'foreign_keys': environ.get('SINVEST_SQLITE_FOREIGN_KEYS', SQLITE_PRAGMA_DEFAULTS['foreign_keys']),
+    }
+
+
+def engine_options_from_env(url: str, environ: Mapping[str, str] = os.environ) -> dict:
+    """Return ``create_engine`` keyword options suited to the database at `url`."""
+    if is_sqlite_url(url):
+        # SQLite connections are cheap; lock waits are handled by busy_timeout
+        return {}
+    return {
+        'pool_size': int(environ.get('SINVEST_DB_POOL_SIZE', 5)),
+        'max_overflow': int(environ.get('SINVEST_DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(environ.get('SINVEST_DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(environ.get('SINVEST_DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': _env_bool(environ.get('SINVEST_DB_POOL_PRE_PING', 'true')),
+    }
+
+
+def database_config_from_env(environ: Mapping[str, str] = os.environ) -> dict:
+    """Return the Flask-SQLAlchemy config keys derived from the environment."""
+    url = environ.get('SINVEST_DATABASE_URL', DEFAULT_DATABASE_URL)
+    return {
+        'SQLALCHEMY_DATABASE_URI': url,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options_from_env(url, environ),
+        'SQLITE_PRAGMAS': sqlite_pragmas_from_env(environ),
+        'READ_REPLICA_DATABASE_URI': environ.get('SINVEST_READ_REPLICA_URL'),
+    }
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Mapping[str, object]) -> None:
+    """Run `pragmas` on every new DBAPI connection of a SQLite `engine`.
+
+    Does nothing for other backends.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
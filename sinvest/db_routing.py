@@ -0,0 +1,90 @@
+"""Read/write routing between the primary database and a read replica.
+
+`RoutingSession` is the Flask-SQLAlchemy session class. Statements run on the
+primary unless all of these hold, in which case they go to the replica:
+
+* a replica engine is configured (`set_read_replica`);
+* the caller is inside `replica_reads()` (the repository wraps its read-only
+  methods in it);
+* the session has not written anything yet.
+
+The last rule gives read-your-writes: once a session flushes or executes an
+INSERT/UPDATE/DELETE it sticks to the primary until it is closed, which for
+``db.session`` is the end of the request (app context).
+
+Environment variable:
+    SINVEST_READ_REPLICA_URL   SQLAlchemy URL of the replica (unset: no routing)
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from sinvest.db_config import apply_sqlite_pragmas, engine_options_from_env
+
+STICKY_KEY = 'sinvest_wrote'
+
+_replica_engine: Engine | None = None
+_prefer_replica: ContextVar[bool] = ContextVar('sinvest_prefer_replica', default=False)
+
+
+def set_read_replica(engine: Engine | None) -> None:
+    """Route repository reads to `engine` (None turns routing off)."""
+    global _replica_engine
+    _replica_engine = engine
+
+
+def read_replica() -> Engine | None:
+    return _replica_engine
+
+
+def create_replica_engine(url: str, pragmas) -> Engine:
+    """Engine for the replica at `url`, tuned like the primary."""
+    engine = create_engine(url, **engine_options_from_env(url))
+    apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+@contextmanager
+def replica_reads():
+    """Let statements in this block use the read replica (if the session has not written)."""
+    token = _prefer_replica.set(True)
+    try:
+        yield
+    finally:
+        _prefer_replica.reset(token)
+
+
+def reads_replica(method):
+    """Decorator for read-only repository methods."""
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+class RoutingSession(FlaskSession):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if getattr(clause, 'is_dml', False):
+            self.info[STICKY_KEY] = True
+        elif (bind is None and _replica_engine is not None and _prefer_replica.get()
+              and not self._flushing and not self.info.get(STICKY_KEY)):
+            return _replica_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    @property
+    def sticky(self) -> bool:
+        """True once this session has written and reads stay on the primary."""
+        return bool(self.info.get(STICKY_KEY))
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _stick_to_primary(session, flush_context):
+    session.info[STICKY_KEY] = True
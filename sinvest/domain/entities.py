@@ -1,6 +1,10 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List
+from typing import Dict, List
+
+import numpy as np
+
+from .money import COST_SCALE, QUANTITY_SCALE, ledger_totals
 
 
 @dataclass
@@ -15,6 +19,16 @@ class InvestmentEntity:
     purchase_price: float
     purchase_date: datetime
     transactions: List["TransactionEntity"] | None = None
+    security_id: int | None = None
+
+
+@dataclass
+class SecurityEntity:
+    id: int | None
+    isin: str
+    symbol: str
+    currency: str
+    type: str
 
 
 @dataclass
@@ -35,3 +49,84 @@ class TransactionEntity:
     unit_price: float
     transaction_date: datetime
     created_at: datetime | None = None
+
+
+@dataclass
+class PortfolioSnapshotEntity:
+    id: int | None
+    portfolio_id: int
+    taken_at: datetime
+    currency: str
+    total_value: float
+    gain_loss: float
+
+
+@dataclass
+class PortfolioValuation:
+    """Current per-currency totals and gains of one portfolio."""
+    portfolio_id: int
+    totals_by_currency: Dict[str, float]
+    gains_by_currency: Dict[str, float]
+
+
+@dataclass
+class TransactionPage:
+    """One keyset page of a ledger ordered by (transaction_date, id).
+
+    `next_after` is the (transaction_date, id) key to pass as `after` to fetch
+    the following page, or None on the last page.
+    """
+    items: List[TransactionEntity]
+    next_after: tuple[datetime, int] | None = None
+
+
+@dataclass(frozen=True)
+class PositionTotals:
+    """Exact quantity and cost basis of a holding, in fixed-point units.
+
+    Totals can be updated incrementally with `+`/`-` and compared for
+    equality without recomputing the ledger.
+    """
+    quantity_units: int = 0
+    cost_units: int = 0
+    transaction_count: int = 0
+
+    @classmethod
+    def of(cls, transactions) -> "PositionTotals":
+        """Totals of an in-memory ledger (objects with `quantity` and `unit_price`)."""
+        transactions = list(transactions)
+        qty_units, cost_units = ledger_totals(transactions)
+        return cls(qty_units, cost_units, len(transactions))
+
+    @property
+    def quantity(self) -> float:
+        return self.quantity_units / QUANTITY_SCALE
+
+    @property
+    def cost_basis(self) -> float:
+        return self.cost_units / COST_SCALE
+
+    def __add__(self, other: "PositionTotals") -> "PositionTotals":
+        return PositionTotals(self.quantity_units + other.quantity_units,
+                              self.cost_units + other.cost_units,
+                              self.transaction_count + other.transaction_count)
+
+    def __sub__(self, other: "PositionTotals") -> "PositionTotals":
+        return PositionTotals(self.quantity_units - other.quantity_units,
+                              self.cost_units - other.cost_units,
+                              self.transaction_count - other.transaction_count)
+
+
+@dataclass(frozen=True)
+class PriceSeries:
+    """Daily closes of one symbol, oldest first.
+
+    `dates` is a ``datetime64[D]`` array and `closes` a float64 array of the
+    same length; both may be read-only views into a memory-mapped store.
+    """
+    symbol: str
+    dates: np.ndarray
+    closes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.closes)
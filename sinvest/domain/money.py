@@ -0,0 +1,65 @@
+"""Fixed-point money and quantity arithmetic.
+
+Prices are stored as integer micro-units of their currency and quantities as
+integer ten-thousandths of a unit. A cost (quantity x price) is therefore an
+integer in units of 1 / COST_SCALE, so sums over any number of transactions
+are exact and can be maintained incrementally.
+
+Aggregation runs on int64 NumPy arrays. A single cost product must fit in an
+int64, which bounds it at ~9.2e8 currency units; larger ledgers fall back to
+arbitrary-precision Python integers.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Iterable
+
+import numpy as np
+
+PRICE_SCALE = 1_000_000
+QUANTITY_SCALE = 10_000
+COST_SCALE = PRICE_SCALE * QUANTITY_SCALE
+
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+def to_units(value, scale: int) -> int:
+    """Convert a float/Decimal/int amount to integer units of 1/`scale`, rounding half-even."""
+    if isinstance(value, Decimal):
+        return int((value * scale).to_integral_value())
+    return int(round(float(value) * scale))
+
+
+def to_price_units(value) -> int:
+    return to_units(value, PRICE_SCALE)
+
+
+def to_quantity_units(value) -> int:
+    return to_units(value, QUANTITY_SCALE)
+
+
+def from_units(units: int, scale: int) -> float:
+    return units / scale
+
+
+def position_totals(quantity_units: Iterable[int], price_units: Iterable[int]) -> tuple[int, int]:
+    """Return exact (sum of quantity units, sum of cost units) for a ledger.
+
+    Cost units are quantity units x price units (scale COST_SCALE).
+    """
+    qty = np.asarray(quantity_units, dtype=np.int64)
+    price = np.asarray(price_units, dtype=np.int64)
+    if qty.size == 0:
+        return 0, 0
+    bound = int(np.abs(qty).max()) * int(np.abs(price).max()) * qty.size
+    if bound <= _INT64_MAX:
+        return int(qty.sum()), int(qty @ price)
+    # Out of int64 range: exact Python integer arithmetic
+    return int(qty.sum(dtype=object)), int(np.dot(qty.astype(object), price.astype(object)))
+
+
+def ledger_totals(transactions) -> tuple[int, int]:
+    """Exact (quantity units, cost units) of objects exposing `quantity` and `unit_price`."""
+    quantities = [to_quantity_units(t.quantity or 0) for t in transactions]
+    prices = [to_price_units(t.unit_price or 0) for t in transactions]
+    return position_totals(quantities, prices)
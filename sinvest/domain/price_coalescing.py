@@ -0,0 +1,101 @@
+"""Single-flight request coalescing for price lookups.
+
+Under a cold cache every request thread would ask the upstream for the same
+symbols at once. `SingleFlightPriceProvider` keeps one in-flight fetch per
+symbol: concurrent callers for that symbol wait on the same future. With a
+non-zero `window`, the first caller also waits that long before fetching, and
+every symbol requested meanwhile is fetched with it in one ``get_prices``
+batch.
+
+The window only pays off when the inner provider has a batch endpoint (its
+class overrides ``get_prices``, like ``HttpPriceProvider``). Wrappers such as
+``ResilientPriceProvider`` and ``YFinancePriceProvider`` inherit the
+one-symbol-at-a-time default, where a window would just delay the first
+caller and serialise everyone else's symbols behind it, so it is ignored for
+them.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Iterable
+
+from .price_provider import MarketPriceProvider
+
+
+def _has_batch_endpoint(provider: MarketPriceProvider) -> bool:
+    return type(provider).get_prices is not MarketPriceProvider.get_prices
+
+
+class SingleFlightPriceProvider(MarketPriceProvider):
+    """Deduplicate and batch concurrent lookups to `inner`.
+
+    Usage:
+        provider = SingleFlightPriceProvider(ResilientPriceProvider(YFinancePriceProvider()), window=0.01)
+    """
+
+    def __init__(self, inner: MarketPriceProvider, window: float = 0.0, max_batch: int = 100):
+        self.inner = inner
+        self.window = window if _has_batch_endpoint(inner) else 0.0
+        self.max_batch = max_batch
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+        self._pending: list[str] = []
+        self._leader_active = False
+
+    def get_price(self, symbol: str) -> float:
+        return self.get_prices([symbol])[symbol]
+
+    def get_prices(self, symbols: Iterable[str]) -> dict[str, float]:
+        futures = {}
+        lead = False
+        with self._lock:
+            for symbol in dict.fromkeys(symbols):
+                future = self._in_flight.get(symbol)
+                if future is None:
+                    future = self._in_flight[symbol] = Future()
+                    self._pending.append(symbol)
+                    if not self._leader_active:
+                        self._leader_active = lead = True
+                else:
+                    self.coalesced += 1
+                futures[symbol] = future
+        if lead:
+            self._lead()
+        return {symbol: future.result() for symbol, future in futures.items()}
+
+    def _lead(self) -> None:
+        """Fetch everything queued so far (after the coalescing window) and resolve the futures."""
+        if self.window:
+            time.sleep(self.window)
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._leader_active = False
+        for start in range(0, len(batch), self.max_batch):
+            self._fetch(batch[start:start + self.max_batch])
+
+    def _fetch(self, symbols: list[str]) -> None:
+        with self._lock:
+            self.upstream_calls += 1
+            futures = [self._in_flight[symbol] for symbol in symbols]
+        try:
+            if len(symbols) == 1:
+                prices = {symbols[0]: self.inner.get_price(symbols[0])}
+            else:
+                prices = self.inner.get_prices(symbols)
+        except Exception as exc:
+            for future in futures:
+                future.set_exception(exc)
+        else:
+            for symbol, future in zip(symbols, futures):
+                future.set_result(prices.get(symbol, 0.0))
+        finally:
+            with self._lock:
+                for symbol in symbols:
+                    self._in_flight.pop(symbol, None)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
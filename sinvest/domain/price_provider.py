@@ -1,6 +1,10 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Protocol
+import time
+from datetime import date
+from typing import Iterable, Protocol
+
+from .entities import PriceSeries
 
 
 class MarketPriceProvider(ABC):
@@ -15,6 +19,27 @@ class MarketPriceProvider(ABC):
         """Return last price for given symbol or 0.0 on failure."""
         raise NotImplementedError()
 
+    def get_prices(self, symbols: Iterable[str]) -> dict[str, float]:
+        """Return last prices for many symbols (0.0 for failures).
+
+        The default fetches one symbol at a time; providers with a batch
+        endpoint can override it.
+        """
+        return {symbol: self.get_price(symbol) for symbol in symbols}
+
+
+class HistoricalPriceProvider(ABC):
+    """Historical counterpart of MarketPriceProvider: daily close series per symbol."""
+
+    @abstractmethod
+    def get_closes(self, symbol: str, start: date | None = None, end: date | None = None) -> PriceSeries:
+        """Return closes with start <= date <= end (empty series for unknown symbols)."""
+        raise NotImplementedError()
+
+    def get_many(self, symbols: Iterable[str], start: date | None = None,
+                 end: date | None = None) -> dict[str, PriceSeries]:
+        return {symbol: self.get_closes(symbol, start, end) for symbol in symbols}
+
 
 class YFinancePriceProvider(MarketPriceProvider):
     """Production provider using yfinance."""
@@ -32,13 +57,28 @@ class YFinancePriceProvider(MarketPriceProvider):
         except Exception:
             return 0.0
 
+    def get_history(self, symbol: str, period: str = "1y") -> list[tuple[str, float]]:
+        """Return daily ``(ISO date, close)`` pairs for `period`, or [] on failure."""
+        try:
+            series = self._yf.Ticker(symbol).history(period=period)["Close"]
+            return [(ts.date().isoformat(), float(close)) for ts, close in series.items()]
+        except Exception:
+            return []
+
 
 class MockPriceProvider(MarketPriceProvider):
-    """Test provider: returns a fixed price or mapping supplied at construction."""
+    """Test provider: returns a fixed price or mapping supplied at construction.
+
+    An optional `latency` (seconds) is slept on every call to emulate a
+    remote quote service in benchmarks.
+    """
 
-    def __init__(self, mapping: dict[str, float] | None = None, default: float = 0.0):
+    def __init__(self, mapping: dict[str, float] | None = None, default: float = 0.0, latency: float = 0.0):
         self.mapping = mapping or {}
         self.default = default
+        self.latency = latency
 
     def get_price(self, symbol: str) -> float:
+        if self.latency:
+            time.sleep(self.latency)
         return float(self.mapping.get(symbol, self.default))
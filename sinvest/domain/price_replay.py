@@ -0,0 +1,77 @@
+"""Record and replay price lookups for deterministic, offline runs.
+
+A `QuoteTape` is a JSON file holding last prices and daily close series per
+symbol. `RecordingPriceProvider` fills one from a live provider;
+`ReplayPriceProvider` (or ``sinvest.quote_server``) serves it back.
+
+    tape = QuoteTape()
+    recorder = RecordingPriceProvider(YFinancePriceProvider(), tape)
+    recorder.get_price('AAPL'); recorder.get_history('AAPL', '1y')
+    tape.save('quotes.json')
+
+    provider = ReplayPriceProvider(QuoteTape.load('quotes.json'))
+"""
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .price_provider import MarketPriceProvider
+
+
+@dataclass
+class QuoteTape:
+    prices: dict[str, float] = field(default_factory=dict)
+    history: dict[str, list[tuple[str, float]]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path) -> 'QuoteTape':
+        data = json.loads(Path(path).read_text())
+        return cls(
+            prices={symbol: float(price) for symbol, price in data.get('prices', {}).items()},
+            history={symbol: [(day, float(close)) for day, close in rows]
+                     for symbol, rows in data.get('history', {}).items()},
+        )
+
+    def save(self, path) -> None:
+        payload = {'prices': self.prices, 'history': self.history}
+        Path(path).write_text(json.dumps(payload, indent=1, sort_keys=True) + '\n')
+
+
+class RecordingPriceProvider(MarketPriceProvider):
+    """Pass lookups through to `inner` and remember successful responses in `tape`."""
+
+    def __init__(self, inner: MarketPriceProvider, tape: QuoteTape | None = None):
+        self.inner = inner
+        self.tape = tape or QuoteTape()
+        self._lock = threading.Lock()
+
+    def get_price(self, symbol: str) -> float:
+        price = self.inner.get_price(symbol)
+        if price:
+            with self._lock:
+                self.tape.prices[symbol] = float(price)
+        return price
+
+    def get_history(self, symbol: str, period: str = '1y') -> list[tuple[str, float]]:
+        rows = list(self.inner.get_history(symbol, period))
+        if rows:
+            with self._lock:
+                self.tape.history[symbol] = rows
+        return rows
+
+
+class ReplayPriceProvider(MarketPriceProvider):
+    """Serve prices from a recorded tape; unknown symbols get `default`."""
+
+    def __init__(self, tape: QuoteTape, default: float = 0.0):
+        self.tape = tape
+        self.default = default
+
+    def get_price(self, symbol: str) -> float:
+        return self.tape.prices.get(symbol, self.default)
+
+    def get_history(self, symbol: str, period: str = '1y') -> list[tuple[str, float]]:
+        return list(self.tape.history.get(symbol, []))
@@ -0,0 +1,172 @@
+"""Failure handling around a MarketPriceProvider.
+
+`ResilientPriceProvider` wraps any provider with:
+
+* a last-good cache, served whenever the upstream cannot be asked;
+* negative caching: a symbol that failed is not requested again until an
+  exponentially growing backoff expires, so a delisted ticker costs one
+  timeout instead of one per page view;
+* a provider-wide circuit breaker: when the error rate over the recent
+  window spikes, every lookup short-circuits to cached/fallback prices until
+  a cool-down passes and a single trial call succeeds.
+
+A lookup fails when the inner provider raises or returns a non-positive
+price (``YFinancePriceProvider`` reports errors as 0.0). Failed lookups
+return the last good price or 0.0, so callers keep falling back to the
+purchase price as before.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+from .price_provider import MarketPriceProvider
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+@dataclass
+class _NegativeEntry:
+    failures: int
+    retry_at: float
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker over a sliding window of recent calls.
+
+    Opens when at least `min_calls` of the last `window` calls were recorded
+    and their failure ratio reaches `failure_threshold`. After `reset_timeout`
+    seconds one trial call is let through (half-open); its outcome closes or
+    re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: float = 0.5, window: int = 20, min_calls: int = 5,
+                 reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_total = 0
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if a call may go to the upstream now."""
+        with self._lock:
+            if self.state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+                return True
+            return self.state == CLOSED
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_in_flight = False
+                if success:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (self.state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_threshold):
+                self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_total += 1
+        self._opened_at = self.clock()
+        self._outcomes.clear()
+
+
+class ResilientPriceProvider(MarketPriceProvider):
+    """Negative caching, backoff and a circuit breaker around `inner`.
+
+    Usage:
+        provider = ResilientPriceProvider(YFinancePriceProvider())
+        registry.add_metric_source(provider.stats)
+    """
+
+    def __init__(self, inner: MarketPriceProvider, base_backoff: float = 60.0, max_backoff: float = 3600.0,
+                 breaker: CircuitBreaker | None = None, clock: Callable[[], float] = time.monotonic):
+        self.inner = inner
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self._last_good: dict[str, float] = {}
+        self._negative: dict[str, _NegativeEntry] = {}
+        self._lock = threading.Lock()
+        self.upstream_calls = 0
+        self.upstream_failures = 0
+        self.negative_cache_hits = 0
+        self.short_circuits = 0
+        self.stale_served = 0
+
+    def get_price(self, symbol: str) -> float:
+        with self._lock:
+            entry = self._negative.get(symbol)
+            if entry is not None and self.clock() < entry.retry_at:
+                self.negative_cache_hits += 1
+                return self._fallback(symbol)
+        if not self.breaker.allow():
+            with self._lock:
+                self.short_circuits += 1
+                return self._fallback(symbol)
+
+        try:
+            price = float(self.inner.get_price(symbol))
+        except Exception:
+            price = 0.0
+        success = price > 0
+        self.breaker.record(success)
+
+        with self._lock:
+            self.upstream_calls += 1
+            if success:
+                self._last_good[symbol] = price
+                self._negative.pop(symbol, None)
+                return price
+            self.upstream_failures += 1
+            failures = self._negative[symbol].failures + 1 if symbol in self._negative else 1
+            backoff = min(self.base_backoff * 2 ** (failures - 1), self.max_backoff)
+            self._negative[symbol] = _NegativeEntry(failures, self.clock() + backoff)
+            return self._fallback(symbol)
+
+    def _fallback(self, symbol: str) -> float:
+        # Caller holds self._lock
+        price = self._last_good.get(symbol)
+        if price is None:
+            return 0.0
+        self.stale_served += 1
+        return price
+
+    def stats(self) -> dict[str, float]:
+        """Counters and circuit state, suitable for ``MetricsRegistry.add_metric_source``."""
+        with self._lock:
+            return {
+                'price_circuit_open': 1 if self.breaker.state == OPEN else 0,
+                'price_circuit_half_open': 1 if self.breaker.state == HALF_OPEN else 0,
+                'price_circuit_opened_total': self.breaker.opened_total,
+                'price_upstream_calls_total': self.upstream_calls,
+                'price_upstream_failures_total': self.upstream_failures,
+                'price_negative_cache_hits_total': self.negative_cache_hits,
+                'price_short_circuits_total': self.short_circuits,
+                'price_stale_served_total': self.stale_served,
+                'price_negative_cache_size': len(self._negative),
+            }
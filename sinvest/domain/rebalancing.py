@@ -0,0 +1,150 @@
+"""Target-weight rebalancing for many portfolios at once.
+
+Holdings of all portfolios are packed into padded (portfolios, holdings)
+arrays, so the trade sizing below runs as a handful of NumPy operations for
+the whole batch:
+
+1. target value per holding = target weight x (portfolio value + new cash);
+2. with ``allow_sells=False`` sells are dropped and buys are scaled down to the
+   available cash;
+3. quantities are truncated to whole units if requested, and trades smaller
+   than ``min_trade_value`` are discarded.
+
+Targets are keyed by ISIN (``by='investment'``) or by investment type
+(``by='type'``, split across the holdings of that type in proportion to their
+current value, equally if they have none). Weights are normalised over the
+holdings a portfolio actually has; holdings without a target are sold.
+Values are taken in each holding's own currency (no FX conversion).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Mapping
+
+import numpy as np
+
+from .entities import PortfolioEntity, PositionTotals, TransactionEntity
+from .services import compute_investment_values
+
+
+@dataclass(frozen=True)
+class RebalanceConstraints:
+    whole_units: bool = True
+    min_trade_value: float = 0.0
+    allow_sells: bool = True
+
+
+def _is_per_portfolio(targets: Mapping) -> bool:
+    """`targets` is either one {key: weight} mapping for every portfolio or {portfolio_id: {key: weight}}."""
+    return bool(targets) and all(isinstance(v, Mapping) for v in targets.values())
+
+
+def rebalance_portfolios(portfolios: Iterable[PortfolioEntity], targets: Mapping, prices: Mapping[str, float],
+                         constraints: RebalanceConstraints = RebalanceConstraints(), by: str = 'investment',
+                         cash: Mapping[int, float] | None = None,
+                         positions: Mapping[int, PositionTotals] | None = None,
+                         at: datetime | None = None) -> dict[int, list[TransactionEntity]]:
+    """Return the proposed orders per portfolio id (positive quantity = buy).
+
+    `prices` maps symbol to current price (purchase price is used when
+    missing, as in ``compute_investment_values``); `cash` is extra money per
+    portfolio available for buying. Orders are dated `at`, by default the
+    current local time (the clock `add_transactions` validates against).
+    """
+    if by not in ('investment', 'type'):
+        raise ValueError("by must be 'investment' or 'type'")
+    portfolios = [p for p in portfolios if p.investments]
+    at = at or datetime.now().replace(microsecond=0)
+    if not portfolios:
+        return {}
+    width = max(len(p.investments) for p in portfolios)
+    shape = (len(portfolios), width)
+    qty = np.zeros(shape)
+    price = np.ones(shape)
+    raw_target = np.zeros(shape)
+    mask = np.zeros(shape, dtype=bool)
+    extra_cash = np.zeros(len(portfolios))
+    type_code = np.zeros(shape, dtype=np.int64)
+    type_codes: dict[str, int] = {}
+
+    per_portfolio = _is_per_portfolio(targets)
+    for i, portfolio in enumerate(portfolios):
+        weights = targets.get(portfolio.id, targets.get(str(portfolio.id), {})) if per_portfolio else targets
+        extra_cash[i] = (cash or {}).get(portfolio.id, 0.0)
+        for j, inv in enumerate(portfolio.investments):
+            vals = compute_investment_values(inv, price=prices.get(inv.symbol, 0.0),
+                                             totals=positions.get(inv.id) if positions is not None else None)
+            mask[i, j] = True
+            price[i, j] = vals['current_price'] or 1.0
+            qty[i, j] = vals['current_value'] / price[i, j]
+            kind = (inv.type or '').lower()
+            type_code[i, j] = type_codes.setdefault(kind, len(type_codes))
+            key = inv.isin if by == 'investment' else kind
+            raw_target[i, j] = float(weights.get(key, 0.0))
+
+    value = qty * price
+    if by == 'type':
+        # Split each type's weight across its holdings by current value (equally when all are zero)
+        rows = np.nonzero(mask)[0]
+        codes = type_code[mask]
+        group_value = np.zeros((len(portfolios), len(type_codes)))
+        group_count = np.zeros_like(group_value)
+        np.add.at(group_value, (rows, codes), value[mask])
+        np.add.at(group_count, (rows, codes), 1)
+        members_value = group_value[rows, codes]
+        share = np.where(members_value > 0, value[mask] / np.where(members_value > 0, members_value, 1.0),
+                         1.0 / group_count[rows, codes])
+        raw_target[mask] *= share
+
+    weight_sum = raw_target.sum(axis=1, keepdims=True)
+    target_weight = np.divide(raw_target, weight_sum, out=np.zeros(shape), where=weight_sum > 0)
+    total = value.sum(axis=1, keepdims=True) + extra_cash[:, None]
+    delta_value = np.where(mask, target_weight * total - value, 0.0)
+    # Portfolios without any target are left untouched
+    delta_value[weight_sum[:, 0] <= 0] = 0.0
+
+    if not constraints.allow_sells:
+        buys = np.clip(delta_value, 0.0, None)
+        buy_total = buys.sum(axis=1, keepdims=True)
+        scale = np.divide(extra_cash[:, None], buy_total, out=np.zeros_like(buy_total), where=buy_total > 0)
+        delta_value = buys * np.minimum(scale, 1.0)
+
+    delta_qty = delta_value / price
+    if constraints.whole_units:
+        delta_qty = np.trunc(delta_qty + np.sign(delta_qty) * 1e-9)
+    delta_qty[np.abs(delta_qty * price) < max(constraints.min_trade_value, 1e-9)] = 0.0
+
+    orders: dict[int, list[TransactionEntity]] = {}
+    rows, cols = np.nonzero(delta_qty)
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        inv = portfolios[i].investments[j]
+        orders.setdefault(portfolios[i].id, []).append(
+            TransactionEntity(id=None, investment_id=inv.id, quantity=float(delta_qty[i, j]),
+                              unit_price=float(price[i, j]), transaction_date=at))
+    return orders
+
+
+def opening_balances(portfolios: Iterable[PortfolioEntity], orders: Mapping[int, list[TransactionEntity]],
+                     positions: Mapping[int, PositionTotals] | None = None) -> list[TransactionEntity]:
+    """Opening transactions needed before `orders` can be recorded.
+
+    A holding without ledger rows is valued from its ``quantity`` field, which
+    the domain ignores as soon as a transaction exists. Recording a trade on
+    such a holding therefore first records ``quantity`` at the purchase price
+    (dated at the purchase, or at the trade if that is earlier). Pass
+    `positions` when the portfolios were read without their transactions.
+    """
+    traded = {tx.investment_id: tx.transaction_date for txs in orders.values() for tx in txs}
+
+    def has_ledger(inv) -> bool:
+        if positions is not None:
+            return inv.id in positions and positions[inv.id].transaction_count > 0
+        return bool(inv.transactions)
+
+    return [
+        TransactionEntity(id=None, investment_id=inv.id, quantity=inv.quantity, unit_price=inv.purchase_price,
+                          transaction_date=min(inv.purchase_date or traded[inv.id], traded[inv.id]))
+        for p in portfolios for inv in p.investments
+        if inv.id in traded and not has_ledger(inv) and inv.quantity
+    ]
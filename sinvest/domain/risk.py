@@ -0,0 +1,129 @@
+"""Portfolio risk analytics on daily close series.
+
+Everything is expressed as NumPy array operations over a returns matrix of
+shape (days, holdings), and the batched entry point `portfolio_risk_batch`
+evaluates many weight vectors (portfolios) against the same matrix at once.
+
+Returns are simple daily returns; VaR and CVaR are reported as positive loss
+fractions of portfolio value over one day, volatility is annualised with
+`PERIODS_PER_YEAR`. Weights are current market values in each holding's own
+currency (no FX conversion), normalised to sum to 1.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Mapping, Sequence
+
+import numpy as np
+
+from .entities import PortfolioEntity, PositionTotals, PriceSeries
+from .services import compute_investment_values
+
+PERIODS_PER_YEAR = 252
+
+
+@dataclass(frozen=True)
+class RiskReport:
+    volatility: float
+    var_historical: float
+    cvar_historical: float
+    var_parametric: float
+    cvar_parametric: float
+    max_drawdown: float
+    confidence: float
+    observations: int
+
+
+def align_closes(series: Sequence[PriceSeries]) -> tuple[np.ndarray, np.ndarray]:
+    """Align close series on the union of their dates.
+
+    Gaps are forward-filled; days before every symbol has a first close are
+    dropped. Returns (dates, closes) with closes of shape (days, len(series)).
+    """
+    if not series:
+        return np.empty(0, dtype='datetime64[D]'), np.empty((0, 0))
+    dates = np.unique(np.concatenate([np.asarray(s.dates, dtype='datetime64[D]') for s in series]))
+    closes = np.full((len(dates), len(series)), np.nan)
+    for j, s in enumerate(series):
+        closes[np.searchsorted(dates, s.dates), j] = s.closes
+    # Forward fill: index of the last observed row per column
+    observed = np.where(np.isnan(closes), 0, np.arange(len(dates))[:, None])
+    np.maximum.accumulate(observed, axis=0, out=observed)
+    closes = closes[observed, np.arange(len(series))]
+    complete = ~np.isnan(closes).any(axis=1)
+    return dates[complete], closes[complete]
+
+
+def returns_matrix(closes: np.ndarray) -> np.ndarray:
+    """Simple daily returns of a (days, holdings) close matrix -> (days - 1, holdings)."""
+    closes = np.asarray(closes, dtype=np.float64)
+    return closes[1:] / closes[:-1] - 1.0
+
+
+def covariance_matrix(returns: np.ndarray, annualise: bool = True) -> np.ndarray:
+    """Sample covariance of holding returns, shape (holdings, holdings)."""
+    centred = returns - returns.mean(axis=0)
+    cov = centred.T @ centred / (len(returns) - 1)
+    return cov * PERIODS_PER_YEAR if annualise else cov
+
+
+def portfolio_weights(portfolio: PortfolioEntity, prices: Mapping[str, float],
+                      positions: Mapping[int, PositionTotals] | None = None) -> tuple[list[str], np.ndarray]:
+    """Return (symbols, weights) from current market values; holdings of one symbol are merged."""
+    values: dict[str, float] = {}
+    for inv in portfolio.investments:
+        totals = positions.get(inv.id) if positions is not None else None
+        vals = compute_investment_values(inv, price=prices.get(inv.symbol, 0.0), totals=totals)
+        values[inv.symbol] = values.get(inv.symbol, 0.0) + vals['current_value']
+    symbols = sorted(values)
+    weights = np.array([values[s] for s in symbols], dtype=np.float64)
+    total = weights.sum()
+    return symbols, weights / total if total else weights
+
+
+def portfolio_risk_batch(returns: np.ndarray, weights: np.ndarray, confidence: float = 0.95) -> dict[str, np.ndarray]:
+    """Risk metrics for every row of `weights` (portfolios, holdings) against `returns` (days, holdings).
+
+    Returns a dict of arrays of length n_portfolios.
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    port = returns @ weights.T                      # (days, portfolios)
+    days = port.shape[0]
+    tail = 1.0 - confidence
+
+    mean = port.mean(axis=0)
+    # w' S w per portfolio without materialising the full product
+    centred = returns - returns.mean(axis=0)
+    projected = centred @ weights.T
+    daily_sigma = np.sqrt((projected * projected).sum(axis=0) / (days - 1))
+
+    sorted_returns = np.sort(port, axis=0)
+    cutoff = max(1, int(np.floor(tail * days)))
+    var_hist = -np.quantile(port, tail, axis=0)
+    cvar_hist = -sorted_returns[:cutoff].mean(axis=0)
+
+    normal = NormalDist()
+    z = normal.inv_cdf(tail)
+    var_param = -(mean + z * daily_sigma)
+    cvar_param = -(mean - daily_sigma * normal.pdf(z) / tail)
+
+    wealth = np.cumprod(1.0 + port, axis=0)
+    peaks = np.maximum.accumulate(np.vstack([np.ones((1, port.shape[1])), wealth]), axis=0)[1:]
+    max_drawdown = (1.0 - wealth / peaks).max(axis=0)
+
+    return {
+        'volatility': daily_sigma * np.sqrt(PERIODS_PER_YEAR),
+        'var_historical': var_hist,
+        'cvar_historical': cvar_hist,
+        'var_parametric': var_param,
+        'cvar_parametric': cvar_param,
+        'max_drawdown': max_drawdown,
+    }
+
+
+def portfolio_risk(returns: np.ndarray, weights: np.ndarray, confidence: float = 0.95) -> RiskReport:
+    """Risk metrics of one portfolio with holding `weights` over `returns` (days, holdings)."""
+    metrics = portfolio_risk_batch(returns, weights, confidence)
+    return RiskReport(confidence=confidence, observations=len(returns),
+                      **{name: float(values[0]) for name, values in metrics.items()})
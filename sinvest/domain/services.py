@@ -1,6 +1,7 @@
 """Domain services: business logic separated from persistence and presentation."""
-from typing import Dict, Tuple, List
-from .entities import InvestmentEntity, PortfolioEntity
+from datetime import datetime
+from typing import Dict, Iterable, Mapping, Set, Tuple, List
+from .entities import InvestmentEntity, PortfolioEntity, PortfolioSnapshotEntity, PortfolioValuation, PositionTotals
 from .price_provider import MarketPriceProvider, YFinancePriceProvider
 
 
@@ -12,24 +13,31 @@ def fetch_current_price(symbol: str, provider: MarketPriceProvider) -> float:
         return 0.0
 
 
-def compute_investment_values(inv: InvestmentEntity, provider: MarketPriceProvider | None = None) -> Dict:
+def compute_investment_values(inv: InvestmentEntity, provider: MarketPriceProvider | None = None,
+                              totals: PositionTotals | None = None, price: float | None = None) -> Dict:
     """Compute current price/value/gain for a single investment entity.
 
     Accepts a MarketPriceProvider to fetch current prices. If none provided,
     uses the YFinancePriceProvider by default.
 
+    Pass precomputed `totals` (e.g. from a database aggregate) to avoid
+    iterating the investment's transactions, and an already resolved `price`
+    to skip the provider.
+
     Returns a dict with: current_price, current_value, gain_loss
     All values are expressed in the investment's own currency.
     """
-    provider = provider or YFinancePriceProvider()
-    price = fetch_current_price(inv.symbol, provider) or inv.purchase_price
+    if price is None:
+        price = fetch_current_price(inv.symbol, provider or YFinancePriceProvider())
+    price = price or inv.purchase_price
 
     # If the investment has transaction records, compute quantity and cost from them
-    if getattr(inv, 'transactions', None):
-        total_qty = sum((t.quantity or 0.0) for t in inv.transactions)
-        total_cost = sum((t.quantity or 0.0) * (t.unit_price or 0.0) for t in inv.transactions)
-        current_value = total_qty * price
-        gain_loss = current_value - total_cost
+    # (summed exactly in fixed-point units, see sinvest.domain.money)
+    if totals is None and getattr(inv, 'transactions', None):
+        totals = PositionTotals.of(inv.transactions)
+    if totals is not None and totals.transaction_count:
+        current_value = totals.quantity * price
+        gain_loss = current_value - totals.cost_basis
     else:
         current_value = inv.quantity * price
         initial_value = inv.quantity * inv.purchase_price
@@ -41,17 +49,83 @@ def compute_investment_values(inv: InvestmentEntity, provider: MarketPriceProvid
     }
 
 
-def aggregate_portfolio(portfolio: PortfolioEntity, provider: MarketPriceProvider | None = None) -> Tuple[Dict[str, float], Dict[str, float]]:
+def aggregate_portfolio(portfolio: PortfolioEntity, provider: MarketPriceProvider | None = None,
+                        prices: Mapping[str, float] | None = None,
+                        positions: Mapping[int, PositionTotals] | None = None) -> Tuple[Dict[str, float], Dict[str, float]]:
     """Aggregate totals and gains grouped by currency.
 
+    If `prices` (symbol -> price) is given, prices are looked up there instead
+    of being fetched from the provider. `positions` maps investment id to
+    precomputed ledger totals.
+
     Returns (totals_by_currency, gains_by_currency)
     """
-    provider = provider or YFinancePriceProvider()
+    if prices is None:
+        provider = provider or YFinancePriceProvider()
     totals = {}
     gains = {}
     for inv in portfolio.investments:
-        vals = compute_investment_values(inv, provider)
+        price = prices.get(inv.symbol, 0.0) if prices is not None else None
+        vals = compute_investment_values(inv, provider, price=price,
+                                         totals=positions.get(inv.id) if positions is not None else None)
         cur = (inv.currency or "USD").upper()
         totals[cur] = totals.get(cur, 0.0) + vals["current_value"]
         gains[cur] = gains.get(cur, 0.0) + vals["gain_loss"]
     return totals, gains
+
+
+def collect_symbols(portfolios: Iterable[PortfolioEntity]) -> Set[str]:
+    """Return the distinct symbols held across `portfolios`."""
+    return {inv.symbol for p in portfolios for inv in p.investments}
+
+
+def resolve_prices(symbols: Iterable[str], provider: MarketPriceProvider) -> Dict[str, float]:
+    """Fetch each distinct symbol once; failures map to 0.0."""
+    symbols = sorted(set(symbols))
+    try:
+        return provider.get_prices(symbols)
+    except Exception:
+        return {symbol: fetch_current_price(symbol, provider) for symbol in symbols}
+
+
+def value_portfolios(portfolios: Iterable[PortfolioEntity], provider: MarketPriceProvider | None = None,
+                     prices: Mapping[str, float] | None = None,
+                     positions: Mapping[int, PositionTotals] | None = None) -> List[PortfolioValuation]:
+    """Value many portfolios, pricing every distinct symbol only once.
+
+    The symbol set is gathered across all portfolios, resolved in one pass
+    through the provider and the prices are fanned back out to each
+    portfolio's aggregation. Pass `prices` to reuse an already resolved
+    price table.
+    """
+    portfolios = list(portfolios)
+    if prices is None:
+        prices = resolve_prices(collect_symbols(portfolios), provider or YFinancePriceProvider())
+    valuations = []
+    for portfolio in portfolios:
+        totals, gains = aggregate_portfolio(portfolio, provider, prices=prices, positions=positions)
+        valuations.append(PortfolioValuation(portfolio_id=portfolio.id, totals_by_currency=totals, gains_by_currency=gains))
+    return valuations
+
+
+def snapshot_portfolio(portfolio: PortfolioEntity, taken_at: datetime, provider: MarketPriceProvider | None = None) -> List[PortfolioSnapshotEntity]:
+    """Capture the current per-currency totals and gains of a portfolio.
+
+    Returns one PortfolioSnapshotEntity per currency held.
+    """
+    return snapshot_portfolios([portfolio], taken_at, provider)
+
+
+def snapshot_portfolios(portfolios: Iterable[PortfolioEntity], taken_at: datetime, provider: MarketPriceProvider | None = None,
+                        prices: Mapping[str, float] | None = None,
+                        positions: Mapping[int, PositionTotals] | None = None) -> List[PortfolioSnapshotEntity]:
+    """Snapshot many portfolios at the same `taken_at` instant (symbols priced once)."""
+    snapshots = []
+    for valuation in value_portfolios(portfolios, provider, prices=prices, positions=positions):
+        snapshots.extend(
+            PortfolioSnapshotEntity(id=None, portfolio_id=valuation.portfolio_id, taken_at=taken_at, currency=cur,
+                                    total_value=valuation.totals_by_currency[cur],
+                                    gain_loss=valuation.gains_by_currency.get(cur, 0.0))
+            for cur in sorted(valuation.totals_by_currency)
+        )
+    return snapshots
@@ -0,0 +1,115 @@
+"""Incremental revaluation driven by a stream of price ticks.
+
+`IncrementalValuator` values a set of portfolios once, then keeps their
+per-currency totals current as quotes arrive. For every symbol it keeps the
+summed quantity per (portfolio, currency), so a tick only touches the holders
+of that symbol instead of revaluing every portfolio.
+
+Valuation rules match ``compute_investment_values``: ledger quantities when an
+investment has transactions, and the purchase price while no market price is
+known.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Mapping
+
+from .entities import PortfolioEntity, PortfolioValuation, PositionTotals
+from .services import aggregate_portfolio
+
+
+@dataclass(frozen=True)
+class Quote:
+    symbol: str
+    price: float
+    at: datetime | None = None
+
+
+class PriceTable:
+    """Thread-safe symbol -> (last price, time) table."""
+
+    def __init__(self, prices: Mapping[str, float] | None = None):
+        self._prices: dict[str, tuple[float, datetime | None]] = {s: (p, None) for s, p in (prices or {}).items()}
+        self._lock = threading.Lock()
+
+    def update(self, quote: Quote) -> float:
+        """Store `quote` and return the previous price (0.0 if unknown)."""
+        with self._lock:
+            previous = self._prices.get(quote.symbol, (0.0, None))[0]
+            self._prices[quote.symbol] = (quote.price, quote.at)
+            return previous
+
+    def get(self, symbol: str, default: float = 0.0) -> float:
+        with self._lock:
+            return self._prices.get(symbol, (default, None))[0]
+
+    def as_dict(self) -> dict[str, float]:
+        with self._lock:
+            return {symbol: price for symbol, (price, _) in self._prices.items()}
+
+
+class IncrementalValuator:
+    """Per-portfolio totals kept up to date tick by tick.
+
+    Usage:
+        valuator = IncrementalValuator(portfolios, PriceTable(resolve_prices(symbols, provider)))
+        changed = valuator.apply(Quote('AAPL', 151.2))   # ids of portfolios holding AAPL
+        valuator.valuation(portfolio_id)
+    """
+
+    def __init__(self, portfolios: Iterable[PortfolioEntity], prices: PriceTable | None = None,
+                 positions: Mapping[int, PositionTotals] | None = None):
+        self.prices = prices or PriceTable()
+        self.version = 0
+        self._lock = threading.Lock()
+        self._totals: dict[int, dict[str, float]] = {}
+        self._gains: dict[int, dict[str, float]] = {}
+        # symbol -> {(portfolio_id, currency): quantity}
+        self._holders: dict[str, dict[tuple[int, str], float]] = {}
+        # symbol -> [(portfolio_id, currency, quantity, purchase_price)], for the first tick of an unpriced symbol
+        self._unpriced: dict[str, list[tuple[int, str, float, float]]] = {}
+
+        prices_now = self.prices.as_dict()
+        for portfolio in portfolios:
+            totals, gains = aggregate_portfolio(portfolio, prices=prices_now, positions=positions)
+            self._totals[portfolio.id] = totals
+            self._gains[portfolio.id] = gains
+            for inv in portfolio.investments:
+                ledger = positions.get(inv.id) if positions is not None else None
+                if ledger is None and inv.transactions:
+                    ledger = PositionTotals.of(inv.transactions)
+                quantity = ledger.quantity if ledger is not None and ledger.transaction_count else inv.quantity
+                key = (portfolio.id, (inv.currency or 'USD').upper())
+                holders = self._holders.setdefault(inv.symbol, {})
+                holders[key] = holders.get(key, 0.0) + quantity
+                self._unpriced.setdefault(inv.symbol, []).append((*key, quantity, inv.purchase_price))
+
+    def apply(self, quote: Quote) -> set[int]:
+        """Apply one tick; return the ids of the portfolios whose totals changed."""
+        if quote.price <= 0:
+            return set()
+        with self._lock:
+            previous = self.prices.update(quote)
+            if previous > 0:
+                deltas = [(pid, cur, qty * (quote.price - previous))
+                          for (pid, cur), qty in self._holders.get(quote.symbol, {}).items()]
+            else:
+                deltas = [(pid, cur, qty * (quote.price - purchase_price))
+                          for pid, cur, qty, purchase_price in self._unpriced.get(quote.symbol, [])]
+            self._unpriced.pop(quote.symbol, None)
+            for pid, cur, delta in deltas:
+                self._totals[pid][cur] += delta
+                self._gains[pid][cur] += delta
+            if deltas:
+                self.version += 1
+            return {pid for pid, _, _ in deltas}
+
+    def valuation(self, portfolio_id: int) -> PortfolioValuation | None:
+        with self._lock:
+            if portfolio_id not in self._totals:
+                return None
+            return PortfolioValuation(portfolio_id=portfolio_id,
+                                      totals_by_currency=dict(self._totals[portfolio_id]),
+                                      gains_by_currency=dict(self._gains[portfolio_id]))
@@ -0,0 +1,272 @@
+"""Opt-in per-request performance instrumentation.
+
+Records, for every request handled while instrumentation is enabled:
+- number of SQL statements executed and their total time (SQLAlchemy engine events)
+- number of price-provider calls, cache hits and their total latency
+- time spent in repository methods and in domain services
+
+Per-request figures are exposed through a ``Server-Timing`` response header;
+process-wide counters are exposed at ``/metrics`` in Prometheus text format.
+
+Instrumentation is switched on with ``app.config['INSTRUMENTATION_ENABLED']``
+(or the ``SINVEST_INSTRUMENTATION`` environment variable). When disabled the
+hooks stay registered but do nothing, and ``/metrics`` answers 404.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from flask import Flask, Response, abort, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from sinvest.domain.price_provider import MarketPriceProvider
+
+CONFIG_KEY = 'INSTRUMENTATION_ENABLED'
+ENV_VAR = 'SINVEST_INSTRUMENTATION'
+
+
+@dataclass
+class RequestMetrics:
+    """Counters and timings collected while handling a single request."""
+    started_at: float
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+    price_calls: int = 0
+    price_cache_hits: int = 0
+    price_seconds: float = 0.0
+    repo_calls: int = 0
+    repo_seconds: float = 0.0
+    domain_seconds: float = 0.0
+
+    def server_timing(self, total_seconds: float) -> str:
+        """Render the metrics as a ``Server-Timing`` header value (durations in ms)."""
+        parts = [
+            f'sql;dur={self.sql_seconds * 1000:.2f};desc="{self.sql_count} queries"',
+            f'price;dur={self.price_seconds * 1000:.2f};desc="{self.price_calls} calls, {self.price_cache_hits} cached"',
+            f'repo;dur={self.repo_seconds * 1000:.2f};desc="{self.repo_calls} calls"',
+            f'domain;dur={self.domain_seconds * 1000:.2f}',
+            f'total;dur={total_seconds * 1000:.2f}',
+        ]
+        return ', '.join(parts)
+
+
+class MetricsRegistry:
+    """Thread-safe process-wide totals rendered in Prometheus text format."""
+
+    _COUNTERS = (
+        ('requests_total', 'Instrumented HTTP requests handled'),
+        ('request_seconds_total', 'Wall time spent handling instrumented requests'),
+        ('sql_statements_total', 'SQL statements executed'),
+        ('sql_seconds_total', 'Time spent executing SQL statements'),
+        ('price_fetches_total', 'Price provider calls'),
+        ('price_cache_hits_total', 'Price provider calls answered from a cache'),
+        ('price_fetch_seconds_total', 'Time spent in price provider calls'),
+        ('repository_calls_total', 'Repository method calls'),
+        ('repository_seconds_total', 'Time spent in repository methods'),
+        ('domain_seconds_total', 'Time spent in domain services'),
+    )
+
+    def __init__(self, prefix: str = 'sinvest'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, str], float] = {}
+        self._sources = []
+
+    def observe_request(self, endpoint: str, metrics: RequestMetrics, total_seconds: float) -> None:
+        samples = {
+            'requests_total': 1,
+            'request_seconds_total': total_seconds,
+            'sql_statements_total': metrics.sql_count,
+            'sql_seconds_total': metrics.sql_seconds,
+            'price_fetches_total': metrics.price_calls,
+            'price_cache_hits_total': metrics.price_cache_hits,
+            'price_fetch_seconds_total': metrics.price_seconds,
+            'repository_calls_total': metrics.repo_calls,
+            'repository_seconds_total': metrics.repo_seconds,
+            'domain_seconds_total': metrics.domain_seconds,
+        }
+        with self._lock:
+            for name, value in samples.items():
+                key = (name, endpoint)
+                self._values[key] = self._values.get(key, 0.0) + value
+
+    def value(self, name: str, endpoint: str) -> float:
+        with self._lock:
+            return self._values.get((name, endpoint), 0.0)
+
+    def add_metric_source(self, source) -> None:
+        """Register a callable returning ``{metric_name: value}`` sampled on every scrape.
+
+        Names ending in ``_total`` are cumulative and exported as counters,
+        everything else as gauges.
+        """
+        self._sources.append(source)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            values = dict(self._values)
+        for name, help_text in self._COUNTERS:
+            full_name = f'{self.prefix}_{name}'
+            lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} counter')
+            for (metric, endpoint), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f'{full_name}{{endpoint="{endpoint}"}} {_format_number(value)}')
+        for source in self._sources:
+            for name, value in sorted(source().items()):
+                full_name = f'{self.prefix}_{name}'
+                lines.append(f'# TYPE {full_name} {"counter" if name.endswith("_total") else "gauge"}')
+                lines.append(f'{full_name} {_format_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+registry = MetricsRegistry()
+
+
+def current_metrics() -> RequestMetrics | None:
+    """Return the metrics of the request being handled, or None if not instrumented."""
+    if not has_request_context():
+        return None
+    return g.get('_sinvest_metrics')
+
+
+@contextmanager
+def track_domain():
+    """Time a block of domain-service work against the current request."""
+    metrics = current_metrics()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.domain_seconds += time.perf_counter() - start
+
+
+class InstrumentedPriceProvider(MarketPriceProvider):
+    """Decorator that records call counts and latency of a wrapped provider.
+
+    Cache hits are detected through an optional ``cache_hits`` counter on the
+    wrapped provider (reached through wrappers that delegate attributes, such
+    as ``SingleFlightPriceProvider``): a call during which that counter
+    increased is counted as a hit. Only a layer that answers lookups from a
+    price cache should expose it; stale prices served by
+    ``ResilientPriceProvider`` after a failure are counted separately as
+    ``stale_served`` and are not hits.
+    """
+
+    def __init__(self, inner: MarketPriceProvider):
+        self.inner = inner
+
+    def get_price(self, symbol: str) -> float:
+        metrics = current_metrics()
+        if metrics is None:
+            return self.inner.get_price(symbol)
+        hits_before = getattr(self.inner, 'cache_hits', 0)
+        start = time.perf_counter()
+        try:
+            return self.inner.get_price(symbol)
+        finally:
+            metrics.price_seconds += time.perf_counter() - start
+            metrics.price_calls += 1
+            if getattr(self.inner, 'cache_hits', 0) > hits_before:
+                metrics.price_cache_hits += 1
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+class InstrumentedRepository:
+    """Proxy timing every public method call of a wrapped repository.
+
+    Delegates attribute access so it can stand in for any repository
+    implementation without the callers noticing.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def __getattr__(self, name):
+        attr = getattr(self.inner, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        def timed(*args, **kwargs):
+            metrics = current_metrics()
+            if metrics is None:
+                return attr(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                metrics.repo_seconds += time.perf_counter() - start
+                metrics.repo_calls += 1
+
+        return timed
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_metrics() is not None:
+        conn.info.setdefault('_sinvest_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = current_metrics()
+    starts = conn.info.get('_sinvest_query_start')
+    if metrics is None or not starts:
+        return
+    metrics.sql_seconds += time.perf_counter() - starts.pop()
+    metrics.sql_count += 1
+
+
+def is_enabled(app: Flask) -> bool:
+    return bool(app.config.get(CONFIG_KEY))
+
+
+def init_instrumentation(app: Flask) -> None:
+    """Register request hooks, SQL event listeners and the ``/metrics`` route.
+
+    Listeners are attached to the ``Engine`` class so every engine (including
+    ones created after this call) is covered.
+    """
+    app.config.setdefault(CONFIG_KEY, os.environ.get(ENV_VAR, '').lower() in ('1', 'true', 'yes'))
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def _start_request_metrics():
+        if is_enabled(current_app) and request.endpoint != 'metrics':
+            g._sinvest_metrics = RequestMetrics(started_at=time.perf_counter())
+
+    @app.after_request
+    def _finish_request_metrics(response):
+        metrics = g.pop('_sinvest_metrics', None)
+        if metrics is None:
+            return response
+        total = time.perf_counter() - metrics.started_at
+        response.headers['Server-Timing'] = metrics.server_timing(total)
+        registry.observe_request(request.endpoint or 'unknown', metrics, total)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        if not is_enabled(current_app):
+            abort(404)
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,236 @@
+"""Ledger compaction: roll old transactions into opening-balance rows.
+
+For every holding with more than one transaction before `cutoff`, those rows
+are replaced by a single opening-balance transaction dated at the last of them,
+with their summed quantity and the average cost as unit price. The originals
+move to `transaction_archive` (keeping their ids), so
+
+* current and later point-in-time positions are unchanged (running totals
+  are refreshed for the compacted holdings);
+* `restore_ledger` puts the originals back and drops the opening rows;
+* `verify_compaction` re-sums the archive against the opening rows.
+
+Quantity is preserved exactly. The average price is rounded to the nearest
+price unit, so cost basis can differ by at most half a price unit per unit
+held (< 5e-7 per share). Holdings whose position before the cutoff is flat,
+short or has a negative average cost cannot be expressed as one opening buy
+and are left alone.
+
+    stats = compact_ledger(db.session, datetime(2020, 1, 1), dry_run=True)
+
+All statements are Core, so ORM objects already loaded in the session may be
+stale afterwards; callers commit and expire as usual.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from fractions import Fraction
+
+from sqlalchemy import BigInteger, case, column, delete, func, insert, literal, select, table, type_coerce, union_all
+from sqlalchemy.exc import OperationalError
+
+from sinvest.domain.money import PRICE_SCALE, QUANTITY_SCALE
+from sinvest.models.ledger import refresh_running_totals
+from sinvest.models.portfolio import Transaction, TransactionArchive
+
+# Holdings handled per batch of statements (keeps IN lists below SQLite's variable limit)
+CHUNK = 500
+
+# SQLite's page-level storage statistics (compiled in by most distributions)
+_dbstat = table('dbstat', column('name'), column('pgsize'))
+
+
+@dataclass(frozen=True)
+class CompactionStats:
+    cutoff: datetime
+    holdings: int
+    rows_archived: int
+    rows_written: int
+    skipped_holdings: int
+    bytes_saved: int | None
+    dry_run: bool
+
+    @property
+    def rows_saved(self) -> int:
+        return self.rows_archived - self.rows_written
+
+
+@dataclass(frozen=True)
+class LedgerMismatch:
+    opening_transaction_id: int
+    investment_id: int
+    quantity_diff_units: int
+    cost_diff_units: int
+
+
+def _units(expr):
+    return type_coerce(expr, BigInteger)
+
+
+def _chunks(items):
+    for start in range(0, len(items), CHUNK):
+        yield items[start:start + CHUNK]
+
+
+def _bytes_per_row(session) -> float | None:
+    """Average bytes per `transaction` row including its indexes (None without SQLite's dbstat)."""
+    names = [Transaction.__tablename__] + [index.name for index in Transaction.__table__.indexes]
+    try:
+        used = session.execute(select(func.sum(_dbstat.c.pgsize)).where(_dbstat.c.name.in_(names))).scalar()
+    except OperationalError:
+        return None
+    rows = session.execute(select(func.count()).select_from(Transaction)).scalar()
+    return used / rows if used and rows else None
+
+
+def _candidates(session, cutoff: datetime, investment_ids=None):
+    """(investment_id, rows, quantity units, cost units, last date) of ledgers with > 1 row before cutoff."""
+    T = Transaction
+    stmt = (
+        select(T.investment_id, func.count(), func.sum(_units(T.quantity)),
+               func.sum(_units(T.quantity) * _units(T.unit_price)), func.max(T.transaction_date))
+        .where(T.transaction_date < cutoff)
+        .group_by(T.investment_id)
+        .having(func.count() > 1)
+        .order_by(T.investment_id)
+    )
+    if investment_ids is not None:
+        stmt = stmt.where(T.investment_id.in_(list(investment_ids)))
+    return session.execute(stmt).all()
+
+
+def _opening_price_units(quantity_units: int, cost_units: int) -> int | None:
+    """Average cost in price units, or None if one opening buy cannot carry the position."""
+    if quantity_units <= 0 or cost_units < 0:
+        return None
+    return round(Fraction(cost_units, quantity_units))
+
+
+def compact_ledger(session, cutoff: datetime, investment_ids=None, dry_run: bool = False) -> CompactionStats:
+    """Replace the transactions dated before `cutoff` with one opening-balance row per holding.
+
+    With `dry_run` nothing is written and the stats describe what would change.
+    """
+    plan = []
+    skipped = 0
+    for investment_id, rows, quantity_units, cost_units, last_date in _candidates(session, cutoff, investment_ids):
+        price_units = _opening_price_units(quantity_units, cost_units)
+        if price_units is None:
+            skipped += 1
+            continue
+        plan.append((investment_id, rows, quantity_units, price_units, last_date))
+
+    rows_archived = sum(rows for _, rows, _, _, _ in plan)
+    per_row = _bytes_per_row(session)
+    stats = CompactionStats(
+        cutoff=cutoff, holdings=len(plan), rows_archived=rows_archived, rows_written=len(plan),
+        skipped_holdings=skipped, bytes_saved=int(per_row * (rows_archived - len(plan))) if per_row else None,
+        dry_run=dry_run,
+    )
+    if dry_run or not plan:
+        return stats
+
+    T = Transaction.__table__
+    A = TransactionArchive.__table__
+    archived_at = datetime.utcnow()
+    for chunk in _chunks(plan):
+        ids = [investment_id for investment_id, *_ in chunk]
+        # Opening rows are inserted before the originals are deleted, so their
+        # ids are above every archived id and a later restore cannot collide.
+        opening = session.execute(
+            insert(T).returning(T.c.id, T.c.investment_id, sort_by_parameter_order=True),
+            [{'investment_id': investment_id,
+              'quantity': quantity_units / QUANTITY_SCALE,
+              'unit_price': price_units / PRICE_SCALE,
+              'transaction_date': last_date,
+              'created_at': archived_at}
+             for investment_id, _, quantity_units, price_units, last_date in chunk],
+        ).all()
+        opening_by_investment = {investment_id: opening_id for opening_id, investment_id in opening}
+        opening_ids = list(opening_by_investment.values())
+        archived = (T.c.investment_id.in_(ids)) & (T.c.transaction_date < cutoff) & T.c.id.notin_(opening_ids)
+        session.execute(
+            insert(A).from_select(
+                ['id', 'investment_id', 'quantity', 'unit_price', 'transaction_date', 'created_at',
+                 'opening_transaction_id', 'archived_at'],
+                select(T.c.id, T.c.investment_id, T.c.quantity, T.c.unit_price, T.c.transaction_date,
+                       T.c.created_at, case(opening_by_investment, value=T.c.investment_id),
+                       literal(archived_at, A.c.archived_at.type))
+                .where(archived),
+            )
+        )
+        session.execute(delete(T).where(archived))
+        refresh_running_totals(session.connection(), ids)
+    return stats
+
+
+def _live_openings(session, investment_ids=None) -> list[tuple[int, int]]:
+    """(opening id, investment id) of archive groups whose opening row is in the live ledger."""
+    A, T = TransactionArchive, Transaction
+    stmt = (
+        select(A.opening_transaction_id, A.investment_id).distinct()
+        .join(T, T.id == A.opening_transaction_id)
+        .order_by(A.opening_transaction_id)
+    )
+    if investment_ids is not None:
+        stmt = stmt.where(A.investment_id.in_(list(investment_ids)))
+    return session.execute(stmt).all()
+
+
+def restore_ledger(session, investment_ids=None) -> int:
+    """Move archived transactions back and drop their opening rows; return the rows restored.
+
+    Repeated compactions are undone newest first until the archive holds
+    nothing for the selected holdings.
+    """
+    T = Transaction.__table__
+    A = TransactionArchive.__table__
+    columns = ['id', 'investment_id', 'quantity', 'unit_price', 'transaction_date', 'created_at']
+    restored = 0
+    while True:
+        openings = _live_openings(session, investment_ids)
+        if not openings:
+            return restored
+        for chunk in _chunks(openings):
+            opening_ids = [opening_id for opening_id, _ in chunk]
+            session.execute(delete(T).where(T.c.id.in_(opening_ids)))
+            restored += session.execute(
+                insert(T).from_select(columns, select(*(A.c[name] for name in columns))
+                                      .where(A.c.opening_transaction_id.in_(opening_ids)))
+            ).rowcount
+            session.execute(delete(A).where(A.c.opening_transaction_id.in_(opening_ids)))
+            refresh_running_totals(session.connection(), {investment_id for _, investment_id in chunk})
+
+
+def verify_compaction(session, investment_ids=None) -> list[LedgerMismatch]:
+    """Re-sum every archive group against its opening row.
+
+    Quantities must match exactly and cost within the rounding of the
+    opening price (half a price unit per quantity unit). Opening rows that
+    were themselves archived by a later compaction are checked too.
+    """
+    A, T = TransactionArchive, Transaction
+    openings = union_all(
+        select(T.id, T.quantity, T.unit_price),
+        select(A.id, A.quantity, A.unit_price),
+    ).subquery('opening')
+    stmt = (
+        select(A.opening_transaction_id, A.investment_id,
+               func.sum(_units(A.quantity)), func.sum(_units(A.quantity) * _units(A.unit_price)),
+               func.max(_units(openings.c.quantity)), func.max(_units(openings.c.unit_price)))
+        .outerjoin(openings, openings.c.id == A.opening_transaction_id)
+        .group_by(A.opening_transaction_id, A.investment_id)
+    )
+    if investment_ids is not None:
+        stmt = stmt.where(A.investment_id.in_(list(investment_ids)))
+    mismatches = []
+    for opening_id, investment_id, quantity_units, cost_units, opening_qty, opening_price in session.execute(stmt):
+        if opening_qty is None:
+            mismatches.append(LedgerMismatch(opening_id, investment_id, -quantity_units, -cost_units))
+            continue
+        quantity_diff = opening_qty - quantity_units
+        cost_diff = opening_qty * opening_price - cost_units
+        if quantity_diff or 2 * abs(cost_diff) > abs(opening_qty):
+            mismatches.append(LedgerMismatch(opening_id, investment_id, quantity_diff, cost_diff))
+    return mismatches
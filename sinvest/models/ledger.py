@@ -0,0 +1,154 @@
+"""Maintenance of the running-total columns of the transaction ledger.
+
+Every `Transaction` row carries the cumulative quantity, cost and row count
+of its holding up to and including itself, in (transaction_date, id) order.
+
+Writes only touch the tail of a ledger: `extend_running_totals` takes, per
+holding, the earliest (transaction_date, id) key that changed and rewrites
+the rows from there on, starting from the totals of the row just before it.
+An append therefore updates the new rows only. It runs
+
+* automatically after any flush of the app's session (`RoutingSession`,
+  i.e. ``db.session``) that adds, changes or deletes transactions (see the
+  session listeners below);
+* explicitly after Core bulk inserts, which bypass the ORM.
+
+`refresh_running_totals` recomputes whole ledgers, for bulk rewrites such as
+ledger compaction. Point-in-time reads are a single index seek per holding.
+"""
+from datetime import datetime
+from itertools import chain
+from typing import Mapping
+
+from sqlalchemy import (BigInteger, DateTime, Integer, and_, event, func, inspect, literal, select, tuple_,
+                        type_coerce, union_all, update)
+
+from sinvest.db_routing import RoutingSession
+from sinvest.models.portfolio import Transaction
+
+# Holdings per UPDATE statement (keeps the IN list below SQLite's variable limit)
+REFRESH_CHUNK = 500
+
+# Holdings per incremental UPDATE (one literal SELECT each; SQLite allows 500 compound terms)
+EXTEND_CHUNK = 250
+
+_TOUCHED_KEY = 'sinvest_touched_ledgers'
+# Start key that covers a holding's whole ledger
+LEDGER_START = (datetime.min, 0)
+
+
+def _refresh_statement(investment_ids=None):
+    table = Transaction.__table__
+    qty = type_coerce(table.c.quantity, BigInteger)
+    price = type_coerce(table.c.unit_price, BigInteger)
+    window = {'partition_by': table.c.investment_id, 'order_by': (table.c.transaction_date, table.c.id)}
+    running = select(
+        table.c.id,
+        func.sum(qty).over(**window).label('quantity_units'),
+        func.sum(qty * price).over(**window).label('cost_units'),
+        func.row_number().over(**window).label('count'),
+    )
+    if investment_ids is not None:
+        running = running.where(table.c.investment_id.in_(investment_ids))
+    running = running.subquery()
+    return (
+        update(table)
+        .where(table.c.id == running.c.id)
+        .values(running_quantity_units=running.c.quantity_units,
+                running_cost_units=running.c.cost_units,
+                running_count=running.c.count)
+    )
+
+
+def refresh_running_totals(connection, investment_ids=None) -> None:
+    """Recompute the running totals of the given holdings (all holdings if None)."""
+    if investment_ids is None:
+        connection.execute(_refresh_statement())
+        return
+    ids = sorted({i for i in investment_ids if i is not None})
+    for start in range(0, len(ids), REFRESH_CHUNK):
+        connection.execute(_refresh_statement(ids[start:start + REFRESH_CHUNK]))
+
+
+def _extend_statement(starts):
+    table = Transaction.__table__
+    qty = type_coerce(table.c.quantity, BigInteger)
+    price = type_coerce(table.c.unit_price, BigInteger)
+    requested = union_all(*(
+        select(literal(investment_id, Integer).label('investment_id'),
+               literal(start_date, DateTime).label('start_date'),
+               literal(start_id, Integer).label('start_id'))
+        for investment_id, (start_date, start_id) in starts
+    )).subquery('requested')
+    # The row just before each start key already carries correct totals
+    before = table.alias('before')
+    base_id = (
+        select(before.c.id)
+        .where(before.c.investment_id == requested.c.investment_id,
+               tuple_(before.c.transaction_date, before.c.id) < tuple_(requested.c.start_date, requested.c.start_id))
+        .order_by(before.c.transaction_date.desc(), before.c.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    bases = select(requested, base_id.label('base_id')).subquery('bases')
+    base = table.alias('base')
+    window = {'partition_by': table.c.investment_id, 'order_by': (table.c.transaction_date, table.c.id)}
+    running = (
+        select(
+            table.c.id,
+            (func.coalesce(base.c.running_quantity_units, 0) + func.sum(qty).over(**window)).label('quantity_units'),
+            (func.coalesce(base.c.running_cost_units, 0) + func.sum(qty * price).over(**window)).label('cost_units'),
+            (func.coalesce(base.c.running_count, 0) + func.row_number().over(**window)).label('count'),
+        )
+        .select_from(table)
+        .join(bases, and_(table.c.investment_id == bases.c.investment_id,
+                          tuple_(table.c.transaction_date, table.c.id) >= tuple_(bases.c.start_date, bases.c.start_id)))
+        .outerjoin(base, base.c.id == bases.c.base_id)
+        .subquery()
+    )
+    return (
+        update(table)
+        .where(table.c.id == running.c.id)
+        .values(running_quantity_units=running.c.quantity_units,
+                running_cost_units=running.c.cost_units,
+                running_count=running.c.count)
+    )
+
+
+def extend_running_totals(connection, starts: Mapping[int, tuple[datetime, int]]) -> None:
+    """Rewrite running totals from the earliest changed (transaction_date, id) key of each holding.
+
+    Rows before the key keep their totals; pass `LEDGER_START` to cover a whole
+    ledger. A date with id 0 covers every row of that day.
+    """
+    items = sorted((investment_id, key) for investment_id, key in starts.items() if investment_id is not None)
+    for start in range(0, len(items), EXTEND_CHUNK):
+        connection.execute(_extend_statement(items[start:start + EXTEND_CHUNK]))
+
+
+def note_ledger_change(starts: dict, investment_id, transaction_date, transaction_id=0) -> None:
+    """Lower the start key of `investment_id` in `starts` to (transaction_date, transaction_id)."""
+    key = (transaction_date, transaction_id or 0) if transaction_date is not None else LEDGER_START
+    if investment_id not in starts or key < starts[investment_id]:
+        starts[investment_id] = key
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_touched_ledgers(session, flush_context):
+    touched = session.info.setdefault(_TOUCHED_KEY, {})
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Transaction):
+            state = inspect(obj)
+            investments = state.attrs.investment_id.history.sum()
+            dates = state.attrs.transaction_date.history.sum()
+            # A moved or re-dated row affects its old and new holding from the earlier position on
+            for investment_id in investments:
+                for transaction_date in dates or [None]:
+                    note_ledger_change(touched, investment_id, transaction_date, obj.id)
+
+
+@event.listens_for(RoutingSession, 'after_flush_postexec')
+def _refresh_touched_ledgers(session, flush_context):
+    touched = session.info.pop(_TOUCHED_KEY, None)
+    if touched:
+        extend_running_totals(session.connection(), touched)
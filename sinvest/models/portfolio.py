@@ -2,6 +2,8 @@
 from datetime import datetime
 import yfinance as yf
 from sinvest.app import db
+from sinvest.domain.money import PRICE_SCALE, QUANTITY_SCALE
+from sinvest.models.types import FixedPoint
 from sqlalchemy.orm import relationship
 
 class Portfolio(db.Model):
@@ -10,7 +12,12 @@ class Portfolio(db.Model):
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    investments = db.relationship('Investment', backref='portfolio', lazy=True, cascade='all, delete-orphan')
+    # Children are removed by ON DELETE CASCADE; passive_deletes keeps the ORM
+    # from loading them just to delete them row by row.
+    investments = db.relationship('Investment', backref='portfolio', lazy=True, cascade='all, delete-orphan',
+                                  passive_deletes=True)
+    snapshots = db.relationship('PortfolioSnapshot', backref='portfolio', lazy=True, cascade='all, delete-orphan',
+                                passive_deletes=True)
 
     def get_total_value(self):
         """Return total current values grouped by currency.
@@ -36,20 +43,45 @@ class Portfolio(db.Model):
             gains[cur] = gains.get(cur, 0.0) + (inv.get_gain_loss() or 0.0)
         return gains
 
+class Security(db.Model):
+    """Instrument reference data keyed by ISIN, shared by every investment in it.
+
+    Price refresh jobs enumerate instruments from this small table instead of
+    a DISTINCT over all investments. Rows are created on demand by
+    `sinvest.models.securities` when investments are inserted.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    isin = db.Column(db.String(12), nullable=False, unique=True)
+    symbol = db.Column(db.String(10), nullable=False)
+    currency = db.Column(db.String(3), nullable=False, default='USD')
+    type = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    investments = db.relationship('Investment', backref='security', lazy=True)
+
+
 class Investment(db.Model):
     """Investment model representing individual investments in a portfolio"""
     id = db.Column(db.Integer, primary_key=True)
-    portfolio_id = db.Column(db.Integer, db.ForeignKey('portfolio.id'), nullable=False)
-    symbol = db.Column(db.String(10), nullable=False)
+    portfolio_id = db.Column(db.Integer, db.ForeignKey('portfolio.id', ondelete='CASCADE'), nullable=False)
+    # Shared instrument row; symbol/isin/currency/type below are kept as a
+    # denormalised copy so existing readers do not need the join.
+    security_id = db.Column(db.Integer, db.ForeignKey('security.id'), index=True)
+    # Indexed: prices are looked up by each holding's own symbol (see sinvest.revaluation.distinct_symbols)
+    symbol = db.Column(db.String(10), nullable=False, index=True)
     isin = db.Column(db.String(12), nullable=False)
     currency = db.Column(db.String(3), nullable=False, default='USD')
     type = db.Column(db.String(20), nullable=False)  # 'equity', 'bond', 'etf'
-    quantity = db.Column(db.Float, nullable=False)
-    purchase_price = db.Column(db.Float, nullable=False)
+    # Amounts are stored as exact fixed-point integers (see sinvest.domain.money)
+    quantity = db.Column(FixedPoint(QUANTITY_SCALE), nullable=False)
+    purchase_price = db.Column(FixedPoint(PRICE_SCALE), nullable=False)
     purchase_date = db.Column(db.DateTime, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     # transactions record buys (+) and sells (-) for this investment
-    transactions = db.relationship('Transaction', backref='investment', lazy=True, cascade='all, delete-orphan')
+    transactions = db.relationship('Transaction', backref='investment', lazy=True, cascade='all, delete-orphan',
+                                   passive_deletes=True)
+    # originals of compacted transactions (see sinvest.ledger_compaction)
+    archived_transactions = db.relationship('TransactionArchive', lazy=True, cascade='all, delete-orphan',
+                                            passive_deletes=True)
     # Ensure the same ISIN cannot be added multiple times to the same portfolio.
     # (We keep this at the model level; applying it to an existing SQLite DB
     # requires a migration. We also add a runtime check when creating records.)
@@ -90,8 +122,66 @@ class Investment(db.Model):
 class Transaction(db.Model):
     """Records a buy (+quantity) or sell (-quantity) for an Investment at a given unit price."""
     id = db.Column(db.Integer, primary_key=True)
-    investment_id = db.Column(db.Integer, db.ForeignKey('investment.id'), nullable=False)
-    quantity = db.Column(db.Float, nullable=False)
-    unit_price = db.Column(db.Float, nullable=False)
+    investment_id = db.Column(db.Integer, db.ForeignKey('investment.id', ondelete='CASCADE'), nullable=False)
+    quantity = db.Column(FixedPoint(QUANTITY_SCALE), nullable=False)
+    unit_price = db.Column(FixedPoint(PRICE_SCALE), nullable=False)
     transaction_date = db.Column(db.DateTime, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Running totals of the holding's ledger up to and including this row in
+    # (transaction_date, id) order, in fixed-point units (quantity units and
+    # quantity x price units). Maintained by sinvest.models.ledger so "as of"
+    # lookups read one row per holding instead of summing the ledger.
+    running_quantity_units = db.Column(db.BigInteger)
+    running_cost_units = db.Column(db.BigInteger)
+    running_count = db.Column(db.Integer)
+    # Covering index for the hot paths (a holding's ledger keyset-paginated by
+    # (transaction_date, id) and its quantity/cost sums): SQLite has no INCLUDE
+    # clause, so the payload columns are part of the key.
+    # `ix_transaction_date` serves date-range slices.
+    __table_args__ = (
+        db.Index('ix_transaction_investment_date', 'investment_id', 'transaction_date', 'id', 'quantity', 'unit_price'),
+        db.Index('ix_transaction_date', 'transaction_date'),
+    )
+
+
+class TransactionArchive(db.Model):
+    """Original transactions rolled into an opening-balance row by ledger compaction.
+
+    Rows keep their original ids so `sinvest.ledger_compaction.restore_ledger`
+    can put them back unchanged; `opening_transaction_id` is the row of
+    `transaction` (or, after repeated compactions, of this table) that replaced
+    them.
+    """
+    __tablename__ = 'transaction_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    investment_id = db.Column(db.Integer, db.ForeignKey('investment.id', ondelete='CASCADE'), nullable=False)
+    quantity = db.Column(FixedPoint(QUANTITY_SCALE), nullable=False)
+    unit_price = db.Column(FixedPoint(PRICE_SCALE), nullable=False)
+    transaction_date = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime)
+    opening_transaction_id = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    __table_args__ = (
+        db.Index('ix_transaction_archive_opening', 'opening_transaction_id'),
+        db.Index('ix_transaction_archive_investment', 'investment_id'),
+    )
+
+
+class PortfolioSnapshot(db.Model):
+    """Valuation of a portfolio at a point in time, one row per currency.
+
+    Written in batches by the snapshotter from `aggregate_portfolio` results so
+    historical charts read an indexed (portfolio_id, taken_at) range instead of
+    recomputing from transactions and prices.
+    """
+    __tablename__ = 'portfolio_snapshot'
+    id = db.Column(db.Integer, primary_key=True)
+    portfolio_id = db.Column(db.Integer, db.ForeignKey('portfolio.id', ondelete='CASCADE'), nullable=False)
+    taken_at = db.Column(db.DateTime, nullable=False)
+    currency = db.Column(db.String(3), nullable=False)
+    total_value = db.Column(FixedPoint(PRICE_SCALE), nullable=False)
+    gain_loss = db.Column(FixedPoint(PRICE_SCALE), nullable=False)
+    # The unique index doubles as the range-scan index for snapshot history
+    __table_args__ = (
+        db.UniqueConstraint('portfolio_id', 'taken_at', 'currency', name='uix_snapshot_portfolio_time_currency'),
+    )
@@ -0,0 +1,82 @@
+"""Linking investments to the shared `Security` rows.
+
+`ensure_securities` is the bulk entry point (used by the repository and the
+synthetic loader); the mapper listener below covers investments inserted
+through the ORM without a `security_id`.
+"""
+from sqlalchemy import event, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from sinvest.models.portfolio import Investment, Security
+from sinvest.repositories.abstract import SecurityConflictError
+
+# ISINs per lookup statement (keeps the IN list below SQLite's variable limit)
+LOOKUP_CHUNK = 500
+
+# Dialects with INSERT ... ON CONFLICT DO NOTHING
+_CONFLICT_FREE_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def _lookup(connection, isins) -> dict[str, tuple]:
+    """{isin: (id, symbol, currency)} of the stored securities."""
+    stored: dict[str, tuple] = {}
+    for start in range(0, len(isins), LOOKUP_CHUNK):
+        chunk = isins[start:start + LOOKUP_CHUNK]
+        stored.update((isin, (security_id, symbol, currency)) for isin, security_id, symbol, currency in connection.execute(
+            select(Security.isin, Security.id, Security.symbol, Security.currency).where(Security.isin.in_(chunk))))
+    return stored
+
+
+def _listing(instrument) -> tuple[str, str]:
+    return instrument['symbol'], instrument.get('currency') or 'USD'
+
+
+def _check_listing(isin: str, expected: tuple[str, str], instrument) -> None:
+    if _listing(instrument) != expected:
+        symbol, currency = _listing(instrument)
+        raise SecurityConflictError(
+            f'ISIN {isin} is {expected[0]} ({expected[1]}), not {symbol} ({currency})')
+
+
+def ensure_securities(connection, instruments) -> dict[str, int]:
+    """Return {isin: security id} for `instruments`, creating the missing securities.
+
+    `instruments` are mappings with isin, symbol, currency and type; for an
+    ISIN seen for the first time its details are stored. Concurrent callers
+    creating the same ISIN both get the one stored row (on SQLite and
+    PostgreSQL, which can skip the conflicting insert).
+
+    Raises SecurityConflictError, before writing anything of its own, if an
+    ISIN comes with a symbol or currency other than the stored (or earlier
+    given) one.
+    """
+    by_isin = {}
+    for instrument in instruments:
+        first = by_isin.setdefault(instrument['isin'], instrument)
+        _check_listing(instrument['isin'], _listing(first), instrument)
+    isins = sorted(by_isin)
+    stored = _lookup(connection, isins)
+    for isin, (_, symbol, currency) in stored.items():
+        _check_listing(isin, (symbol, currency), by_isin[isin])
+    missing = [isin for isin in isins if isin not in stored]
+    if missing:
+        # A concurrent first add of the same ISIN may insert it between the
+        # lookup and here: skip conflicting rows and read the winner's id.
+        make_insert = _CONFLICT_FREE_INSERTS.get(connection.dialect.name)
+        stmt = make_insert(Security).on_conflict_do_nothing(index_elements=['isin']) if make_insert else insert(Security)
+        connection.execute(stmt, [
+            {'isin': isin, 'symbol': by_isin[isin]['symbol'], 'currency': by_isin[isin].get('currency') or 'USD',
+             'type': by_isin[isin]['type']} for isin in missing
+        ])
+        created = _lookup(connection, missing)
+        for isin, (_, symbol, currency) in created.items():
+            _check_listing(isin, (symbol, currency), by_isin[isin])  # a concurrent creator may differ
+        stored.update(created)
+    return {isin: security_id for isin, (security_id, _, _) in stored.items()}
+
+
+@event.listens_for(Investment, 'before_insert')
+def _link_security(mapper, connection, target):
+    if target.security_id is None and target.isin:
+        instrument = {'isin': target.isin, 'symbol': target.symbol, 'currency': target.currency, 'type': target.type}
+        target.security_id = ensure_securities(connection, [instrument])[target.isin]
@@ -0,0 +1,32 @@
+"""Custom column types"""
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+from sinvest.domain.money import from_units, to_units
+
+
+class FixedPoint(TypeDecorator):
+    """Store a decimal amount as an integer number of 1/`scale` units.
+
+    Python code keeps reading and writing floats; the database holds exact
+    integers that can be summed without floating point drift. Use
+    ``type_coerce(column, BigInteger)`` to read the raw integer units in SQL
+    aggregates.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    def __init__(self, scale: int, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scale = scale
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return to_units(value, self.scale)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return from_units(value, self.scale)
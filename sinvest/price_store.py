@@ -0,0 +1,155 @@
+"""Columnar, memory-mapped store of daily close prices.
+
+Layout of a store directory::
+
+    index.json           {"version": 1, "symbols": {"AAPL": {"file": "000000", "rows": 2520,
+                                                              "first": "2015-01-02", "last": "2024-12-31"}}}
+    000000.dates         int64 days since 1970-01-01, ascending
+    000000.closes        float64 closes, same length
+
+Each column is a raw little-endian array, so appending a day is a write at the
+end of two files and reading maps them with ``np.memmap``. `read` returns
+slices of those maps (no copy) for any date range, found by binary search.
+
+    store = PriceHistoryStore('var/prices')
+    store.append('AAPL', dates, closes)
+    series = store.read('AAPL', date(2020, 1, 1), date(2020, 12, 31))
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from sinvest.domain.entities import PriceSeries
+from sinvest.domain.price_provider import HistoricalPriceProvider
+
+INDEX_FILE = 'index.json'
+_DATE_DTYPE = np.dtype('<i8')
+_CLOSE_DTYPE = np.dtype('<f8')
+
+
+def _to_days(values) -> np.ndarray:
+    return np.asarray(values, dtype='datetime64[D]').astype(_DATE_DTYPE)
+
+
+def _empty_series(symbol: str) -> PriceSeries:
+    return PriceSeries(symbol, np.empty(0, dtype='datetime64[D]'), np.empty(0, dtype=_CLOSE_DTYPE))
+
+
+class PriceHistoryStore:
+    """Append-only per-symbol columns of (date, close) backed by memory-mapped files."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._maps: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        index_path = self.root / INDEX_FILE
+        self._index = json.loads(index_path.read_text())['symbols'] if index_path.exists() else {}
+
+    def symbols(self) -> list[str]:
+        return sorted(self._index)
+
+    def last_date(self, symbol: str) -> date | None:
+        entry = self._index.get(symbol)
+        return date.fromisoformat(entry['last']) if entry else None
+
+    def append(self, symbol: str, dates, closes) -> int:
+        """Append days after the symbol's last stored date; return the number of rows written.
+
+        Days on or before the last stored date are skipped, so re-importing an
+        overlapping download is safe.
+        """
+        days = _to_days(dates)
+        values = np.asarray(closes, dtype=_CLOSE_DTYPE)
+        if days.shape != values.shape:
+            raise ValueError('dates and closes must have the same length')
+        order = np.argsort(days, kind='stable')
+        days, values = days[order], values[order]
+        keep = np.concatenate(([True], days[1:] != days[:-1])) if len(days) else np.empty(0, dtype=bool)
+        days, values = days[keep], values[keep]
+
+        with self._lock:
+            entry = self._index.get(symbol)
+            if entry is not None:
+                last = np.datetime64(entry['last'], 'D').astype(_DATE_DTYPE)
+                fresh = days > last
+                days, values = days[fresh], values[fresh]
+            if not len(days):
+                return 0
+            if entry is None:
+                entry = {'file': f'{len(self._index):06d}', 'rows': 0, 'first': None, 'last': None}
+            stem = self.root / entry['file']
+            with open(stem.with_suffix('.dates'), 'ab') as fh:
+                fh.write(days.astype(_DATE_DTYPE).tobytes())
+            with open(stem.with_suffix('.closes'), 'ab') as fh:
+                fh.write(values.tobytes())
+            entry['rows'] += len(days)
+            entry['first'] = entry['first'] or str(days[0].astype('datetime64[D]'))
+            entry['last'] = str(days[-1].astype('datetime64[D]'))
+            self._index[symbol] = entry
+            self._maps.pop(symbol, None)
+            self._write_index()
+            return len(days)
+
+    def _write_index(self) -> None:
+        tmp = self.root / f'{INDEX_FILE}.tmp'
+        tmp.write_text(json.dumps({'version': 1, 'symbols': self._index}, indent=1, sort_keys=True))
+        os.replace(tmp, self.root / INDEX_FILE)
+
+    def _columns(self, symbol: str) -> tuple[np.ndarray, np.ndarray] | None:
+        with self._lock:
+            cached = self._maps.get(symbol)
+            if cached is not None:
+                return cached
+            entry = self._index.get(symbol)
+            if entry is None:
+                return None
+            stem = self.root / entry['file']
+            rows = entry['rows']
+            columns = (
+                np.memmap(stem.with_suffix('.dates'), dtype=_DATE_DTYPE, mode='r', shape=(rows,)),
+                np.memmap(stem.with_suffix('.closes'), dtype=_CLOSE_DTYPE, mode='r', shape=(rows,)),
+            )
+            self._maps[symbol] = columns
+            return columns
+
+    def read(self, symbol: str, start: date | None = None, end: date | None = None) -> PriceSeries:
+        """Return closes with start <= date <= end as read-only views of the mapped files."""
+        columns = self._columns(symbol)
+        if columns is None:
+            return _empty_series(symbol)
+        days, closes = columns
+        lo = 0 if start is None else int(np.searchsorted(days, _to_days(start), side='left'))
+        hi = len(days) if end is None else int(np.searchsorted(days, _to_days(end), side='right'))
+        return PriceSeries(symbol, days[lo:hi].view('datetime64[D]'), closes[lo:hi])
+
+
+class StoredHistoricalPriceProvider(HistoricalPriceProvider):
+    """HistoricalPriceProvider reading from a local `PriceHistoryStore`."""
+
+    def __init__(self, store: PriceHistoryStore):
+        self.store = store
+
+    def get_closes(self, symbol: str, start: date | None = None, end: date | None = None) -> PriceSeries:
+        return self.store.read(symbol, start, end)
+
+
+def import_history(store: PriceHistoryStore, provider, symbols: Iterable[str], update_period: str = '1mo',
+                   full_period: str = 'max') -> dict[str, int]:
+    """Download closes via `provider.get_history` and append the new days; return rows added per symbol.
+
+    Symbols already in the store only fetch `update_period`; new ones fetch `full_period`.
+    """
+    added = {}
+    for symbol in symbols:
+        period = full_period if store.last_date(symbol) is None else update_period
+        rows = provider.get_history(symbol, period)
+        added[symbol] = store.append(symbol, [day for day, _ in rows], [close for _, close in rows]) if rows else 0
+    return added
@@ -0,0 +1,327 @@
+"""Opt-in profiling of slow (or explicitly flagged) requests.
+
+While profiling is enabled every request is watched by a shared stack
+sampler (one background thread reading ``sys._current_frames()`` every few
+milliseconds, so the cost is independent of how much Python the request
+runs). Requests slower than ``PROFILING_THRESHOLD_MS`` keep their samples as
+flamegraph-ready collapsed stacks; faster ones are discarded.
+
+A request carrying a ``?_profile=<token>`` flag signed with
+``PROFILING_SIGNING_KEY`` (see `profile_token`, or
+``flask --app sinvest.app profile-url <path>``) is additionally run under
+cProfile and always kept, giving a pstats file as well. Flags are ignored
+while no signing key is set.
+
+Profiles go to a bounded on-disk ring buffer (`ProfileStore`); the oldest are
+dropped beyond ``PROFILING_MAX_PROFILES``. Admin endpoints, guarded by
+``Authorization: Bearer <PROFILING_ADMIN_TOKEN>``:
+
+    GET /admin/profiles                       newest first, JSON metadata
+    GET /admin/profiles/<id>.collapsed        for flamegraph.pl / speedscope
+    GET /admin/profiles/<id>.pstats           for ``python -m pstats``
+
+Configuration (app.config, defaults from the environment):
+    PROFILING_ENABLED            SINVEST_PROFILING, default off
+    PROFILING_THRESHOLD_MS       SINVEST_PROFILING_THRESHOLD_MS, default 1000
+    PROFILING_SAMPLE_INTERVAL_MS SINVEST_PROFILING_SAMPLE_INTERVAL_MS, default 5
+    PROFILING_DIR                SINVEST_PROFILING_DIR, default <instance>/profiles
+    PROFILING_MAX_PROFILES       SINVEST_PROFILING_MAX_PROFILES, default 50
+    PROFILING_ADMIN_TOKEN        SINVEST_PROFILING_ADMIN_TOKEN (admin endpoints answer 403 without it)
+    PROFILING_SIGNING_KEY        SINVEST_PROFILING_SIGNING_KEY, required when profiling is enabled
+    PROFILING_TOKEN_MAX_AGE      seconds a signed flag stays valid, default 3600
+"""
+from __future__ import annotations
+
+import cProfile
+import hmac
+import json
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from flask import Flask, abort, current_app, g, jsonify, request, send_file
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+CONFIG_KEY = 'PROFILING_ENABLED'
+QUERY_FLAG = '_profile'
+_SALT = 'sinvest-profile'
+FORMATS = {'collapsed': 'text/plain', 'pstats': 'application/octet-stream'}
+# Endpoints never profiled (streamed responses are skipped when they finish)
+_SKIPPED_ENDPOINTS = {'list_profiles', 'download_profile', 'metrics', 'static'}
+
+_DEFAULTS = {
+    'PROFILING_ENABLED': ('SINVEST_PROFILING', False),
+    'PROFILING_THRESHOLD_MS': ('SINVEST_PROFILING_THRESHOLD_MS', 1000.0),
+    'PROFILING_SAMPLE_INTERVAL_MS': ('SINVEST_PROFILING_SAMPLE_INTERVAL_MS', 5.0),
+    'PROFILING_DIR': ('SINVEST_PROFILING_DIR', None),
+    'PROFILING_MAX_PROFILES': ('SINVEST_PROFILING_MAX_PROFILES', 50),
+    'PROFILING_ADMIN_TOKEN': ('SINVEST_PROFILING_ADMIN_TOKEN', None),
+    'PROFILING_TOKEN_MAX_AGE': ('SINVEST_PROFILING_TOKEN_MAX_AGE', 3600),
+    'PROFILING_SIGNING_KEY': ('SINVEST_PROFILING_SIGNING_KEY', None),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'.replace(';', ':')
+
+
+class StackSampler:
+    """Shared sampling thread collecting collapsed stacks for registered threads."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stacks: dict[int, Counter] = {}
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, thread_id: int | None = None) -> None:
+        """Begin sampling `thread_id` (the calling thread by default)."""
+        with self._lock:
+            self._stacks[thread_id or threading.get_ident()] = Counter()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, thread_id: int | None = None) -> Counter:
+        """Stop sampling `thread_id` and return its {collapsed stack: samples}."""
+        with self._lock:
+            return self._stacks.pop(thread_id or threading.get_ident(), Counter())
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                watched = list(self._stacks)
+            if not watched:
+                self._wake.clear()
+                self._wake.wait(timeout=1.0)
+                continue
+            frames = sys._current_frames()
+            samples = {}
+            for thread_id in watched:
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                samples[thread_id] = ';'.join(reversed(labels))
+            del frames
+            with self._lock:
+                for thread_id, stack in samples.items():
+                    if thread_id in self._stacks:
+                        self._stacks[thread_id][stack] += 1
+            time.sleep(self.interval)
+
+
+def render_collapsed(stacks: Counter) -> str:
+    """Brendan Gregg's collapsed format: one 'frame;frame;frame count' line per stack."""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+class ProfileStore:
+    """Bounded on-disk ring buffer of profiles: ``<id>.json`` metadata plus one file per format."""
+
+    def __init__(self, root, max_profiles: int = 50):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def save(self, meta: dict, files: dict[str, bytes]) -> str:
+        """Store a profile and drop the oldest beyond `max_profiles`; return its id."""
+        with self._lock:
+            self._seq += 1
+            profile_id = f'{time.time_ns() // 1000:016d}-{os.getpid()}-{self._seq}'
+            for fmt, data in files.items():
+                (self.root / f'{profile_id}.{fmt}').write_bytes(data)
+            meta = {**meta, 'id': profile_id, 'formats': sorted(files),
+                    'bytes': sum(len(data) for data in files.values())}
+            tmp = self.root / f'{profile_id}.json.tmp'
+            tmp.write_text(json.dumps(meta))
+            os.replace(tmp, self.root / f'{profile_id}.json')
+            ids = self._ids()
+            for stale in ids[:max(0, len(ids) - self.max_profiles)]:
+                for path in self.root.glob(f'{stale}.*'):
+                    path.unlink(missing_ok=True)
+            return profile_id
+
+    def _ids(self) -> list[str]:
+        return sorted(path.name[:-len('.json')] for path in self.root.glob('*.json'))
+
+    def list(self) -> list[dict]:
+        """Metadata of the stored profiles, newest first."""
+        profiles = []
+        for profile_id in reversed(self._ids()):
+            try:
+                profiles.append(json.loads((self.root / f'{profile_id}.json').read_text()))
+            except FileNotFoundError:  # pruned concurrently
+                continue
+        return profiles
+
+    def path(self, profile_id: str, fmt: str) -> Path | None:
+        path = self.root / f'{profile_id}.{fmt}'
+        if fmt not in FORMATS or path.parent != self.root or not path.is_file():
+            return None
+        return path
+
+
+sampler = StackSampler()
+# Only one cProfile may be active per process on newer Pythons; flagged
+# requests that overlap fall back to sampling only.
+_cprofile_lock = threading.Lock()
+
+
+def _serializer(app: Flask) -> URLSafeTimedSerializer | None:
+    # A dedicated key: the app's SECRET_KEY may well be the default from the repository
+    key = app.config.get('PROFILING_SIGNING_KEY')
+    return URLSafeTimedSerializer(key, salt=_SALT) if key else None
+
+
+def profile_token(app: Flask, path: str) -> str:
+    """Signed value for ``?_profile=`` that enables cProfile for requests to `path`."""
+    serializer = _serializer(app)
+    if serializer is None:
+        raise RuntimeError('PROFILING_SIGNING_KEY (SINVEST_PROFILING_SIGNING_KEY) is not set')
+    return serializer.dumps(path)
+
+
+def _flag_is_valid(app: Flask) -> bool:
+    token = request.args.get(QUERY_FLAG)
+    serializer = _serializer(app)
+    if not token or serializer is None:
+        return False
+    try:
+        path = serializer.loads(token, max_age=int(app.config['PROFILING_TOKEN_MAX_AGE']))
+    except BadSignature:
+        return False
+    return path == request.path
+
+
+def is_enabled(app: Flask) -> bool:
+    return bool(app.config.get(CONFIG_KEY))
+
+
+def profile_store(app: Flask) -> ProfileStore:
+    root = app.config.get('PROFILING_DIR') or os.path.join(app.instance_path, 'profiles')
+    max_profiles = int(app.config['PROFILING_MAX_PROFILES'])
+    store = app.extensions.get('sinvest_profiles')
+    if store is None or store.root != Path(root) or store.max_profiles != max_profiles:
+        store = app.extensions['sinvest_profiles'] = ProfileStore(root, max_profiles)
+    return store
+
+
+def _config_default(env_var: str, default):
+    value = os.environ.get(env_var)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value.lower() in ('1', 'true', 'yes')
+    if isinstance(default, (int, float)):
+        return type(default)(value)
+    return value
+
+
+def init_profiling(app: Flask) -> None:
+    """Register the request hooks and the ``/admin/profiles`` endpoints.
+
+    Raises RuntimeError if profiling is enabled without a signing key.
+    """
+    for key, (env_var, default) in _DEFAULTS.items():
+        app.config.setdefault(key, _config_default(env_var, default))
+    if is_enabled(app) and not app.config['PROFILING_SIGNING_KEY']:
+        raise RuntimeError('Profiling is enabled but PROFILING_SIGNING_KEY (SINVEST_PROFILING_SIGNING_KEY) is not set')
+
+    @app.before_request
+    def _start_profiling():
+        if not is_enabled(current_app) or request.endpoint in _SKIPPED_ENDPOINTS:
+            return
+        sampler.interval = float(current_app.config['PROFILING_SAMPLE_INTERVAL_MS']) / 1000
+        g._sinvest_profile = {'started': time.perf_counter(), 'at': datetime.utcnow(), 'cprofile': None}
+        if _flag_is_valid(current_app) and _cprofile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            g._sinvest_profile['cprofile'] = profiler
+            profiler.enable()
+        sampler.start()
+
+    @app.after_request
+    def _finish_profiling(response):
+        state = g.pop('_sinvest_profile', None)
+        if state is None:
+            return response
+        profiler = _stop(state)
+        stacks = sampler.stop()
+        duration_ms = (time.perf_counter() - state['started']) * 1000
+        slow = duration_ms >= float(current_app.config['PROFILING_THRESHOLD_MS'])
+        if (profiler is None and not slow) or response.is_streamed:
+            return response
+
+        files = {'collapsed': render_collapsed(stacks).encode()}
+        if profiler is not None:
+            profiler.create_stats()
+            files['pstats'] = _dump_pstats(profiler)
+        profile_id = profile_store(current_app).save({
+            'endpoint': request.endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'started_at': state['at'].isoformat(),
+            'trigger': 'flag' if profiler is not None else 'threshold',
+            'samples': sum(stacks.values()),
+        }, files)
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def _abandon_profiling(exc):
+        # after_request is skipped when a view raises: release the profilers here
+        state = g.pop('_sinvest_profile', None)
+        if state is not None:
+            _stop(state)
+            sampler.stop()
+
+    def _require_admin():
+        if not is_enabled(current_app):
+            abort(404)
+        expected = current_app.config.get('PROFILING_ADMIN_TOKEN')
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not expected or not hmac.compare_digest(supplied.encode(), str(expected).encode()):
+            abort(403)
+
+    @app.route('/admin/profiles')
+    def list_profiles():
+        _require_admin()
+        return jsonify(profile_store(current_app).list())
+
+    @app.route('/admin/profiles/<profile_id>.<fmt>')
+    def download_profile(profile_id, fmt):
+        _require_admin()
+        path = profile_store(current_app).path(profile_id, fmt)
+        if path is None:
+            abort(404)
+        return send_file(path, mimetype=FORMATS[fmt], as_attachment=True, download_name=path.name)
+
+
+def _stop(state: dict) -> cProfile.Profile | None:
+    profiler = state['cprofile']
+    if profiler is not None:
+        profiler.disable()
+        _cprofile_lock.release()
+    return profiler
+
+
+def _dump_pstats(profiler: cProfile.Profile) -> bytes:
+    # Same payload as pstats.Stats.dump_stats, without a temporary file
+    return marshal.dumps(pstats.Stats(profiler).stats)
@@ -0,0 +1,207 @@
+"""Local HTTP stand-in for the quote service, for offline load testing.
+
+`QuoteServer` serves a recorded `QuoteTape` with configurable latency,
+jitter and error rate; `HttpPriceProvider` is the matching client, so batch,
+concurrent and caching providers can be exercised against realistic timings
+without touching Yahoo:
+
+    with QuoteServer(QuoteTape.load('quotes.json'), latency=0.08, jitter=0.04, error_rate=0.02) as server:
+        provider = HttpPriceProvider(server.url)
+        provider.get_price('AAPL')
+
+Endpoints: ``GET /quote/<symbol>``, ``GET /quotes?symbols=A,B`` and
+``GET /history/<symbol>``. Unknown symbols return 404, injected errors 503.
+Run standalone with ``python -m sinvest.quote_server quotes.json --port 8765``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import requests
+
+from sinvest.domain.price_provider import MarketPriceProvider
+from sinvest.domain.price_replay import QuoteTape
+
+
+class QuoteServer:
+    """Threaded HTTP server replaying `tape`; binds an ephemeral port by default."""
+
+    def __init__(self, tape: QuoteTape, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 host: str = '127.0.0.1', port: int = 0, seed: int | None = None):
+        self.tape = tape
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'QuoteServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='quote-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread until interrupted."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'QuoteServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _draw(self) -> tuple[float, bool]:
+        """Return (delay, fail) for one request."""
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            return delay, self._random.random() < self.error_rate
+
+    def respond(self, path: str, query: dict) -> tuple[int, object]:
+        parts = [unquote(p) for p in path.strip('/').split('/')]
+        if len(parts) == 2 and parts[0] == 'quote':
+            price = self.tape.prices.get(parts[1])
+            return (200, {'symbol': parts[1], 'price': price}) if price is not None else (404, {'error': 'unknown symbol'})
+        if parts == ['quotes']:
+            symbols = [s for s in ','.join(query.get('symbols', [])).split(',') if s]
+            return 200, {'prices': {s: self.tape.prices[s] for s in symbols if s in self.tape.prices}}
+        if len(parts) == 2 and parts[0] == 'history':
+            rows = self.tape.history.get(parts[1])
+            return (200, {'symbol': parts[1], 'history': rows}) if rows is not None else (404, {'error': 'unknown symbol'})
+        return 404, {'error': 'not found'}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; with Nagle on, the body
+            # waits for the client's delayed ACK (~40 ms) on every keep-alive request.
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                delay, fail = server._draw()
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    status, payload = 503, {'error': 'injected failure'}
+                else:
+                    url = urlsplit(self.path)
+                    status, payload = server.respond(url.path, parse_qs(url.query))
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class HttpPriceProvider(MarketPriceProvider):
+    """Client for `QuoteServer`; errors map to 0.0 / [] like YFinancePriceProvider.
+
+    `requests.Session` is not guaranteed to be thread-safe, so every thread
+    (e.g. of a concurrent provider's fan-out) gets its own session from
+    `session_factory`, keeping its keep-alive connections.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 5.0,
+                 session_factory: Callable[[], requests.Session] = requests.Session):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._session_factory = session_factory
+        self._local = threading.local()
+        self._sessions: list[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """The calling thread's session."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._session_factory()
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def close(self) -> None:
+        """Close the sessions of every thread."""
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+
+    def _get(self, path: str, **params) -> dict | None:
+        try:
+            resp = self.session.get(f'{self.base_url}{path}', params=params or None, timeout=self.timeout)
+            return resp.json() if resp.status_code == 200 else None
+        except (requests.RequestException, ValueError):
+            return None
+
+    def get_price(self, symbol: str) -> float:
+        data = self._get(f'/quote/{quote(symbol, safe="")}')
+        return float(data['price']) if data else 0.0
+
+    def get_prices(self, symbols) -> dict[str, float]:
+        symbols = list(symbols)
+        data = self._get('/quotes', symbols=','.join(symbols))
+        prices = data['prices'] if data else {}
+        return {s: float(prices.get(s, 0.0)) for s in symbols}
+
+    def get_history(self, symbol: str, period: str = '1y') -> list[tuple[str, float]]:
+        data = self._get(f'/history/{quote(symbol, safe="")}')
+        return [(day, float(close)) for day, close in data['history']] if data else []
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Serve a recorded quote tape over HTTP.')
+    parser.add_argument('tape', help='JSON tape written by RecordingPriceProvider / flask record-quotes')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='mean response delay in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='uniform +/- delay spread in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    server = QuoteServer(QuoteTape.load(args.tape), latency=args.latency, jitter=args.jitter,
+                         error_rate=args.error_rate, host=args.host, port=args.port, seed=args.seed)
+    print(f'Serving {len(server.tape.prices)} symbols on {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Quote stream ingestion feeding the incremental valuator.
+
+A `QuoteSource` yields `Quote` ticks; `ReplayQuoteSource` replays a local
+JSON-lines file as a stand-in for a live feed::
+
+    {"t": 0.0, "symbol": "AAPL", "price": 151.20}
+    {"t": 0.4, "symbol": "MSFT", "price": 402.10}
+
+`t` is the offset in seconds from the start of the replay. `QuoteStream`
+consumes a source on a background thread, applies each tick to an
+`IncrementalValuator` and notifies subscribers (the SSE endpoint) of the
+portfolios whose totals changed.
+"""
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Mapping
+
+from sinvest.domain.entities import PositionTotals
+from sinvest.domain.services import collect_symbols, resolve_prices
+from sinvest.domain.streaming import IncrementalValuator, PriceTable, Quote
+
+
+class QuoteSource(ABC):
+    """Pluggable source of price ticks."""
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[Quote]:
+        raise NotImplementedError()
+
+
+class ReplayQuoteSource(QuoteSource):
+    """Replay ticks from a JSON-lines file, honouring their timing divided by `speed`.
+
+    `speed=0` replays as fast as possible; `loop=True` restarts at the end.
+    """
+
+    def __init__(self, path, speed: float = 1.0, loop: bool = False):
+        self.path = Path(path)
+        self.speed = speed
+        self.loop = loop
+
+    def _read(self) -> list[tuple[float, Quote]]:
+        ticks = []
+        for line in self.path.read_text().splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            at = datetime.fromisoformat(row['at']) if row.get('at') else None
+            ticks.append((float(row.get('t', 0.0)), Quote(row['symbol'], float(row['price']), at)))
+        return ticks
+
+    def __iter__(self) -> Iterator[Quote]:
+        ticks = self._read()
+        while True:
+            started = time.monotonic()
+            for offset, quote in ticks:
+                if self.speed:
+                    wait = offset / self.speed - (time.monotonic() - started)
+                    if wait > 0:
+                        time.sleep(wait)
+                yield quote
+            if not self.loop or not ticks:
+                return
+
+
+class QuoteStream:
+    """Consume a `QuoteSource` into `valuator` and fan out changes to subscribers.
+
+    Each subscriber gets a queue receiving the set of changed portfolio ids
+    per applied tick. Slow subscribers drop updates rather than block ingestion.
+    """
+
+    def __init__(self, source: QuoteSource, valuator: IncrementalValuator, max_queue: int = 256):
+        self.source = source
+        self.valuator = valuator
+        self.max_queue = max_queue
+        self.ticks = 0
+        self._subscribers: set[queue.Queue] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> 'QuoteStream':
+        self._thread = threading.Thread(target=self.run, name='quote-stream', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def run(self) -> None:
+        for quote in self.source:
+            if self._stop.is_set():
+                break
+            self.apply(quote)
+
+    def apply(self, quote: Quote) -> set[int]:
+        self.ticks += 1
+        changed = self.valuator.apply(quote)
+        if changed:
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for q in subscribers:
+                try:
+                    q.put_nowait(changed)
+                except queue.Full:
+                    pass
+        return changed
+
+    def subscribe(self) -> queue.Queue:
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(q)
+
+
+def build_quote_stream(portfolios, provider, source: QuoteSource,
+                       positions: Mapping[int, PositionTotals] | None = None) -> QuoteStream:
+    """Value `portfolios` at current prices from `provider` and wrap them in a stream over `source`.
+
+    Holdings are captured once: portfolios or investments added later are
+    picked up when the stream is rebuilt. Pass `positions` (ledger totals per
+    investment id) for portfolios read without their transactions.
+    """
+    portfolios = list(portfolios)
+    prices = PriceTable(resolve_prices(collect_symbols(portfolios), provider))
+    return QuoteStream(source, IncrementalValuator(portfolios, prices, positions=positions))
@@ -1,30 +1,67 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import List
-from sinvest.domain.entities import PortfolioEntity, InvestmentEntity, TransactionEntity
+from typing import ContextManager, Dict, Iterable, List
+from sinvest.domain.entities import PortfolioEntity, InvestmentEntity, TransactionEntity, TransactionPage, PositionTotals, PortfolioSnapshotEntity, SecurityEntity
+
+
+class DuplicateInvestmentError(ValueError):
+    """An investment with the same ISIN already exists in the portfolio."""
+
+
+class SecurityConflictError(ValueError):
+    """An ISIN is given with a symbol or currency other than its stored security's."""
 
 
 class PortfolioRepository(ABC):
+    @abstractmethod
+    def unit_of_work(self) -> ContextManager["PortfolioRepository"]:
+        """Context manager deferring the commits of all mutators to a single one at exit."""
+        raise NotImplementedError()
+
     @abstractmethod
     def list_portfolios(self) -> List[PortfolioEntity]:
         raise NotImplementedError()
 
+    @abstractmethod
+    def list_portfolios_page(self, after_id: int | None = None, limit: int = 500) -> List[PortfolioEntity]:
+        """Up to `limit` portfolios with id > `after_id`, in id order, for batch jobs.
+
+        Investments are loaded without their ledgers (`transactions` is None);
+        pair them with `get_position_totals`.
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def get_portfolio(self, portfolio_id: int) -> PortfolioEntity | None:
         raise NotImplementedError()
 
+    @abstractmethod
+    def portfolio_exists(self, portfolio_id: int) -> bool:
+        """Primary-key lookup; does not load investments or transactions."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def investment_exists(self, portfolio_id: int, isin: str) -> bool:
+        raise NotImplementedError()
+
     @abstractmethod
     def add_portfolio(self, name: str, description: str | None) -> PortfolioEntity:
         raise NotImplementedError()
 
     @abstractmethod
     def add_investment(self, investment: InvestmentEntity) -> InvestmentEntity:
+        """Raises DuplicateInvestmentError if the portfolio already holds the ISIN."""
         raise NotImplementedError()
 
     @abstractmethod
     def add_transaction(self, portfolio_id: int, isin: str, quantity: float, unit_price: float, transaction_date) -> TransactionEntity:
         raise NotImplementedError()
 
+    @abstractmethod
+    def add_transactions(self, batch: Iterable[TransactionEntity]) -> int:
+        """Validate and insert many transactions at once; return the number inserted."""
+        raise NotImplementedError()
+
     @abstractmethod
     def delete_investment(self, investment_id: int) -> None:
         raise NotImplementedError()
@@ -32,3 +69,49 @@ class PortfolioRepository(ABC):
     @abstractmethod
     def delete_portfolio(self, portfolio_id: int) -> None:
         raise NotImplementedError()
+
+    @abstractmethod
+    def list_securities(self, held_only: bool = True) -> List[SecurityEntity]:
+        """Return the distinct instruments, by default only those some investment holds."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_position_totals(self, investment_ids: Iterable[int]) -> Dict[int, PositionTotals]:
+        """Return exact quantity/cost totals per investment, computed by the database."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def positions_as_of(self, portfolio_id: int, as_of) -> Dict[int, PositionTotals]:
+        """Return quantity/cost totals per investment of a portfolio from transactions up to `as_of`.
+
+        A date includes the whole day; a datetime is inclusive.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def positions_as_of_dates(self, portfolio_id: int, dates: Iterable) -> Dict[object, Dict[int, PositionTotals]]:
+        """Batched `positions_as_of`: one {investment_id: PositionTotals} mapping per requested date."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def list_transactions(self, investment_id: int, after: tuple | None = None, limit: int = 50) -> TransactionPage:
+        """Return up to `limit` transactions ordered by (transaction_date, id), starting after the `after` key."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def add_snapshots(self, batch: Iterable[PortfolioSnapshotEntity]) -> int:
+        """Insert many portfolio snapshots at once; return the number inserted."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def delete_snapshots(self, portfolio_ids: Iterable[int], taken_at) -> int:
+        """Delete the snapshots of `portfolio_ids` taken at `taken_at`; return the number deleted."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def list_snapshots(self, portfolio_id: int, start=None, end=None) -> List[PortfolioSnapshotEntity]:
+        """Return a portfolio's snapshots with start <= taken_at <= end, oldest first.
+
+        A `date` as `end` includes every snapshot taken on that day.
+        """
+        raise NotImplementedError()
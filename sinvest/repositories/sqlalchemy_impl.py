@@ -1,30 +1,127 @@
 """SQLAlchemy-based repository implementation mapping persistence models to domain entities."""
-from typing import List
-from sinvest.repositories.abstract import PortfolioRepository
-from sinvest.domain.entities import PortfolioEntity, InvestmentEntity, TransactionEntity
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List
+from sqlalchemy import BigInteger, DateTime, delete, func, insert, literal, select, tuple_, type_coerce, union_all
+from sqlalchemy.orm import aliased
+from sqlalchemy.exc import IntegrityError
+from sinvest.repositories.abstract import DuplicateInvestmentError, PortfolioRepository
+from sinvest.domain.entities import PortfolioEntity, InvestmentEntity, TransactionEntity, TransactionPage, PositionTotals, PortfolioSnapshotEntity, SecurityEntity
 from sinvest.models.portfolio import Portfolio as PortfolioModel, Investment as InvestmentModel, Transaction as TransactionModel
+from sinvest.models.portfolio import PortfolioSnapshot as PortfolioSnapshotModel, Security as SecurityModel
+from sinvest.models.ledger import extend_running_totals, note_ledger_change
+from sinvest.models.securities import ensure_securities
 from sinvest.app import db
-from datetime import datetime
+from sinvest.db_routing import reads_replica
+from datetime import datetime, time, timedelta
+
+
+# Upper bound on a single page of transactions
+MAX_PAGE_SIZE = 500
+
+# Nesting depth of `unit_of_work` blocks in the current thread/task. A context
+# variable keeps the shared repository instance safe under threaded servers.
+_unit_of_work_depth: ContextVar[int] = ContextVar('sinvest_unit_of_work_depth', default=0)
+
+
+def _is_duplicate_isin(exc: IntegrityError) -> bool:
+    # SQLite names the columns, other backends the constraint
+    message = str(exc.orig)
+    return 'uix_portfolio_isin' in message or 'investment.portfolio_id, investment.isin' in message
 
 
 class SQLAlchemyPortfolioRepository(PortfolioRepository):
+    # Read-only methods are marked @reads_replica: with a replica configured
+    # they run there until the session's first write (see sinvest.db_routing).
+    # Existence checks stay on the primary because writes depend on them.
+
+    @contextmanager
+    def unit_of_work(self):
+        """Group several mutations into a single transaction and commit.
+
+        Inside the block mutators only flush (to obtain generated ids); the
+        outermost block commits once on success or rolls back on error.
+
+        Usage:
+            with repo.unit_of_work():
+                inv = repo.add_investment(entity)
+                repo.add_transactions(history)
+        """
+        depth = _unit_of_work_depth.get()
+        token = _unit_of_work_depth.set(depth + 1)
+        try:
+            yield self
+            if depth == 0:
+                db.session.commit()
+        except Exception:
+            if depth == 0:
+                db.session.rollback()
+            raise
+        finally:
+            _unit_of_work_depth.reset(token)
+
+    def _commit(self) -> None:
+        if _unit_of_work_depth.get():
+            db.session.flush()
+        else:
+            db.session.commit()
+
+    @reads_replica
     def list_portfolios(self) -> List[PortfolioEntity]:
         models = PortfolioModel.query.all()
         return [self._to_entity(m) for m in models]
 
+    @reads_replica
+    def list_portfolios_page(self, after_id: int | None = None, limit: int = 500) -> List[PortfolioEntity]:
+        # Two queries per page (portfolios by primary key, their investments
+        # via uix_portfolio_isin); ledgers are never loaded.
+        stmt = db.select(PortfolioModel).order_by(PortfolioModel.id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(PortfolioModel.id > after_id)
+        portfolios = {
+            m.id: PortfolioEntity(id=m.id, name=m.name, description=m.description, created_at=m.created_at, investments=[])
+            for m in db.session.execute(stmt).scalars()
+        }
+        if not portfolios:
+            return []
+        rows = db.session.execute(
+            db.select(InvestmentModel.id, InvestmentModel.portfolio_id, InvestmentModel.symbol, InvestmentModel.isin,
+                      InvestmentModel.currency, InvestmentModel.type, InvestmentModel.quantity,
+                      InvestmentModel.purchase_price, InvestmentModel.purchase_date, InvestmentModel.security_id)
+            .where(InvestmentModel.portfolio_id.in_(list(portfolios)))
+        )
+        for row in rows:
+            portfolios[row.portfolio_id].investments.append(InvestmentEntity(*row[:-1], security_id=row.security_id))
+        return list(portfolios.values())
+
+    @reads_replica
     def get_portfolio(self, portfolio_id: int) -> PortfolioEntity | None:
         m = db.session.get(PortfolioModel, portfolio_id)
         return self._to_entity(m) if m else None
 
+    def portfolio_exists(self, portfolio_id: int) -> bool:
+        stmt = db.select(PortfolioModel.id).where(PortfolioModel.id == portfolio_id)
+        return db.session.execute(stmt).first() is not None
+
+    def investment_exists(self, portfolio_id: int, isin: str) -> bool:
+        # Answered from the uix_portfolio_isin index alone
+        stmt = db.select(InvestmentModel.id).where(InvestmentModel.portfolio_id == portfolio_id,
+                                                   InvestmentModel.isin == isin)
+        return db.session.execute(stmt).first() is not None
+
     def add_portfolio(self, name: str, description: str | None) -> PortfolioEntity:
         m = PortfolioModel(name=name, description=description)
         db.session.add(m)
-        db.session.commit()
+        self._commit()
         return self._to_entity(m)
 
     def add_investment(self, investment: InvestmentEntity) -> InvestmentEntity:
+        security_ids = ensure_securities(db.session.connection(), [
+            {'isin': investment.isin, 'symbol': investment.symbol, 'currency': investment.currency, 'type': investment.type}
+        ])
         im = InvestmentModel(
             portfolio_id=investment.portfolio_id,
+            security_id=security_ids[investment.isin],
             symbol=investment.symbol,
             isin=investment.isin,
             currency=investment.currency,
@@ -34,20 +131,69 @@ class SQLAlchemyPortfolioRepository(PortfolioRepository):
             purchase_date=investment.purchase_date,
         )
         db.session.add(im)
-        db.session.commit()
-        # If the InvestmentEntity includes an initial transaction list, persist them
+        # Flush for the generated id; initial transactions go in as one batch
+        # and the whole investment is committed once. uix_portfolio_isin is
+        # the authority on duplicates, so concurrent adds cannot both succeed.
+        try:
+            db.session.flush()
+        except IntegrityError as exc:
+            if _unit_of_work_depth.get() == 0:
+                db.session.rollback()
+            if _is_duplicate_isin(exc):
+                raise DuplicateInvestmentError(
+                    f'Portfolio {investment.portfolio_id} already holds ISIN {investment.isin}') from exc
+            raise
         if getattr(investment, 'transactions', None):
-            for tx in investment.transactions:
-                tm = TransactionModel(
-                    investment_id=im.id,
-                    quantity=tx.quantity,
-                    unit_price=tx.unit_price,
-                    transaction_date=tx.transaction_date,
-                )
-                db.session.add(tm)
-            db.session.commit()
+            self._insert_transactions([
+                {'investment_id': im.id, 'quantity': tx.quantity, 'unit_price': tx.unit_price, 'transaction_date': tx.transaction_date}
+                for tx in investment.transactions
+            ])
+            db.session.expire(im, ['transactions'])
+        self._commit()
         return self._to_inv_entity(im)
 
+    def add_transactions(self, batch: Iterable[TransactionEntity]) -> int:
+        """Validate and insert many transactions in a single executemany round-trip.
+
+        Raises ValueError (and inserts nothing) if any transaction has a zero
+        quantity, a negative price, a future date or an unknown investment.
+        """
+        batch = list(batch)
+        if not batch:
+            return 0
+        today = datetime.now().date()
+        for tx in batch:
+            if not tx.quantity:
+                raise ValueError("Transaction quantity cannot be zero")
+            if tx.unit_price is None or tx.unit_price < 0:
+                raise ValueError("Transaction unit price must be non-negative")
+            if tx.transaction_date.date() > today:
+                raise ValueError("Transaction date cannot be in the future")
+        investment_ids = {tx.investment_id for tx in batch}
+        found = set(db.session.execute(
+            db.select(InvestmentModel.id).where(InvestmentModel.id.in_(investment_ids))
+        ).scalars())
+        missing = investment_ids - found
+        if missing:
+            raise ValueError(f"Unknown investment id(s): {sorted(missing)}")
+
+        self._insert_transactions([
+            {'investment_id': tx.investment_id, 'quantity': tx.quantity, 'unit_price': tx.unit_price, 'transaction_date': tx.transaction_date}
+            for tx in batch
+        ])
+        self._commit()
+        return len(batch)
+
+    def _insert_transactions(self, rows: List[dict]) -> None:
+        # ORM bulk INSERT: one executemany, no per-row objects or id fetches.
+        # Core inserts bypass the flush listeners, so extend the running totals
+        # here, from the earliest inserted date of each holding.
+        db.session.execute(insert(TransactionModel), rows)
+        starts = {}
+        for row in rows:
+            note_ledger_change(starts, row['investment_id'], row['transaction_date'])
+        extend_running_totals(db.session.connection(), starts)
+
     def add_transaction(self, portfolio_id: int, isin: str, quantity: float, unit_price: float, transaction_date) -> TransactionEntity:
         # Find the investment by portfolio_id + isin (should be unique)
         im = db.session.execute(
@@ -62,20 +208,166 @@ class SQLAlchemyPortfolioRepository(PortfolioRepository):
             transaction_date=transaction_date,
         )
         db.session.add(tm)
-        db.session.commit()
-        return TransactionEntity(id=tm.id, investment_id=tm.investment_id, quantity=tm.quantity, unit_price=tm.unit_price, transaction_date=tm.transaction_date, created_at=tm.created_at)
+        self._commit()
+        return self._to_tx_entity(tm)
 
     def delete_investment(self, investment_id: int) -> None:
-        im = db.session.get(InvestmentModel, investment_id)
-        if im:
-            db.session.delete(im)
-            db.session.commit()
+        # One DELETE: transactions and archived rows follow via ON DELETE CASCADE
+        # instead of being loaded and deleted one by one.
+        db.session.execute(delete(InvestmentModel).where(InvestmentModel.id == investment_id))
+        self._commit()
 
     def delete_portfolio(self, portfolio_id: int) -> None:
-        p = db.session.get(PortfolioModel, portfolio_id)
-        if p:
-            db.session.delete(p)
-            db.session.commit()
+        # Investments, their ledgers and snapshots are removed by the database
+        db.session.execute(delete(PortfolioModel).where(PortfolioModel.id == portfolio_id))
+        self._commit()
+
+    @reads_replica
+    def get_position_totals(self, investment_ids: Iterable[int]) -> Dict[int, PositionTotals]:
+        # Sum the raw fixed-point integers so totals are exact (no float drift);
+        # answered from the covering ix_transaction_investment_date index.
+        qty = type_coerce(TransactionModel.quantity, BigInteger)
+        price = type_coerce(TransactionModel.unit_price, BigInteger)
+        ids = list(investment_ids)
+        rows = db.session.execute(
+            db.select(TransactionModel.investment_id, func.sum(qty), func.sum(qty * price), func.count())
+            .where(TransactionModel.investment_id.in_(ids))
+            .group_by(TransactionModel.investment_id)
+        ).all()
+        totals = {inv_id: PositionTotals() for inv_id in ids}
+        for inv_id, qty_units, cost_units, count in rows:
+            totals[inv_id] = PositionTotals(int(qty_units), int(cost_units), count)
+        return totals
+
+    @staticmethod
+    def _as_of_cutoff(as_of) -> datetime:
+        """Exclusive upper bound on transaction_date: a date covers its whole day, a datetime is inclusive."""
+        if isinstance(as_of, datetime):
+            return as_of + timedelta(microseconds=1)
+        return datetime.combine(as_of + timedelta(days=1), time.min)
+
+    @staticmethod
+    def _last_row_id(investment_id, cutoff):
+        # Index seek on ix_transaction_investment_date, read backwards: the
+        # latest row before the cutoff carries the running totals. Aliased so
+        # it does not correlate with the outer join on the same table.
+        T = aliased(TransactionModel)
+        return (
+            select(T.id)
+            .where(T.investment_id == investment_id, T.transaction_date < cutoff)
+            .order_by(T.transaction_date.desc(), T.id.desc())
+            .limit(1)
+            .correlate_except(T)
+            .scalar_subquery()
+        )
+
+    @reads_replica
+    def positions_as_of(self, portfolio_id: int, as_of) -> Dict[int, PositionTotals]:
+        last_row = self._last_row_id(InvestmentModel.id, self._as_of_cutoff(as_of))
+        rows = db.session.execute(
+            select(InvestmentModel.id, TransactionModel.running_quantity_units,
+                   TransactionModel.running_cost_units, TransactionModel.running_count)
+            .select_from(InvestmentModel)
+            .outerjoin(TransactionModel, TransactionModel.id == last_row)
+            .where(InvestmentModel.portfolio_id == portfolio_id)
+        ).all()
+        return {inv_id: self._running_to_totals(qty, cost, count) for inv_id, qty, cost, count in rows}
+
+    @reads_replica
+    def positions_as_of_dates(self, portfolio_id: int, dates: Iterable) -> Dict[object, Dict[int, PositionTotals]]:
+        # One round-trip: the requested cutoffs are a UNION ALL CTE (SQLite
+        # cannot name VALUES columns) joined to the portfolio's investments,
+        # each pair resolved by one index seek.
+        dates = list(dict.fromkeys(dates))
+        if not dates:
+            return {}
+        requested = union_all(*(
+            select(literal(n).label('n'), literal(self._as_of_cutoff(d), DateTime).label('cutoff'))
+            for n, d in enumerate(dates)
+        )).cte('requested')
+        last_row = self._last_row_id(InvestmentModel.id, requested.c.cutoff)
+        rows = db.session.execute(
+            select(requested.c.n, InvestmentModel.id, TransactionModel.running_quantity_units,
+                   TransactionModel.running_cost_units, TransactionModel.running_count)
+            .select_from(requested)
+            .join(InvestmentModel, InvestmentModel.portfolio_id == portfolio_id)
+            .outerjoin(TransactionModel, TransactionModel.id == last_row)
+        ).all()
+        result = {d: {} for d in dates}
+        for n, inv_id, qty, cost, count in rows:
+            result[dates[n]][inv_id] = self._running_to_totals(qty, cost, count)
+        return result
+
+    @staticmethod
+    def _running_to_totals(qty, cost, count) -> PositionTotals:
+        if not count:
+            return PositionTotals()
+        return PositionTotals(int(qty), int(cost), count)
+
+    @reads_replica
+    def list_securities(self, held_only: bool = True) -> List[SecurityEntity]:
+        # Scan of the small security table; `held_only` adds a semi-join on
+        # the indexed investment.security_id rather than a DISTINCT over investments.
+        stmt = db.select(SecurityModel).order_by(SecurityModel.symbol, SecurityModel.isin)
+        if held_only:
+            stmt = stmt.where(db.select(InvestmentModel.id).where(InvestmentModel.security_id == SecurityModel.id).exists())
+        return [
+            SecurityEntity(id=m.id, isin=m.isin, symbol=m.symbol, currency=m.currency, type=m.type)
+            for m in db.session.execute(stmt).scalars()
+        ]
+
+    @reads_replica
+    def list_transactions(self, investment_id: int, after: tuple | None = None, limit: int = 50) -> TransactionPage:
+        # Keyset pagination: seek past the last (date, id) seen instead of
+        # OFFSET, so every page costs one index range scan of `limit` rows.
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        stmt = db.select(TransactionModel).where(TransactionModel.investment_id == investment_id)
+        if after is not None:
+            stmt = stmt.where(tuple_(TransactionModel.transaction_date, TransactionModel.id) > tuple_(*after))
+        stmt = stmt.order_by(TransactionModel.transaction_date, TransactionModel.id).limit(limit + 1)
+        rows = db.session.execute(stmt).scalars().all()
+        items = [self._to_tx_entity(t) for t in rows[:limit]]
+        next_after = (items[-1].transaction_date, items[-1].id) if len(rows) > limit else None
+        return TransactionPage(items=items, next_after=next_after)
+
+    def add_snapshots(self, batch: Iterable[PortfolioSnapshotEntity]) -> int:
+        rows = [
+            {'portfolio_id': snap.portfolio_id, 'taken_at': snap.taken_at, 'currency': snap.currency,
+             'total_value': snap.total_value, 'gain_loss': snap.gain_loss}
+            for snap in batch
+        ]
+        if rows:
+            db.session.execute(insert(PortfolioSnapshotModel), rows)
+            self._commit()
+        return len(rows)
+
+    def delete_snapshots(self, portfolio_ids: Iterable[int], taken_at) -> int:
+        # Seeks on the (portfolio_id, taken_at, currency) unique index
+        ids = list(portfolio_ids)
+        if not ids:
+            return 0
+        result = db.session.execute(
+            delete(PortfolioSnapshotModel)
+            .where(PortfolioSnapshotModel.portfolio_id.in_(ids), PortfolioSnapshotModel.taken_at == taken_at)
+        )
+        self._commit()
+        return result.rowcount
+
+    @reads_replica
+    def list_snapshots(self, portfolio_id: int, start=None, end=None) -> List[PortfolioSnapshotEntity]:
+        # Range scan on the (portfolio_id, taken_at, currency) unique index
+        stmt = db.select(PortfolioSnapshotModel).where(PortfolioSnapshotModel.portfolio_id == portfolio_id)
+        if start is not None:
+            stmt = stmt.where(PortfolioSnapshotModel.taken_at >= start)
+        if end is not None:
+            # A date covers its whole day, a datetime is inclusive
+            stmt = stmt.where(PortfolioSnapshotModel.taken_at < self._as_of_cutoff(end))
+        stmt = stmt.order_by(PortfolioSnapshotModel.taken_at, PortfolioSnapshotModel.currency)
+        return [
+            PortfolioSnapshotEntity(id=m.id, portfolio_id=m.portfolio_id, taken_at=m.taken_at, currency=m.currency,
+                                    total_value=m.total_value, gain_loss=m.gain_loss)
+            for m in db.session.execute(stmt).scalars()
+        ]
 
     def _to_entity(self, m: PortfolioModel) -> PortfolioEntity:
         invs = [self._to_inv_entity(i) for i in (m.investments or [])]
@@ -83,9 +375,7 @@ class SQLAlchemyPortfolioRepository(PortfolioRepository):
 
     def _to_inv_entity(self, im: InvestmentModel) -> InvestmentEntity:
         # Map transactions if present
-        txs = []
-        for t in (getattr(im, 'transactions', []) or []):
-            txs.append(TransactionEntity(id=t.id, investment_id=t.investment_id, quantity=t.quantity, unit_price=t.unit_price, transaction_date=t.transaction_date, created_at=t.created_at))
+        txs = [self._to_tx_entity(t) for t in (getattr(im, 'transactions', []) or [])]
 
         return InvestmentEntity(
             id=im.id,
@@ -98,4 +388,8 @@ class SQLAlchemyPortfolioRepository(PortfolioRepository):
             purchase_price=im.purchase_price,
             purchase_date=im.purchase_date,
             transactions=txs,
+            security_id=im.security_id,
         )
+
+    def _to_tx_entity(self, t: TransactionModel) -> TransactionEntity:
+        return TransactionEntity(id=t.id, investment_id=t.investment_id, quantity=t.quantity, unit_price=t.unit_price, transaction_date=t.transaction_date, created_at=t.created_at)
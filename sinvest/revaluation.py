@@ -0,0 +1,215 @@
+"""Multi-process revaluation of every portfolio.
+
+The parent resolves each distinct symbol once and writes the prices to a
+``.npy`` file next to a JSON symbol list. Portfolios are sharded by id range
+across a process pool; every worker memory-maps the price file (so the table is
+shared through the page cache instead of being pickled per task), opens its own
+engine and session, values its shard in batches with the domain services and
+writes the snapshots back with one executemany INSERT per batch.
+
+    stats = run_revaluation(database_url, prices, taken_at, workers=8)
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import BigInteger, create_engine, func, insert, select, type_coerce
+from sqlalchemy.orm import Session
+
+from sinvest.db_config import apply_sqlite_pragmas, engine_options_from_env, sqlite_pragmas_from_env
+from sinvest.domain.entities import InvestmentEntity, PortfolioEntity, PositionTotals
+from sinvest.domain.services import snapshot_portfolios
+from sinvest.models.portfolio import Investment, Portfolio, PortfolioSnapshot, Transaction
+
+PRICES_FILE = 'prices.npy'
+SYMBOLS_FILE = 'symbols.json'
+
+
+class PriceSnapshot(Mapping):
+    """Read-only symbol -> price table backed by a float64 array.
+
+    `save` writes it to a directory; `load` memory-maps it back, so any number
+    of worker processes share one copy of the prices.
+    """
+
+    def __init__(self, symbols, prices):
+        self.symbols = list(symbols)
+        self.prices = prices
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_mapping(cls, prices: Mapping[str, float]) -> 'PriceSnapshot':
+        symbols = sorted(prices)
+        return cls(symbols, np.array([prices[s] for s in symbols], dtype=np.float64))
+
+    def save(self, directory) -> Path:
+        directory = Path(directory)
+        np.save(directory / PRICES_FILE, np.asarray(self.prices, dtype=np.float64))
+        (directory / SYMBOLS_FILE).write_text(json.dumps(self.symbols))
+        return directory
+
+    @classmethod
+    def load(cls, directory) -> 'PriceSnapshot':
+        directory = Path(directory)
+        symbols = json.loads((directory / SYMBOLS_FILE).read_text())
+        return cls(symbols, np.load(directory / PRICES_FILE, mmap_mode='r'))
+
+    def __getitem__(self, symbol: str) -> float:
+        return float(self.prices[self._index[symbol]])
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+
+@dataclass(frozen=True)
+class ShardTask:
+    """Work order for one worker: value portfolios with start <= id < stop."""
+    database_url: str
+    price_dir: str
+    start: int
+    stop: int
+    taken_at: datetime
+    batch_size: int
+
+
+@dataclass
+class RevaluationStats:
+    portfolios: int
+    snapshots: int
+    shards: int
+    workers: int
+    seconds: float
+
+    @property
+    def portfolios_per_second(self) -> float:
+        return self.portfolios / max(self.seconds, 1e-9)
+
+
+def shard_ranges(first_id: int, last_id: int, shards: int) -> list[tuple[int, int]]:
+    """Split the inclusive id range [first_id, last_id] into at most `shards` half-open ranges."""
+    if last_id < first_id:
+        return []
+    span = last_id - first_id + 1
+    shards = max(1, min(shards, span))
+    step = -(-span // shards)
+    return [(lo, min(lo + step, last_id + 1)) for lo in range(first_id, last_id + 1, step)]
+
+
+def _create_engine(database_url: str):
+    engine = create_engine(database_url, **engine_options_from_env(database_url))
+    apply_sqlite_pragmas(engine, sqlite_pragmas_from_env())
+    return engine
+
+
+def _load_batch(session: Session, start: int, stop: int) -> tuple[list[PortfolioEntity], dict[int, PositionTotals]]:
+    """Return the portfolios with start <= id < stop and their ledger totals."""
+    portfolios = {
+        pid: PortfolioEntity(id=pid, name=name, description=None, created_at=None, investments=[])
+        for pid, name in session.execute(
+            select(Portfolio.id, Portfolio.name).where(Portfolio.id >= start, Portfolio.id < stop).order_by(Portfolio.id)
+        )
+    }
+    in_range = Investment.portfolio_id.between(start, stop - 1)
+    for row in session.execute(
+        select(Investment.id, Investment.portfolio_id, Investment.symbol, Investment.isin, Investment.currency,
+               Investment.type, Investment.quantity, Investment.purchase_price, Investment.purchase_date)
+        .where(in_range)
+    ):
+        portfolios[row.portfolio_id].investments.append(InvestmentEntity(*row))
+
+    # Exact fixed-point sums per holding, as in SQLAlchemyPortfolioRepository.get_position_totals
+    qty = type_coerce(Transaction.quantity, BigInteger)
+    price = type_coerce(Transaction.unit_price, BigInteger)
+    positions = {
+        inv_id: PositionTotals(int(qty_units), int(cost_units), count)
+        for inv_id, qty_units, cost_units, count in session.execute(
+            select(Transaction.investment_id, func.sum(qty), func.sum(qty * price), func.count())
+            .join(Investment, Investment.id == Transaction.investment_id)
+            .where(in_range)
+            .group_by(Transaction.investment_id)
+        )
+    }
+    return list(portfolios.values()), positions
+
+
+def revalue_shard(task: ShardTask) -> tuple[int, int]:
+    """Value and snapshot one shard; return (portfolios, snapshot rows)."""
+    prices = PriceSnapshot.load(task.price_dir)
+    engine = _create_engine(task.database_url)
+    valued = written = 0
+    try:
+        with Session(engine) as session:
+            for lo in range(task.start, task.stop, task.batch_size):
+                portfolios, positions = _load_batch(session, lo, min(lo + task.batch_size, task.stop))
+                rows = [
+                    {'portfolio_id': s.portfolio_id, 'taken_at': s.taken_at, 'currency': s.currency,
+                     'total_value': s.total_value, 'gain_loss': s.gain_loss}
+                    for s in snapshot_portfolios(portfolios, task.taken_at, prices=prices, positions=positions)
+                ]
+                if rows:
+                    session.execute(insert(PortfolioSnapshot), rows)
+                    session.commit()
+                valued += len(portfolios)
+                written += len(rows)
+    finally:
+        engine.dispose()
+    return valued, written
+
+
+def distinct_symbols(session: Session) -> list[str]:
+    """Symbols held by at least one investment, in order (a walk of ix_investment_symbol).
+
+    Valuation prices each holding by its own symbol, and one ISIN may be
+    held under several listings, so these are the investments' symbols
+    rather than one per security.
+    """
+    return list(session.execute(select(Investment.symbol).distinct().order_by(Investment.symbol)).scalars())
+
+
+def run_revaluation(database_url: str, prices: Mapping[str, float], taken_at: datetime, workers: int | None = None,
+                    shards: int | None = None, batch_size: int = 1000) -> RevaluationStats:
+    """Snapshot every portfolio at `taken_at` using a pool of `workers` processes.
+
+    `prices` maps each held symbol to its current price (see
+    ``sinvest.domain.services.resolve_prices``). Shards default to four per
+    worker so a slow shard does not leave the other cores idle.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    engine = _create_engine(database_url)
+    try:
+        with Session(engine) as session:
+            first_id, last_id = session.execute(select(func.min(Portfolio.id), func.max(Portfolio.id))).one()
+    finally:
+        engine.dispose()
+    if first_id is None:
+        return RevaluationStats(0, 0, 0, workers, time.perf_counter() - started)
+
+    ranges = shard_ranges(first_id, last_id, shards or workers * 4)
+    with tempfile.TemporaryDirectory(prefix='sinvest-prices-') as price_dir:
+        PriceSnapshot.from_mapping(prices).save(price_dir)
+        tasks = [ShardTask(database_url, price_dir, lo, hi, taken_at, batch_size) for lo, hi in ranges]
+        if workers == 1:
+            results = [revalue_shard(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(revalue_shard, tasks))
+    return RevaluationStats(
+        portfolios=sum(r[0] for r in results),
+        snapshots=sum(r[1] for r in results),
+        shards=len(tasks),
+        workers=workers,
+        seconds=time.perf_counter() - started,
+    )
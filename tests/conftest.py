@@ -4,10 +4,12 @@ Provides pytest fixtures to run tests against an in-memory SQLite database
 so tests are isolated and side-effect free.
 """
 import pytest
+from sqlalchemy import event
 
 from sinvest.app import create_app
 from sinvest.repositories.sqlalchemy_impl import db as _db
 from sinvest.models.portfolio import Portfolio, Investment
+from sinvest.synthetic import SyntheticSpec, seed_synthetic
 from datetime import datetime
 
 
@@ -32,6 +34,34 @@ def db(app):
         _db.drop_all()
 
 
+@pytest.fixture()
+def statements(db):
+    """Record the text of every SQL statement sent to the database while the test runs."""
+    seen = []
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', _on_execute)
+    yield seen
+    event.remove(db.engine, 'before_cursor_execute', _on_execute)
+
+
+@pytest.fixture()
+def query_plan(db):
+    """Return a function giving SQLite's EXPLAIN QUERY PLAN of a statement as text.
+
+    Usage:
+        assert 'USING INDEX' in query_plan(select(Investment).where(...))
+    """
+    def _plan(stmt) -> str:
+        sql = str(stmt.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')).all()
+        return '\n'.join(row[-1] for row in rows)
+
+    return _plan
+
+
 @pytest.fixture()
 def client(app):
     return app.test_client()
@@ -82,4 +112,19 @@ def investment_factory(db, portfolio_factory):
         db.session.commit()
         return inv
 
-    return _create
\ No newline at end of file
+    return _create
+
+
+@pytest.fixture()
+def synthetic_data(db):
+    """Return a factory that bulk-loads a deterministic synthetic dataset.
+
+    Usage:
+        stats = synthetic_data(portfolios=3, investments=5, transactions=20, seed=1)
+        stats.portfolio_ids  # ids of the created portfolios
+    """
+    def _seed(portfolios=2, investments=3, transactions=5, seed=0, **kwargs):
+        spec = SyntheticSpec(portfolios=portfolios, investments=investments, transactions=transactions, seed=seed, **kwargs)
+        return seed_synthetic(db.session, spec)
+
+    return _seed
@@ -0,0 +1,75 @@
+"""Tests for the add-investment write path: indexed existence checks and duplicate handling."""
+from datetime import datetime
+
+import pytest
+
+from sinvest.domain.entities import InvestmentEntity
+from sinvest.models.portfolio import Investment
+from sinvest.repositories.abstract import DuplicateInvestmentError
+from sinvest.repositories.sqlalchemy_impl import SQLAlchemyPortfolioRepository
+
+FORM = {'symbol': 'AAPL', 'isin': 'US0378331005', 'currency': 'USD', 'type': 'equity',
+        'quantity': 10.0, 'purchase_price': 150.0, 'purchase_date': '2025-01-01'}
+
+
+def _entity(portfolio_id, isin='US0378331005'):
+    return InvestmentEntity(None, portfolio_id, 'AAPL', isin, 'USD', 'equity', 1.0, 100.0, datetime(2024, 1, 2))
+
+
+def test_existence_checks(db, investment_factory, query_plan):
+    inv = investment_factory(isin='US0378331005')
+    repo = SQLAlchemyPortfolioRepository()
+    assert repo.portfolio_exists(inv.portfolio_id)
+    assert not repo.portfolio_exists(inv.portfolio_id + 1)
+    assert repo.investment_exists(inv.portfolio_id, 'US0378331005')
+    assert not repo.investment_exists(inv.portfolio_id, 'US5949181045')
+
+    plan = query_plan(db.select(Investment.id).where(Investment.portfolio_id == 1, Investment.isin == 'X'))
+    assert 'USING COVERING INDEX sqlite_autoindex_investment_1 (portfolio_id=? AND isin=?)' in plan
+
+
+def test_duplicate_isin_raises_and_leaves_session_usable(db, portfolio_factory):
+    p = portfolio_factory()
+    repo = SQLAlchemyPortfolioRepository()
+    repo.add_investment(_entity(p.id))
+
+    with pytest.raises(DuplicateInvestmentError):
+        repo.add_investment(_entity(p.id))
+    assert repo.add_investment(_entity(p.id, isin='US5949181045')).id is not None
+    assert Investment.query.filter_by(portfolio_id=p.id).count() == 2
+
+    with pytest.raises(DuplicateInvestmentError):
+        with repo.unit_of_work():
+            repo.add_investment(_entity(p.id, isin='IE00B4L5Y983'))
+            repo.add_investment(_entity(p.id))
+    assert Investment.query.filter_by(portfolio_id=p.id).count() == 2
+
+
+def test_statement_count_does_not_grow_with_ledger(client, db, synthetic_data, statements):
+    small, large = synthetic_data(portfolios=1, investments=1, transactions=1, seed=1).portfolio_ids[0], \
+        synthetic_data(portfolios=1, investments=30, transactions=100, seed=2).portfolio_ids[0]
+
+    counts = []
+    for pid, isin in ((small, 'US0378331005'), (large, 'US5949181045')):
+        statements.clear()
+        assert client.post(f'/portfolio/{pid}/add_investment', data={**FORM, 'isin': isin}).status_code == 302
+        counts.append(len(statements))
+    assert counts[0] == counts[1] <= 10
+
+    statements.clear()
+    assert client.post(f'/portfolio/{large}/add_investment', data={**FORM, 'isin': 'US5949181045'}).status_code == 302
+    assert len(statements) == 2  # portfolio and ISIN lookups only
+    assert client.post('/portfolio/999999/add_investment', data=FORM).status_code == 404
+
+
+def test_concurrent_duplicate_is_reported_not_500(client, db, portfolio_factory, monkeypatch):
+    import sinvest.app as app_module
+
+    p = portfolio_factory()
+    client.post(f'/portfolio/{p.id}/add_investment', data=FORM)
+    # Simulate the race: the pre-check misses the row another request just committed
+    monkeypatch.setattr(app_module.repo.inner, 'investment_exists', lambda portfolio_id, isin: False)
+    resp = client.post(f'/portfolio/{p.id}/add_investment', data=FORM, follow_redirects=True)
+    assert resp.status_code == 200
+    assert b'already exists' in resp.data
+    assert Investment.query.filter_by(portfolio_id=p.id).count() == 1
@@ -0,0 +1,31 @@
+"""Smoke tests for the benchmark runner (tiny dataset, single repetition)."""
+import json
+
+from benchmarks.run import BenchmarkConfig, compare_results, run_benchmarks
+
+
+def test_run_benchmarks_emits_json_report(app, db):
+    config = BenchmarkConfig(portfolios=2, holdings=3, transactions=4, repeat=1)
+    report = run_benchmarks(app, db, config)
+
+    assert set(report['results']) == {
+        'repository.get_portfolio',
+        'domain.aggregate_portfolio',
+        'http.index',
+        'http.view_portfolio',
+    }
+    assert report['meta']['config']['holdings'] == 3
+    assert all(stats['median'] >= 0 for stats in report['results'].values())
+    # Results must be JSON serialisable for baseline comparison
+    json.dumps(report)
+
+
+def test_compare_results_flags_regressions():
+    baseline = {'results': {'a': {'median': 1.0}, 'b': {'median': 1.0}}}
+    current = {'results': {'a': {'median': 1.1}, 'b': {'median': 1.5}, 'c': {'median': 2.0}}}
+
+    comparison = compare_results(current, baseline, threshold=0.2)
+
+    assert comparison['a']['regressed'] is False
+    assert comparison['b']['regressed'] is True
+    assert 'c' not in comparison
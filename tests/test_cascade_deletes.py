@@ -0,0 +1,65 @@
+"""Tests for set-based deletes relying on ON DELETE CASCADE foreign keys."""
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from sinvest.domain.entities import PortfolioSnapshotEntity
+from sinvest.ledger_compaction import compact_ledger
+from sinvest.models.portfolio import Investment, Portfolio, PortfolioSnapshot, Transaction, TransactionArchive
+from sinvest.repositories.sqlalchemy_impl import SQLAlchemyPortfolioRepository
+
+
+def _count(db, model, **filters):
+    return db.session.execute(select(func.count()).select_from(model).filter_by(**filters)).scalar()
+
+
+def test_foreign_keys_are_enforced(db):
+    assert db.session.execute(db.text('PRAGMA foreign_keys')).scalar() == 1
+
+
+def test_delete_portfolio_is_one_statement(db, synthetic_data, statements):
+    stats = synthetic_data(portfolios=2, investments=5, transactions=40, seed=4)
+    doomed, kept = stats.portfolio_ids
+    repo = SQLAlchemyPortfolioRepository()
+    repo.add_snapshots([PortfolioSnapshotEntity(None, doomed, datetime(2024, 1, 1), 'USD', 1.0, 0.0)])
+    compact_ledger(db.session, datetime(2018, 1, 1), investment_ids=[
+        i for (i,) in db.session.execute(select(Investment.id).filter_by(portfolio_id=doomed))])
+    db.session.commit()
+    kept_rows = _count(db, Transaction)
+
+    statements.clear()
+    repo.delete_portfolio(doomed)
+    assert len([s for s in statements if s.lstrip().upper().startswith('DELETE')]) == 1
+    assert len(statements) <= 2
+
+    assert _count(db, Portfolio, id=doomed) == 0
+    assert _count(db, Investment, portfolio_id=doomed) == 0
+    assert _count(db, PortfolioSnapshot) == 0
+    assert _count(db, TransactionArchive) == 0
+    orphans = select(func.count()).select_from(Transaction).where(
+        ~select(Investment.id).where(Investment.id == Transaction.investment_id).exists())
+    assert db.session.execute(orphans).scalar() == 0
+    assert _count(db, Investment, portfolio_id=kept) == 5
+    assert 0 < _count(db, Transaction) < kept_rows
+
+
+def test_delete_investment_cascades_to_its_ledger(db, synthetic_data, statements):
+    synthetic_data(portfolios=1, investments=2, transactions=30, seed=6)
+    doomed, kept = db.session.execute(select(Investment.id).order_by(Investment.id)).scalars().all()
+
+    statements.clear()
+    SQLAlchemyPortfolioRepository().delete_investment(doomed)
+    assert len(statements) <= 2
+    assert _count(db, Transaction, investment_id=doomed) == 0
+    assert _count(db, Transaction, investment_id=kept) == 30
+
+
+def test_orm_delete_does_not_load_children(db, synthetic_data, statements):
+    pid = synthetic_data(portfolios=1, investments=3, transactions=20, seed=2).portfolio_ids[0]
+    portfolio = db.session.get(Portfolio, pid)
+
+    statements.clear()
+    db.session.delete(portfolio)
+    db.session.commit()
+    assert not any('FROM investment' in s or 'FROM "transaction"' in s for s in statements)
+    assert _count(db, Transaction) == 0
@@ -0,0 +1,92 @@
+"""Tests for environment-driven engine configuration and SQLite tuning."""
+import threading
+from datetime import datetime
+
+from sqlalchemy import create_engine, func, insert, select
+
+from sinvest.app import db as _db
+from sinvest.db_config import (
+    apply_sqlite_pragmas,
+    database_config_from_env,
+    engine_options_from_env,
+    sqlite_pragmas_from_env,
+)
+from sinvest.models.portfolio import Investment, Portfolio, Transaction
+
+
+def test_defaults_use_tuned_sqlite():
+    config = database_config_from_env({})
+    assert config['SQLALCHEMY_DATABASE_URI'] == 'sqlite:///portfolio.db'
+    assert config['SQLALCHEMY_ENGINE_OPTIONS'] == {}
+    assert config['SQLITE_PRAGMAS']['journal_mode'] == 'WAL'
+    assert config['SQLITE_PRAGMAS']['synchronous'] == 'NORMAL'
+
+
+def test_server_database_gets_pool_options():
+    options = engine_options_from_env('postgresql://u:p@db/sinvest', {
+        'SINVEST_DB_POOL_SIZE': '20',
+        'SINVEST_DB_MAX_OVERFLOW': '5',
+        'SINVEST_DB_POOL_PRE_PING': 'false',
+        'SINVEST_DB_POOL_RECYCLE': '600',
+    })
+    assert options == {'pool_size': 20, 'max_overflow': 5, 'pool_timeout': 30,
+                       'pool_recycle': 600, 'pool_pre_ping': False}
+
+
+def _tuned_engine(path):
+    engine = create_engine(f'sqlite:///{path}')
+    apply_sqlite_pragmas(engine, sqlite_pragmas_from_env({'SINVEST_SQLITE_BUSY_TIMEOUT': '200'}))
+    return engine
+
+
+def test_pragmas_applied_on_connect(tmp_path):
+    engine = _tuned_engine(tmp_path / 'tuned.db')
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+        assert conn.exec_driver_sql('PRAGMA synchronous').scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql('PRAGMA busy_timeout').scalar() == 200
+        assert conn.exec_driver_sql('PRAGMA foreign_keys').scalar() == 1
+    engine.dispose()
+
+
+def test_readers_proceed_during_bulk_write(tmp_path):
+    path = tmp_path / 'concurrent.db'
+    writer_engine = _tuned_engine(path)
+    reader_engine = _tuned_engine(path)
+    _db.metadata.create_all(writer_engine)
+    table = Transaction.__table__
+    row = {'investment_id': 1, 'quantity': 1.0, 'unit_price': 10.0, 'transaction_date': datetime(2024, 1, 1)}
+    with writer_engine.begin() as conn:
+        # Parent rows first: foreign keys are enforced
+        conn.execute(insert(Portfolio.__table__), {'id': 1, 'name': 'P'})
+        conn.execute(insert(Investment.__table__), {
+            'id': 1, 'portfolio_id': 1, 'symbol': 'AAPL', 'isin': 'US0378331005', 'currency': 'USD',
+            'type': 'equity', 'quantity': 1.0, 'purchase_price': 10.0, 'purchase_date': datetime(2024, 1, 1)})
+        conn.execute(insert(table), [row] * 100)
+
+    write_in_progress = threading.Event()
+    reads_done = threading.Event()
+
+    def bulk_write():
+        with writer_engine.begin() as conn:
+            conn.execute(insert(table), [row] * 20_000)
+            write_in_progress.set()
+            # Hold the write transaction (and its lock) open until readers finish
+            reads_done.wait(timeout=10)
+
+    writer = threading.Thread(target=bulk_write)
+    writer.start()
+    assert write_in_progress.wait(timeout=10)
+
+    with reader_engine.connect() as conn:
+        counts = [conn.execute(select(func.count()).select_from(table)).scalar() for _ in range(5)]
+    reads_done.set()
+    writer.join()
+
+    # Readers see the last committed snapshot without waiting for the writer
+    assert counts == [100] * 5
+    with reader_engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(table)).scalar() == 20_100
+
+    writer_engine.dispose()
+    reader_engine.dispose()
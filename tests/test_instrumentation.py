@@ -0,0 +1,88 @@
+"""Tests for the opt-in per-request instrumentation layer."""
+from datetime import datetime
+
+import sinvest.app as app_module
+from sinvest.domain.price_provider import MockPriceProvider
+from sinvest.instrumentation import InstrumentedPriceProvider, InstrumentedRepository, registry
+
+
+class CountingCacheProvider(MockPriceProvider):
+    """Mock provider that reports every repeated symbol as a cache hit."""
+
+    def __init__(self, mapping):
+        super().__init__(mapping=mapping)
+        self.cache_hits = 0
+        self._seen = set()
+
+    def get_price(self, symbol):
+        if symbol in self._seen:
+            self.cache_hits += 1
+        self._seen.add(symbol)
+        return super().get_price(symbol)
+
+
+def test_server_timing_header_and_metrics(client, db, investment_factory, monkeypatch):
+    monkeypatch.setitem(client.application.config, 'INSTRUMENTATION_ENABLED', True)
+    monkeypatch.setattr(app_module, 'price_provider', InstrumentedPriceProvider(CountingCacheProvider({'AAPL': 200.0})))
+    registry.reset()
+
+    inv = investment_factory(symbol='AAPL', isin='US0378331005', quantity=2.0, purchase_price=100.0,
+                             purchase_date=datetime(2024, 1, 1))
+
+    resp = client.get(f'/portfolio/{inv.portfolio_id}')
+    assert resp.status_code == 200
+    timing = resp.headers['Server-Timing']
+    assert 'sql;dur=' in timing
+    assert 'price;dur=' in timing
+    assert 'domain;dur=' in timing
+    # aggregate_portfolio and the per-row mapping each price the holding once
+    assert '2 calls, 1 cached' in timing
+
+    assert registry.value('requests_total', 'view_portfolio') == 1
+    assert registry.value('sql_statements_total', 'view_portfolio') > 0
+    assert registry.value('price_fetches_total', 'view_portfolio') == 2
+    assert registry.value('repository_calls_total', 'view_portfolio') == 1
+
+    metrics = client.get('/metrics')
+    assert metrics.status_code == 200
+    body = metrics.get_data(as_text=True)
+    assert '# TYPE sinvest_sql_statements_total counter' in body
+    assert 'sinvest_price_fetches_total{endpoint="view_portfolio"} 2' in body
+
+
+def test_instrumentation_disabled_by_default(client, db, monkeypatch):
+    monkeypatch.setitem(client.application.config, 'INSTRUMENTATION_ENABLED', False)
+
+    resp = client.get('/')
+    assert resp.status_code == 200
+    assert 'Server-Timing' not in resp.headers
+    assert client.get('/metrics').status_code == 404
+
+
+def test_wrappers_are_transparent_outside_requests(db):
+    provider = InstrumentedPriceProvider(MockPriceProvider({'X': 3.0}))
+    assert provider.get_price('X') == 3.0
+    assert provider.mapping == {'X': 3.0}
+
+    repo = InstrumentedRepository(app_module.SQLAlchemyPortfolioRepository())
+    created = repo.add_portfolio(name='Proxy', description=None)
+    assert repo.get_portfolio(created.id).name == 'Proxy'
+
+
+def test_stale_fallbacks_are_not_counted_as_cache_hits(client, db, investment_factory, monkeypatch):
+    from sinvest.domain.price_coalescing import SingleFlightPriceProvider
+    from sinvest.domain.price_resilience import ResilientPriceProvider
+
+    upstream = MockPriceProvider({'AAPL': 200.0})
+    resilient = ResilientPriceProvider(upstream)
+    resilient.get_price('AAPL')
+    upstream.mapping = {}  # every later lookup fails and serves the last good price
+    monkeypatch.setitem(client.application.config, 'INSTRUMENTATION_ENABLED', True)
+    monkeypatch.setattr(app_module, 'price_provider', InstrumentedPriceProvider(SingleFlightPriceProvider(resilient)))
+
+    inv = investment_factory(symbol='AAPL', isin='US0378331005', quantity=2.0, purchase_price=100.0,
+                             purchase_date=datetime(2024, 1, 1))
+    timing = client.get(f'/portfolio/{inv.portfolio_id}').headers['Server-Timing']
+
+    assert resilient.stale_served > 0
+    assert '0 cached' in timing
@@ -0,0 +1,111 @@
+"""Tests for rolling old transactions into opening-balance rows and back."""
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from sinvest.domain.entities import TransactionEntity
+from sinvest.ledger_compaction import compact_ledger, restore_ledger, verify_compaction
+from sinvest.models.portfolio import Transaction, TransactionArchive
+from sinvest.repositories.sqlalchemy_impl import SQLAlchemyPortfolioRepository
+
+CUTOFF = datetime(2018, 1, 1)
+
+
+def _ledger(db):
+    return db.session.execute(
+        select(Transaction.id, Transaction.investment_id, Transaction.quantity, Transaction.unit_price,
+               Transaction.transaction_date).order_by(Transaction.id)
+    ).all()
+
+
+def test_compaction_preserves_positions_and_restores_exactly(db, synthetic_data):
+    stats = synthetic_data(portfolios=2, investments=3, transactions=40, seed=11)
+    repo = SQLAlchemyPortfolioRepository()
+    inv_ids = [inv.id for p in repo.list_portfolios() for inv in p.investments]
+    original = _ledger(db)
+    totals = repo.get_position_totals(inv_ids)
+    later = {pid: repo.positions_as_of(pid, date(2021, 6, 30)) for pid in stats.portfolio_ids}
+
+    dry = compact_ledger(db.session, CUTOFF, dry_run=True)
+    assert dry.rows_archived > dry.rows_written and dry.bytes_saved > 0
+    assert _ledger(db) == original
+
+    done = compact_ledger(db.session, CUTOFF)
+    db.session.commit()
+    assert (done.holdings, done.rows_archived) == (dry.holdings, dry.rows_archived)
+    assert len(_ledger(db)) == len(original) - done.rows_saved
+    assert db.session.query(TransactionArchive).count() == done.rows_archived
+    assert verify_compaction(db.session) == []
+
+    compacted = repo.get_position_totals(inv_ids)
+    for inv_id in inv_ids:
+        assert compacted[inv_id].quantity_units == totals[inv_id].quantity_units
+        assert abs(compacted[inv_id].cost_units - totals[inv_id].cost_units) * 2 <= abs(totals[inv_id].quantity_units)
+    for pid in stats.portfolio_ids:
+        assert {k: v.quantity for k, v in repo.positions_as_of(pid, date(2021, 6, 30)).items()} == \
+            {k: v.quantity for k, v in later[pid].items()}
+
+    # A second, later compaction archives the first opening rows; restore unwinds both
+    compact_ledger(db.session, datetime(2020, 1, 1))
+    assert verify_compaction(db.session) == []
+    archived = db.session.query(TransactionArchive).count()
+    assert restore_ledger(db.session) == archived
+    db.session.commit()
+    assert _ledger(db) == original
+    assert db.session.query(TransactionArchive).count() == 0
+    assert repo.get_position_totals(inv_ids) == totals
+
+
+def test_uncompactable_holdings_are_skipped(db, investment_factory):
+    repo = SQLAlchemyPortfolioRepository()
+    closed = investment_factory(isin='CLOSED')
+    open_ = investment_factory(isin='OPEN', portfolio=closed.portfolio)
+    repo.add_transactions([
+        TransactionEntity(None, closed.id, 5.0, 10.0, datetime(2015, 1, 1)),
+        TransactionEntity(None, closed.id, -5.0, 12.0, datetime(2016, 1, 1)),
+        TransactionEntity(None, open_.id, 3.0, 10.0, datetime(2015, 1, 1)),
+        TransactionEntity(None, open_.id, 1.0, 11.0, datetime(2016, 1, 1)),
+        TransactionEntity(None, open_.id, 1.0, 12.0, datetime(2019, 1, 1)),
+    ])
+
+    stats = compact_ledger(db.session, CUTOFF)
+    assert (stats.holdings, stats.skipped_holdings, stats.rows_archived) == (1, 1, 2)
+    opening = db.session.execute(
+        select(Transaction.quantity, Transaction.unit_price, Transaction.transaction_date)
+        .where(Transaction.investment_id == open_.id).order_by(Transaction.transaction_date)
+    ).all()
+    assert opening == [(4.0, 10.25, datetime(2016, 1, 1)), (1.0, 12.0, datetime(2019, 1, 1))]
+    positions = repo.positions_as_of(closed.portfolio_id, date(2020, 1, 1))
+    assert positions[open_.id].quantity == 5.0 and positions[open_.id].transaction_count == 2
+
+    restore_ledger(db.session, [open_.id])
+    assert repo.positions_as_of(closed.portfolio_id, date(2020, 1, 1))[open_.id].transaction_count == 3
+
+
+def test_verify_reports_tampered_opening_row(db, synthetic_data):
+    synthetic_data(portfolios=1, investments=2, transactions=20, seed=3)
+    compact_ledger(db.session, CUTOFF)
+    opening_id = db.session.execute(select(TransactionArchive.opening_transaction_id)).scalars().first()
+    db.session.get(Transaction, opening_id).quantity += 1
+    db.session.flush()
+
+    [mismatch] = verify_compaction(db.session)
+    assert mismatch.opening_transaction_id == opening_id
+    assert mismatch.quantity_diff_units == 10_000
+
+
+def test_compaction_cli(app, db, synthetic_data):
+    synthetic_data(portfolios=1, investments=2, transactions=20, seed=3)
+    runner = app.test_cli_runner()
+    before = db.session.query(Transaction).count()
+
+    dry = runner.invoke(args=['compact-ledger', '--before', '2018-01-01', '--dry-run'])
+    assert dry.exit_code == 0 and 'Would compact 2 investments' in dry.output
+    assert db.session.query(Transaction).count() == before
+
+    result = runner.invoke(args=['compact-ledger', '--before', '2018-01-01'])
+    assert result.exit_code == 0 and 'Compacted 2 investments' in result.output
+    assert db.session.query(Transaction).count() < before
+    assert 'consistent' in runner.invoke(args=['verify-ledger']).output
+    assert 'Restored' in runner.invoke(args=['restore-ledger']).output
+    assert db.session.query(Transaction).count() == before
@@ -0,0 +1,76 @@
+"""Tests for fixed-point money storage and exact aggregation."""
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, select, type_coerce
+
+from sinvest.domain.entities import InvestmentEntity, PositionTotals, TransactionEntity
+from sinvest.domain.money import COST_SCALE, QUANTITY_SCALE, position_totals, to_price_units, to_quantity_units
+from sinvest.domain.price_provider import MockPriceProvider
+from sinvest.domain.services import compute_investment_values
+from sinvest.models.portfolio import Transaction
+from sinvest.repositories.sqlalchemy_impl import SQLAlchemyPortfolioRepository
+
+
+def test_unit_conversion_rounds_to_scale():
+    assert to_price_units(10.01) == 10_010_000
+    assert to_price_units(Decimal('0.0000005')) == 0  # half-even
+    assert to_quantity_units(0.1) == 1_000
+    assert to_quantity_units(-4) == -40_000
+
+
+def test_position_totals_are_exact_where_floats_drift():
+    quantities = [0.1] * 10
+    prices = [0.1] * 10
+    assert sum(q * p for q, p in zip(quantities, prices)) != 0.1  # float drift
+
+    qty_units, cost_units = position_totals([to_quantity_units(q) for q in quantities],
+                                            [to_price_units(p) for p in prices])
+    assert qty_units == QUANTITY_SCALE
+    assert cost_units == COST_SCALE // 10
+    assert cost_units / COST_SCALE == 0.1
+
+
+def test_position_totals_fall_back_to_python_ints_beyond_int64():
+    qty = [to_quantity_units(1_000_000)] * 3
+    price = [to_price_units(1_000_000)] * 3
+    _, cost_units = position_totals(qty, price)
+    assert cost_units == 3 * 1_000_000 * 1_000_000 * COST_SCALE
+
+
+def test_incremental_totals_match_recomputation():
+    ledger = [TransactionEntity(None, 1, 0.3, 19.99, datetime(2024, 1, d)) for d in range(1, 20)]
+    running = PositionTotals()
+    for tx in ledger:
+        running = running + PositionTotals.of([tx])
+    assert running == PositionTotals.of(ledger)
+    assert running - PositionTotals.of(ledger[:1]) == PositionTotals.of(ledger[1:])
+
+
+def test_compute_investment_values_uses_exact_cost():
+    inv = InvestmentEntity(None, 1, 'X', 'XX0000000001', 'USD', 'equity', 0.1, 0.1, datetime(2024, 1, 1),
+                           transactions=[TransactionEntity(None, 1, 0.1, 0.1, datetime(2024, 1, 1))] * 10)
+    vals = compute_investment_values(inv, MockPriceProvider({'X': 0.2}))
+    assert vals['current_value'] == 0.2
+    assert vals['gain_loss'] == 0.1
+
+
+def test_columns_store_integer_units(db, investment_factory):
+    inv = investment_factory(quantity=2.5, purchase_price=12.345678)
+    for _ in range(10):
+        db.session.add(Transaction(investment_id=inv.id, quantity=0.1, unit_price=0.1,
+                                   transaction_date=datetime(2024, 1, 1)))
+    db.session.commit()
+
+    raw = db.session.execute(
+        select(type_coerce(Transaction.quantity, BigInteger), type_coerce(Transaction.unit_price, BigInteger))
+    ).first()
+    assert raw == (1_000, 100_000)
+    db.session.expire_all()
+    assert inv.quantity == 2.5
+    assert inv.purchase_price == 12.345678
+
+    totals = SQLAlchemyPortfolioRepository().get_position_totals([inv.id, inv.id + 1])
+    assert totals[inv.id] == PositionTotals(QUANTITY_SCALE, COST_SCALE // 10, 10)
+    assert totals[inv.id].cost_basis == 0.1
+    assert totals[inv.id + 1] == PositionTotals()
@@ -0,0 +1,137 @@
+"""Tests for point-in-time holdings backed by the ledger's running totals."""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from sinvest.domain.entities import PositionTotals, TransactionEntity
+from sinvest.models.ledger import refresh_running_totals
+from sinvest.models.portfolio import Investment, Transaction
+from sinvest.repositories.sqlalchemy_impl import SQLAlchemyPortfolioRepository
+
+
+def _expected(db, portfolio_id, cutoff):
+    """Reference: filter and sum the whole ledger in Python."""
+    expected = {}
+    for inv in Investment.query.filter_by(portfolio_id=portfolio_id):
+        txs = [TransactionEntity(t.id, t.investment_id, t.quantity, t.unit_price, t.transaction_date)
+               for t in inv.transactions if t.transaction_date < cutoff]
+        expected[inv.id] = PositionTotals.of(txs)
+    return expected
+
+
+def test_positions_as_of_matches_ledger_scan(db, synthetic_data):
+    stats = synthetic_data(portfolios=2, investments=4, transactions=30, seed=5)
+    repo = SQLAlchemyPortfolioRepository()
+    pid = stats.portfolio_ids[1]
+    dates = [date(2012, 6, 30), date(2020, 12, 31), date(2030, 1, 1), date(2000, 1, 1)]
+
+    for d in dates:
+        assert repo.positions_as_of(pid, d) == _expected(db, pid, datetime.combine(d + timedelta(days=1), datetime.min.time()))
+
+    batched = repo.positions_as_of_dates(pid, dates)
+    assert list(batched) == dates
+    assert all(batched[d] == repo.positions_as_of(pid, d) for d in dates)
+    assert batched[date(2000, 1, 1)] == {inv_id: PositionTotals() for inv_id in batched[date(2000, 1, 1)]}
+
+
+def test_running_totals_follow_backdated_writes_and_deletes(db, investment_factory):
+    inv = investment_factory()
+    inv_id = inv.id
+    repo = SQLAlchemyPortfolioRepository()
+    repo.add_transactions([TransactionEntity(None, inv_id, 10.0, 5.0, datetime(2024, 1, 10)),
+                           TransactionEntity(None, inv_id, -4.0, 6.0, datetime(2024, 3, 1))])
+    assert repo.positions_as_of(inv.portfolio_id, date(2024, 12, 31))[inv_id].quantity == 6.0
+
+    # Back-dated ORM insert shifts the running totals of every later row
+    db.session.add(Transaction(investment_id=inv_id, quantity=1.5, unit_price=4.0, transaction_date=datetime(2024, 1, 1)))
+    db.session.commit()
+    positions = repo.positions_as_of(inv.portfolio_id, date(2024, 2, 1))[inv_id]
+    assert (positions.quantity, positions.cost_basis, positions.transaction_count) == (11.5, 56.0, 2)
+
+    # Datetimes are inclusive
+    assert repo.positions_as_of(inv.portfolio_id, datetime(2024, 1, 10))[inv_id].transaction_count == 2
+    assert repo.positions_as_of(inv.portfolio_id, datetime(2024, 1, 9, 23, 59))[inv_id].transaction_count == 1
+
+    first = Transaction.query.filter_by(investment_id=inv_id).order_by(Transaction.transaction_date).first()
+    db.session.delete(first)
+    db.session.commit()
+    assert repo.positions_as_of(inv.portfolio_id, date(2024, 12, 31))[inv_id] == repo.get_position_totals([inv_id])[inv_id]
+
+
+def _running(db, inv_id):
+    return db.session.execute(
+        select(Transaction.running_quantity_units, Transaction.running_cost_units, Transaction.running_count)
+        .where(Transaction.investment_id == inv_id).order_by(Transaction.transaction_date, Transaction.id)
+    ).all()
+
+
+def test_appends_only_write_the_new_rows(db, investment_factory):
+    inv_id = investment_factory().id
+    repo = SQLAlchemyPortfolioRepository()
+    repo.add_transactions([TransactionEntity(None, inv_id, 1.0, 2.0, datetime(2024, 1, day)) for day in range(1, 11)])
+    # Poison the existing totals: only rows that get rewritten lose the marker
+    db.session.execute(update(Transaction).values(running_count=Transaction.running_count + 1000))
+    db.session.commit()
+
+    repo.add_transactions([TransactionEntity(None, inv_id, 2.0, 3.0, datetime(2024, 2, 1))])
+    db.session.add(Transaction(investment_id=inv_id, quantity=1.0, unit_price=1.0, transaction_date=datetime(2024, 3, 1)))
+    db.session.commit()
+
+    counts = [count for _, _, count in _running(db, inv_id)]
+    # The new rows continue from their predecessor's (poisoned) totals; older rows are untouched
+    assert counts == [1001 + n for n in range(10)] + [1011, 1012]
+
+
+def test_incremental_totals_match_a_full_refresh(db, investment_factory):
+    a = investment_factory(isin='A')
+    b_id = investment_factory(portfolio=a.portfolio, isin='B').id
+    a_id = a.id
+    repo = SQLAlchemyPortfolioRepository()
+    repo.add_transactions([TransactionEntity(None, inv_id, float(n + 1), 1.0 + n, datetime(2024, 1, 1 + n % 5))
+                           for n in range(20) for inv_id in (a_id, b_id)])
+    # Same-day back-dated insert, re-date, move between holdings, quantity edit and delete
+    db.session.add(Transaction(investment_id=a_id, quantity=7.0, unit_price=2.0, transaction_date=datetime(2024, 1, 2)))
+    rows = Transaction.query.order_by(Transaction.id).all()
+    rows[3].transaction_date = datetime(2023, 12, 1)
+    rows[10].investment_id = b_id
+    rows[15].quantity = -1.0
+    db.session.delete(rows[30])
+    db.session.commit()
+    incremental = {inv_id: _running(db, inv_id) for inv_id in (a_id, b_id)}
+
+    refresh_running_totals(db.session.connection())
+    assert incremental == {inv_id: _running(db, inv_id) for inv_id in (a_id, b_id)}
+
+
+def test_ledger_listeners_only_watch_the_app_session():
+    from sinvest.db_routing import RoutingSession
+    from sinvest.models import ledger
+
+    for identifier, listener in (('after_flush', ledger._collect_touched_ledgers),
+                                 ('after_flush_postexec', ledger._refresh_touched_ledgers)):
+        assert event.contains(RoutingSession, identifier, listener)
+        assert not event.contains(Session, identifier, listener)
+
+
+def test_as_of_lookup_is_an_index_seek(db, query_plan):
+    T = Transaction
+    stmt = (
+        select(Investment.id, T.running_quantity_units)
+        .outerjoin(T, T.id == SQLAlchemyPortfolioRepository._last_row_id(Investment.id, datetime(2024, 1, 1)))
+        .where(Investment.portfolio_id == 1)
+    )
+    plan = query_plan(stmt)
+    assert 'USING COVERING INDEX ix_transaction_investment_date (investment_id=? AND transaction_date<?)' in plan
+    assert 'TEMP B-TREE' not in plan
+    assert 'SCAN transaction' not in plan
+
+
+def test_positions_endpoint(client, db, investment_factory):
+    inv = investment_factory()
+    SQLAlchemyPortfolioRepository().add_transactions([TransactionEntity(None, inv.id, 2.0, 3.0, datetime(2024, 5, 1))])
+
+    rows = client.get(f'/portfolio/{inv.portfolio_id}/positions?as_of=2024-05-01').get_json()
+    assert rows == [{'investment_id': inv.id, 'quantity': 2.0, 'cost_basis': 6.0, 'transaction_count': 1}]
+    assert client.get(f'/portfolio/{inv.portfolio_id}/positions?as_of=2024-04-30').get_json()[0]['transaction_count'] == 0
+    assert client.get(f'/portfolio/{inv.portfolio_id}/positions?as_of=nope').status_code == 400
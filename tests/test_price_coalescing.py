@@ -0,0 +1,102 @@
+"""Threaded tests for single-flight price coalescing."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sinvest.domain.price_coalescing import SingleFlightPriceProvider
+from sinvest.domain.price_provider import MarketPriceProvider
+
+
+class SlowProvider(MarketPriceProvider):
+    """Records every upstream call; each takes `latency` seconds."""
+
+    def __init__(self, latency=0.05, fail=False):
+        self.latency = latency
+        self.fail = fail
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_price(self, symbol):
+        return self.get_prices([symbol])[symbol]
+
+    def get_prices(self, symbols):
+        symbols = list(symbols)
+        with self._lock:
+            self.calls.append(symbols)
+        time.sleep(self.latency)
+        if self.fail:
+            raise TimeoutError('upstream down')
+        return {s: float(len(s)) for s in symbols}
+
+
+def _concurrently(func, args, threads):
+    barrier = threading.Barrier(threads)
+
+    def run(arg):
+        barrier.wait()
+        return func(arg)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(run, args))
+
+
+def test_concurrent_requests_for_one_symbol_share_a_fetch():
+    inner = SlowProvider(latency=0.1)
+    provider = SingleFlightPriceProvider(inner)
+
+    results = _concurrently(provider.get_price, ['AAPL'] * 16, threads=16)
+
+    assert results == [4.0] * 16
+    assert inner.calls == [['AAPL']]
+    assert provider.coalesced == 15
+
+
+def test_window_batches_distinct_symbols_into_one_upstream_call():
+    inner = SlowProvider(latency=0.01)
+    provider = SingleFlightPriceProvider(inner, window=0.2)
+    symbols = [f'S{i}' for i in range(12)]
+
+    results = _concurrently(provider.get_price, symbols * 2, threads=24)
+
+    assert results == [2.0] * 10 + [3.0] * 2 + [2.0] * 10 + [3.0] * 2
+    assert len(inner.calls) == 1
+    assert sorted(inner.calls[0]) == sorted(symbols)
+
+
+def test_window_is_ignored_without_a_batch_endpoint():
+    class OneAtATime(MarketPriceProvider):
+        def get_price(self, symbol):
+            return 1.0
+
+    provider = SingleFlightPriceProvider(OneAtATime(), window=5.0)
+
+    assert provider.window == 0.0
+    assert provider.get_price('A') == 1.0
+    assert SingleFlightPriceProvider(SlowProvider(), window=0.2).window == 0.2
+
+
+def test_sequential_requests_are_not_cached():
+    inner = SlowProvider(latency=0)
+    provider = SingleFlightPriceProvider(inner)
+
+    provider.get_price('A')
+    provider.get_price('A')
+
+    assert inner.calls == [['A'], ['A']]
+
+
+def test_upstream_error_reaches_every_waiter_and_clears_in_flight():
+    inner = SlowProvider(latency=0.1, fail=True)
+    provider = SingleFlightPriceProvider(inner)
+
+    def lookup(symbol):
+        with pytest.raises(TimeoutError):
+            provider.get_price(symbol)
+        return True
+
+    assert all(_concurrently(lookup, ['X'] * 8, threads=8))
+    assert inner.calls == [['X']]
+    inner.fail = False
+    assert provider.get_price('X') == 1.0
@@ -0,0 +1,130 @@
+"""Tests for negative caching and the circuit breaker around price providers."""
+import pytest
+
+from sinvest.domain.price_provider import MarketPriceProvider
+from sinvest.domain.price_resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ResilientPriceProvider
+from sinvest.instrumentation import MetricsRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ScriptedProvider(MarketPriceProvider):
+    """Returns prices from `mapping`; symbols in `failing` raise (or return 0.0 if `as_zero`)."""
+
+    def __init__(self, mapping, failing=(), as_zero=False):
+        self.mapping = mapping
+        self.failing = set(failing)
+        self.as_zero = as_zero
+        self.calls = []
+
+    def get_price(self, symbol):
+        self.calls.append(symbol)
+        if symbol in self.failing:
+            if self.as_zero:
+                return 0.0
+            raise TimeoutError(symbol)
+        return self.mapping[symbol]
+
+
+@pytest.fixture()
+def clock():
+    return FakeClock()
+
+
+@pytest.mark.parametrize('as_zero', [False, True])
+def test_failed_symbol_is_backed_off_exponentially(clock, as_zero):
+    inner = ScriptedProvider({}, failing={'DEAD'}, as_zero=as_zero)
+    provider = ResilientPriceProvider(inner, base_backoff=10, max_backoff=25, clock=clock)
+
+    assert provider.get_price('DEAD') == 0.0
+    assert provider.get_price('DEAD') == 0.0  # negative-cached, no upstream call
+    assert len(inner.calls) == 1
+
+    clock.now = 10  # first backoff expired -> retried, fails again, backoff doubles to 20
+    provider.get_price('DEAD')
+    clock.now = 29
+    provider.get_price('DEAD')
+    assert len(inner.calls) == 2
+    clock.now = 30
+    provider.get_price('DEAD')
+    clock.now = 54  # capped at max_backoff=25
+    provider.get_price('DEAD')
+    assert len(inner.calls) == 3
+    clock.now = 55
+    provider.get_price('DEAD')
+    assert len(inner.calls) == 4
+    assert provider.negative_cache_hits == 3
+
+
+def test_recovered_symbol_serves_last_good_while_backed_off(clock):
+    inner = ScriptedProvider({'AAPL': 150.0})
+    provider = ResilientPriceProvider(inner, base_backoff=10, clock=clock)
+    assert provider.get_price('AAPL') == 150.0
+
+    inner.failing.add('AAPL')
+    assert provider.get_price('AAPL') == 150.0  # upstream failed: stale price
+    assert provider.get_price('AAPL') == 150.0  # backed off: stale price, no call
+    assert inner.calls == ['AAPL', 'AAPL']
+
+    inner.failing.clear()
+    inner.mapping['AAPL'] = 151.0
+    clock.now = 10
+    assert provider.get_price('AAPL') == 151.0
+    assert provider.stats()['price_negative_cache_size'] == 0
+
+
+def test_circuit_breaker_opens_on_error_rate_and_recovers(clock):
+    breaker = CircuitBreaker(failure_threshold=0.5, window=4, min_calls=4, reset_timeout=30, clock=clock)
+    inner = ScriptedProvider({'A': 1.0, 'B': 2.0}, failing={'X1', 'X2'})
+    provider = ResilientPriceProvider(inner, breaker=breaker, clock=clock)
+    for symbol in ('A', 'X1', 'B', 'X2'):
+        provider.get_price(symbol)
+    assert breaker.state == OPEN
+
+    inner.calls.clear()
+    assert provider.get_price('A') == 1.0  # short-circuited to the last good price
+    assert provider.get_price('C') == 0.0  # nothing cached: fallback
+    assert inner.calls == []
+
+    clock.now = 30
+    assert breaker.allow() and not breaker.allow()  # a single half-open trial
+    assert breaker.state == HALF_OPEN
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    assert provider.get_price('B') == 2.0
+    assert inner.calls == ['B']
+
+    stats = provider.stats()
+    assert stats['price_circuit_open'] == 0
+    assert stats['price_circuit_opened_total'] == 1
+    assert stats['price_short_circuits_total'] == 2
+
+
+def test_failed_half_open_trial_reopens(clock):
+    breaker = CircuitBreaker(window=2, min_calls=2, reset_timeout=5, clock=clock)
+    breaker.record(False)
+    breaker.record(False)
+    clock.now = 5
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == OPEN and breaker.opened_total == 2
+    assert not breaker.allow()
+
+
+def test_stats_are_exported_as_gauges_and_counters(clock):
+    registry = MetricsRegistry()
+    provider = ResilientPriceProvider(ScriptedProvider({}, failing={'X'}), clock=clock)
+    registry.add_metric_source(provider.stats)
+    provider.get_price('X')
+
+    text = registry.render()
+
+    assert '# TYPE sinvest_price_circuit_open gauge\nsinvest_price_circuit_open 0' in text
+    assert '# TYPE sinvest_price_upstream_failures_total counter\nsinvest_price_upstream_failures_total 1' in text
+    assert '# TYPE sinvest_price_negative_cache_size gauge' in text
@@ -0,0 +1,66 @@
+"""Tests for the columnar memory-mapped price history store."""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from sinvest.price_store import PriceHistoryStore, StoredHistoricalPriceProvider, import_history
+
+
+def _days(start, count):
+    return np.arange(np.datetime64(start), np.datetime64(start) + count)
+
+
+def test_append_is_incremental_and_persisted(tmp_path):
+    store = PriceHistoryStore(tmp_path)
+    assert store.append('AAPL', _days('2024-01-01', 5), [1, 2, 3, 4, 5]) == 5
+    # Overlapping download: only the two new days are written
+    assert store.append('AAPL', _days('2024-01-04', 4), [40, 50, 6, 7]) == 2
+    assert store.append('AAPL', _days('2024-01-01', 3), [9, 9, 9]) == 0
+
+    reopened = PriceHistoryStore(tmp_path)
+    series = reopened.read('AAPL')
+    assert series.closes.tolist() == [1, 2, 3, 4, 5, 6, 7]
+    assert series.dates[0] == np.datetime64('2024-01-01') and series.dates[-1] == np.datetime64('2024-01-07')
+    assert reopened.last_date('AAPL') == date(2024, 1, 7)
+    assert reopened.symbols() == ['AAPL']
+
+
+def test_range_reads_are_zero_copy_views(tmp_path):
+    store = PriceHistoryStore(tmp_path)
+    store.append('MSFT', _days('2020-01-01', 2520), np.arange(2520, dtype=float))
+
+    series = StoredHistoricalPriceProvider(store).get_closes('MSFT', date(2021, 1, 1), date(2021, 1, 10))
+
+    assert series.closes.tolist() == list(range(366, 376))
+    assert np.shares_memory(series.closes, store.read('MSFT').closes)
+    assert isinstance(series.closes.base, np.memmap)
+    with pytest.raises(ValueError):
+        series.closes[0] = 1.0  # read-only map
+    assert len(store.read('MSFT', date(2030, 1, 1))) == 0
+    assert len(store.read('NOPE')) == 0
+
+
+def test_append_sorts_and_deduplicates_input(tmp_path):
+    store = PriceHistoryStore(tmp_path)
+    store.append('X', ['2024-01-03', '2024-01-01', '2024-01-01'], [3.0, 1.0, 1.5])
+    assert store.read('X').closes.tolist() == [1.0, 3.0]
+    with pytest.raises(ValueError):
+        store.append('X', ['2024-02-01'], [1.0, 2.0])
+
+
+def test_import_history_fetches_full_then_update_period(tmp_path):
+    class Provider:
+        def __init__(self):
+            self.periods = []
+
+        def get_history(self, symbol, period):
+            self.periods.append(period)
+            return [('2024-01-01', 1.0), ('2024-01-02', 2.0)] if period == 'max' else [('2024-01-02', 2.0), ('2024-01-03', 3.0)]
+
+    store = PriceHistoryStore(tmp_path)
+    provider = Provider()
+    assert import_history(store, provider, ['A']) == {'A': 2}
+    assert import_history(store, provider, ['A']) == {'A': 1}
+    assert provider.periods == ['max', '1mo']
+    assert store.read('A').closes.tolist() == [1.0, 2.0, 3.0]
@@ -0,0 +1,116 @@
+"""Tests for the opt-in request profiler and its on-disk ring buffer."""
+import marshal
+import time
+
+import pytest
+from flask import Flask
+from itsdangerous import URLSafeTimedSerializer
+
+import sinvest.app as app_module
+from sinvest.profiling import ProfileStore, StackSampler, init_profiling, profile_token, render_collapsed
+
+ADMIN = {'Authorization': 'Bearer s3cret'}
+
+
+@pytest.fixture()
+def profiling(app, monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, 'PROFILING_ENABLED', True)
+    monkeypatch.setitem(app.config, 'PROFILING_DIR', str(tmp_path / 'profiles'))
+    monkeypatch.setitem(app.config, 'PROFILING_ADMIN_TOKEN', 's3cret')
+    monkeypatch.setitem(app.config, 'PROFILING_SIGNING_KEY', 'profile-signing-key')
+    monkeypatch.setitem(app.config, 'PROFILING_THRESHOLD_MS', 60_000)
+    monkeypatch.setitem(app.config, 'PROFILING_SAMPLE_INTERVAL_MS', 1)
+    return app.config
+
+
+def _busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampler_collects_collapsed_stacks():
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    _busy_wait(0.05)
+    stacks = sampler.stop()
+    assert sum(stacks.values()) > 5
+    assert any(stack.split(';')[-1].startswith('_busy_wait (test_profiling.py') for stack in stacks)
+    line = render_collapsed(stacks).splitlines()[0]
+    assert line.rsplit(' ', 1)[1].isdigit()
+
+
+def test_store_is_a_bounded_ring_buffer(tmp_path):
+    store = ProfileStore(tmp_path, max_profiles=3)
+    ids = [store.save({'n': n}, {'collapsed': b'a;b 1\n'}) for n in range(5)]
+    assert [p['id'] for p in store.list()] == ids[:1:-1]
+    assert len(list(tmp_path.iterdir())) == 6  # 3 x (metadata + collapsed)
+    assert store.path(ids[0], 'collapsed') is None
+    assert store.path(ids[-1], 'collapsed').read_bytes() == b'a;b 1\n'
+    assert store.path(ids[-1], 'pstats') is None
+
+
+def test_slow_requests_are_kept(client, db, profiling, monkeypatch):
+    assert 'X-Profile-Id' not in client.get('/').headers
+
+    profiling['PROFILING_THRESHOLD_MS'] = 20
+    original = app_module.repo.list_portfolios
+    monkeypatch.setattr(app_module, 'repo', type('SlowRepo', (), {
+        'list_portfolios': staticmethod(lambda: (_busy_wait(0.05), original())[1])})())
+    resp = client.get('/')
+    profile_id = resp.headers['X-Profile-Id']
+
+    [meta] = client.get('/admin/profiles', headers=ADMIN).get_json()
+    assert meta['id'] == profile_id
+    assert meta['endpoint'] == 'index' and meta['trigger'] == 'threshold'
+    assert meta['duration_ms'] >= 50 and meta['formats'] == ['collapsed']
+    collapsed = client.get(f'/admin/profiles/{profile_id}.collapsed', headers=ADMIN).get_data(as_text=True)
+    assert '_busy_wait (test_profiling.py' in collapsed
+    assert client.get(f'/admin/profiles/{profile_id}.pstats', headers=ADMIN).status_code == 404
+
+
+def test_signed_flag_adds_cprofile(client, db, profiling, tmp_path):
+    app = client.application
+    assert 'X-Profile-Id' not in client.get('/?_profile=forged').headers
+    assert 'X-Profile-Id' not in client.get(f'/?_profile={profile_token(app, "/other")}').headers
+
+    resp = client.get('/', query_string={'_profile': profile_token(app, '/')})
+    profile_id = resp.headers['X-Profile-Id']
+    [meta] = client.get('/admin/profiles', headers=ADMIN).get_json()
+    assert meta['trigger'] == 'flag' and meta['formats'] == ['collapsed', 'pstats']
+
+    data = client.get(f'/admin/profiles/{profile_id}.pstats', headers=ADMIN).data
+    functions = {name for (_, _, name) in marshal.loads(data)}
+    assert 'index' in functions
+
+    cli = app.test_cli_runner().invoke(args=['profile-url', '/portfolio/1'])
+    assert cli.output.startswith('/portfolio/1?_profile=')
+
+
+def test_flags_need_the_dedicated_signing_key(client, db, profiling, monkeypatch):
+    app = client.application
+    # Knowing the app's SECRET_KEY is not enough to mint a flag
+    forged = URLSafeTimedSerializer(app.secret_key, salt='sinvest-profile').dumps('/')
+    assert 'X-Profile-Id' not in client.get('/', query_string={'_profile': forged}).headers
+
+    token = profile_token(app, '/')
+    monkeypatch.setitem(app.config, 'PROFILING_SIGNING_KEY', None)
+    assert 'X-Profile-Id' not in client.get('/', query_string={'_profile': token}).headers
+    with pytest.raises(RuntimeError):
+        profile_token(app, '/')
+    assert app.test_cli_runner().invoke(args=['profile-url', '/']).exit_code != 0
+
+
+def test_enabling_profiling_without_a_signing_key_fails(monkeypatch):
+    monkeypatch.delenv('SINVEST_PROFILING_SIGNING_KEY', raising=False)
+    app = Flask(__name__)
+    app.config['PROFILING_ENABLED'] = True
+    with pytest.raises(RuntimeError, match='PROFILING_SIGNING_KEY'):
+        init_profiling(app)
+
+
+def test_admin_endpoints_are_guarded(client, db, profiling, monkeypatch):
+    assert client.get('/admin/profiles').status_code == 403
+    assert client.get('/admin/profiles', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    monkeypatch.setitem(client.application.config, 'PROFILING_ENABLED', False)
+    assert client.get('/admin/profiles', headers=ADMIN).status_code == 404
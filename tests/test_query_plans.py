@@ -0,0 +1,52 @@
+"""Check via SQLite's EXPLAIN QUERY PLAN that the main lookups use indexes."""
+from datetime import datetime
+
+from sqlalchemy import func, select, tuple_
+
+from sinvest.models.portfolio import Investment, Transaction
+
+
+def test_investments_of_portfolio_use_unique_index(db, query_plan):
+    plan = query_plan(select(Investment).where(Investment.portfolio_id == 1))
+    assert 'USING INDEX sqlite_autoindex_investment_1' in plan
+
+
+def test_investment_by_portfolio_and_isin_uses_unique_index(db, query_plan):
+    stmt = select(Investment).where(Investment.portfolio_id == 1, Investment.isin == 'US0378331005')
+    plan = query_plan(stmt)
+    assert 'USING INDEX sqlite_autoindex_investment_1 (portfolio_id=? AND isin=?)' in plan
+
+
+def test_transactions_of_investment_use_investment_date_index(db, query_plan):
+    stmt = select(Transaction).where(Transaction.investment_id == 1).order_by(Transaction.transaction_date)
+    plan = query_plan(stmt)
+    assert 'USING INDEX ix_transaction_investment_date (investment_id=?)' in plan
+    assert 'TEMP B-TREE' not in plan  # ordering comes from the index
+
+
+def test_holding_totals_are_answered_from_covering_index(db, query_plan):
+    stmt = (
+        select(func.sum(Transaction.quantity), func.sum(Transaction.quantity * Transaction.unit_price))
+        .where(Transaction.investment_id == 1, Transaction.transaction_date <= datetime(2024, 12, 31))
+    )
+    plan = query_plan(stmt)
+    assert 'USING COVERING INDEX ix_transaction_investment_date (investment_id=? AND transaction_date<?)' in plan
+
+
+def test_date_range_slice_uses_date_index(db, query_plan):
+    stmt = select(Transaction).where(Transaction.transaction_date.between(datetime(2024, 1, 1), datetime(2024, 2, 1)))
+    plan = query_plan(stmt)
+    assert 'USING INDEX ix_transaction_date (transaction_date>? AND transaction_date<?)' in plan
+
+
+def test_keyset_page_is_read_in_index_order(db, query_plan):
+    stmt = (
+        select(Transaction)
+        .where(Transaction.investment_id == 1,
+               tuple_(Transaction.transaction_date, Transaction.id) > tuple_(datetime(2024, 1, 1), 5))
+        .order_by(Transaction.transaction_date, Transaction.id)
+        .limit(51)
+    )
+    plan = query_plan(stmt)
+    assert 'USING INDEX ix_transaction_investment_date (investment_id=? AND transaction_date>?)' in plan
+    assert 'TEMP B-TREE' not in plan
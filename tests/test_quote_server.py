@@ -0,0 +1,111 @@
+"""Tests for quote recording/replay and the local quote server."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from benchmarks.price_load import run_price_load, synthetic_tape
+from sinvest.domain.price_provider import YFinancePriceProvider
+from sinvest.domain.price_replay import QuoteTape, RecordingPriceProvider, ReplayPriceProvider
+from sinvest.quote_server import HttpPriceProvider, QuoteServer
+
+
+class FakeYF:
+    """Stand-in for the yfinance module returning fixed close series."""
+
+    class Ticker:
+        def __init__(self, symbol):
+            if symbol == 'DEAD':
+                raise ValueError('delisted')
+
+        def history(self, period):
+            import pandas as pd
+            return {'Close': pd.Series([10.0, 11.5], index=pd.to_datetime(['2025-01-02', '2025-01-03']))}
+
+
+@pytest.fixture()
+def tape():
+    return QuoteTape(prices={'AAPL': 150.0, 'BRK.B': 410.5},
+                     history={'AAPL': [('2025-01-02', 149.0), ('2025-01-03', 150.0)]})
+
+
+def test_record_then_replay_round_trip(tmp_path):
+    recorder = RecordingPriceProvider(YFinancePriceProvider(yf_module=FakeYF))
+    assert recorder.get_price('AAPL') == 11.5
+    assert recorder.get_price('DEAD') == 0.0  # failures are not recorded
+    recorder.get_history('AAPL', '5d')
+    recorder.tape.save(tmp_path / 'quotes.json')
+
+    replay = ReplayPriceProvider(QuoteTape.load(tmp_path / 'quotes.json'))
+
+    assert replay.get_price('AAPL') == 11.5
+    assert replay.get_price('DEAD') == 0.0
+    assert replay.get_history('AAPL') == [('2025-01-02', 10.0), ('2025-01-03', 11.5)]
+
+
+def test_http_provider_against_quote_server(tape):
+    with QuoteServer(tape) as server:
+        provider = HttpPriceProvider(server.url)
+
+        assert provider.get_price('BRK.B') == 410.5
+        assert provider.get_price('NOPE') == 0.0
+        assert provider.get_prices(['AAPL', 'NOPE']) == {'AAPL': 150.0, 'NOPE': 0.0}
+        assert provider.get_history('AAPL') == tape.history['AAPL']
+        assert server.requests == 4
+
+
+def test_http_provider_uses_one_session_per_thread(tape):
+    created = []
+
+    def factory():
+        created.append(requests.Session())
+        return created[-1]
+
+    with QuoteServer(tape) as server:
+        provider = HttpPriceProvider(server.url, session_factory=factory)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            seen = list(pool.map(lambda _: (provider.get_price('AAPL'), provider.session), range(40)))
+        assert {price for price, _ in seen} == {150.0}
+        assert len({id(session) for _, session in seen}) == len(created) <= 4
+        assert provider.session is provider.session  # reused within a thread
+        provider.close()
+
+
+def test_keep_alive_requests_are_not_held_back_by_nagle(tape):
+    with QuoteServer(tape) as server:
+        provider = HttpPriceProvider(server.url)
+        provider.get_price('AAPL')  # open the connection
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            provider.get_price('AAPL')
+            timings.append(time.perf_counter() - start)
+        provider.close()
+
+    assert min(timings) < 0.02  # a Nagle / delayed-ACK stall costs ~40 ms on each one
+
+
+def test_quote_server_injects_latency_and_errors(tape):
+    with QuoteServer(tape, latency=0.05, error_rate=1.0, seed=1) as server:
+        provider = HttpPriceProvider(server.url)
+        start = time.perf_counter()
+        assert provider.get_price('AAPL') == 0.0  # 503 -> failure value
+        assert time.perf_counter() - start >= 0.05
+
+
+def test_price_load_reports_timings():
+    report = run_price_load(synthetic_tape(20), provider='resilient', threads=3, lookups=30, latency=0.001)
+
+    assert report['lookups'] == 30
+    assert report['failed_prices'] == 0
+    assert report['upstream_requests'] == 30
+    assert 0 < report['p50'] <= report['p95'] <= report['max']
+
+
+def test_price_load_reports_coalesced_lookups():
+    report = run_price_load(synthetic_tape(2), provider='singleflight', threads=8, lookups=40, latency=0.02)
+
+    assert report['failed_prices'] == 0
+    assert report['coalesced'] > 0
+    assert report['upstream_requests'] + report['coalesced'] == 40
@@ -0,0 +1,135 @@
+"""Tests for quote streaming, incremental revaluation and the SSE endpoint."""
+import json
+import random
+from datetime import datetime
+
+import pytest
+
+import sinvest.app as app_module
+from sinvest.domain.entities import InvestmentEntity, PortfolioEntity, TransactionEntity
+from sinvest.domain.price_provider import MockPriceProvider
+from sinvest.domain.services import aggregate_portfolio
+from sinvest.domain.streaming import IncrementalValuator, PriceTable, Quote
+from sinvest.quote_stream import QuoteSource, QuoteStream, ReplayQuoteSource
+
+
+class ListQuoteSource(QuoteSource):
+    def __init__(self, quotes):
+        self.quotes = quotes
+
+    def __iter__(self):
+        return iter(self.quotes)
+
+
+def _inv(pid, symbol, currency, qty, purchase_price, transactions=None):
+    return InvestmentEntity(None, pid, symbol, f'XX{symbol:0>10}', currency, 'equity', qty, purchase_price,
+                            datetime(2020, 1, 1), transactions=transactions)
+
+
+@pytest.fixture()
+def portfolios():
+    ledger = [TransactionEntity(None, None, 3.0, 9.0, datetime(2021, 1, 1)),
+              TransactionEntity(None, None, -1.0, 12.0, datetime(2022, 1, 1))]
+    return [
+        PortfolioEntity(1, 'P1', None, None, [_inv(1, 'A', 'USD', 2, 10.0), _inv(1, 'B', 'eur', 5, 4.0)]),
+        PortfolioEntity(2, 'P2', None, None, [_inv(2, 'A', 'USD', 1, 8.0, transactions=ledger), _inv(2, 'C', 'USD', 4, 2.0)]),
+        PortfolioEntity(3, 'P3', None, None, [_inv(3, 'C', 'USD', 1, 3.0)]),
+    ]
+
+
+def test_ticks_only_touch_holders_and_match_full_revaluation(portfolios):
+    valuator = IncrementalValuator(portfolios, PriceTable({'A': 11.0}))  # B and C start unpriced
+    assert valuator.apply(Quote('B', 5.0)) == {1}
+    assert valuator.apply(Quote('A', 12.0)) == {1, 2}
+    assert valuator.apply(Quote('Z', 1.0)) == set()
+    assert valuator.apply(Quote('A', 0.0)) == set()  # bad ticks are ignored
+
+    rng = random.Random(7)
+    for _ in range(200):
+        valuator.apply(Quote(rng.choice('ABC'), round(rng.uniform(1, 50), 2)))
+
+    prices = valuator.prices.as_dict()
+    for portfolio in portfolios:
+        totals, gains = aggregate_portfolio(portfolio, prices=prices)
+        valuation = valuator.valuation(portfolio.id)
+        assert valuation.totals_by_currency == pytest.approx(totals)
+        assert valuation.gains_by_currency == pytest.approx(gains)
+    assert valuator.valuation(99) is None
+
+
+def test_replay_source_and_stream_notify_subscribers(tmp_path, portfolios):
+    ticks = tmp_path / 'ticks.jsonl'
+    ticks.write_text('{"t": 0, "symbol": "C", "price": 2.5}\n\n{"t": 0.01, "symbol": "A", "price": 10.0, "at": "2025-01-02T15:30:00"}\n')
+    source = ReplayQuoteSource(ticks, speed=0)
+    assert [q.at for q in source] == [None, datetime(2025, 1, 2, 15, 30)]
+
+    stream = QuoteStream(source, IncrementalValuator(portfolios))
+    updates = stream.subscribe()
+    stream.start()._thread.join(timeout=5)
+
+    assert stream.ticks == 2
+    assert [updates.get_nowait(), updates.get_nowait()] == [{2, 3}, {1, 2}]
+    assert stream.valuator.valuation(3).totals_by_currency == {'USD': 2.5}
+
+
+def _read_event(chunks):
+    event = ''
+    while not event.endswith('\n\n'):
+        event += next(chunks).decode()
+    return json.loads(event.split('data: ', 1)[1])
+
+
+def test_sse_endpoint_pushes_updates(app, client, investment_factory, monkeypatch):
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'AAPL': 10.0}))
+    monkeypatch.setitem(app.config, 'QUOTE_STREAM_FILE', None)
+    assert client.get('/portfolio/1/stream').status_code == 404  # no stream configured
+
+    pid = investment_factory(symbol='AAPL', isin='US0378331005', quantity=3.0, purchase_price=8.0).portfolio_id
+    portfolios = app_module.repo.list_portfolios()
+    stream = QuoteStream(ListQuoteSource([]), IncrementalValuator(portfolios, PriceTable({'AAPL': 10.0})))
+    monkeypatch.setitem(app.extensions, 'sinvest_quote_stream', stream)
+
+    resp = client.get(f'/portfolio/{pid}/stream', buffered=False)
+    assert resp.mimetype == 'text/event-stream'
+    chunks = iter(resp.response)
+    assert _read_event(chunks) == {'portfolio_id': pid, 'totals_by_currency': {'USD': 30.0}, 'gains_by_currency': {'USD': 6.0}}
+
+    stream.apply(Quote('AAPL', 11.0))
+    assert _read_event(chunks)['totals_by_currency'] == {'USD': 33.0}
+    resp.close()
+    assert client.get(f'/portfolio/{pid + 1}/stream').status_code == 404
+
+
+def test_stream_starts_from_configured_tick_file(app, client, tmp_path, investment_factory, monkeypatch):
+    ticks = tmp_path / 'ticks.jsonl'
+    ticks.write_text('{"t": 0, "symbol": "AAPL", "price": 20.0}\n')
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'AAPL': 10.0}))
+    monkeypatch.setitem(app.config, 'QUOTE_STREAM_FILE', str(ticks))
+    monkeypatch.setitem(app.config, 'QUOTE_STREAM_SPEED', 0)
+    monkeypatch.setitem(app.extensions, 'sinvest_quote_stream', None)
+    pid = investment_factory(symbol='AAPL', isin='US0378331005', quantity=2.0, purchase_price=8.0).portfolio_id
+
+    stream = app_module._quote_stream()
+    stream._thread.join(timeout=5)
+
+    assert stream.valuator.valuation(pid).totals_by_currency == {'USD': 40.0}
+    assert client.get('/portfolio/999/stream').status_code == 404
+
+
+def test_stream_is_built_from_ledger_totals_without_loading_transactions(app, tmp_path, investment_factory,
+                                                                         statements, monkeypatch):
+    ticks = tmp_path / 'ticks.jsonl'
+    ticks.write_text('')
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'AAPL': 10.0}))
+    monkeypatch.setitem(app.config, 'QUOTE_STREAM_FILE', str(ticks))
+    monkeypatch.setitem(app.extensions, 'sinvest_quote_stream', None)
+    inv = investment_factory(symbol='AAPL', isin='US0378331005', quantity=99.0, purchase_price=8.0)
+    app_module.repo.add_transactions([TransactionEntity(None, inv.id, 3.0, 8.0, datetime(2024, 1, 2)),
+                                      TransactionEntity(None, inv.id, 2.0, 9.0, datetime(2024, 2, 1))])
+
+    statements.clear()
+    stream = app_module._quote_stream()
+    stream._thread.join(timeout=5)
+
+    assert stream.valuator.valuation(inv.portfolio_id).totals_by_currency == {'USD': 50.0}
+    assert all('sum(' in s for s in statements if 'FROM "transaction"' in s)
@@ -0,0 +1,61 @@
+"""Tests for routing repository reads to a read replica (two local SQLite files)."""
+import pytest
+from sqlalchemy import insert
+
+from sinvest.db_routing import create_replica_engine, set_read_replica
+from sinvest.models.portfolio import Portfolio
+from sinvest.repositories.sqlalchemy_impl import SQLAlchemyPortfolioRepository
+
+
+@pytest.fixture()
+def replica(db, tmp_path):
+    """A replica file with its own (diverging) contents, so reads reveal which database answered."""
+    engine = create_replica_engine(f'sqlite:///{tmp_path / "replica.db"}', {'journal_mode': 'WAL'})
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Portfolio.__table__), {'id': 1, 'name': 'On replica'})
+    db.session.remove()
+    set_read_replica(engine)
+    yield engine
+    db.session.remove()
+    set_read_replica(None)
+    engine.dispose()
+
+
+def _names(repo):
+    return sorted(p.name for p in repo.list_portfolios())
+
+
+def test_reads_use_replica_until_the_session_writes(db, portfolio_factory, replica):
+    repo = SQLAlchemyPortfolioRepository()
+    assert _names(repo) == ['On replica']
+    assert repo.get_portfolio(1).name == 'On replica'
+
+    repo.add_portfolio('Written', None)
+    assert db.session().sticky
+    assert _names(repo) == ['Written']  # read-your-writes from the primary
+
+    db.session.remove()  # next request
+    assert _names(repo) == ['On replica']
+
+
+def test_existence_checks_and_writes_use_primary(db, replica):
+    repo = SQLAlchemyPortfolioRepository()
+    assert not repo.portfolio_exists(1)
+    assert _names(repo) == ['On replica']
+    created = repo.add_portfolio('Primary', None)
+    assert repo.portfolio_exists(created.id)
+
+    db.session.remove()
+    with replica.connect() as conn:
+        assert conn.exec_driver_sql('SELECT name FROM portfolio').scalars().all() == ['On replica']
+
+
+def test_routes_read_replica(client, db, replica):
+    assert b'On replica' in client.get('/').data
+
+
+def test_without_replica_everything_uses_primary(db, portfolio_factory):
+    portfolio_factory(name='Primary only')
+    db.session.remove()
+    assert _names(SQLAlchemyPortfolioRepository()) == ['Primary only']
@@ -0,0 +1,158 @@
+"""Tests for the batched rebalancing engine."""
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import sinvest.app as app_module
+from sinvest.domain.entities import InvestmentEntity, PortfolioEntity, TransactionEntity
+from sinvest.domain.price_provider import MockPriceProvider
+from sinvest.domain.rebalancing import RebalanceConstraints, rebalance_portfolios
+from sinvest.models.portfolio import Transaction
+
+AT = datetime(2025, 3, 1)
+
+
+def _inv(inv_id, pid, isin, type_, qty, symbol=None):
+    return InvestmentEntity(inv_id, pid, symbol or isin, isin, 'USD', type_, qty, 1.0, datetime(2020, 1, 1))
+
+
+@pytest.fixture()
+def portfolio():
+    # value: E1 600, E2 200, B1 200 -> 60/20/20
+    return PortfolioEntity(1, 'P', None, None, [
+        _inv(11, 1, 'E1', 'equity', 6), _inv(12, 1, 'E2', 'equity', 2), _inv(13, 1, 'B1', 'bond', 20),
+    ])
+
+
+PRICES = {'E1': 100.0, 'E2': 100.0, 'B1': 10.0}
+
+
+def _trades(orders, pid=1):
+    return {tx.investment_id: tx.quantity for tx in orders.get(pid, [])}
+
+
+def test_rebalance_by_investment(portfolio):
+    orders = rebalance_portfolios([portfolio], {'E1': 0.4, 'E2': 0.4, 'B1': 0.2}, PRICES, at=AT)
+
+    assert _trades(orders) == {11: -2.0, 12: 2.0}
+    assert all(tx.transaction_date == AT and tx.unit_price == 100.0 for tx in orders[1])
+
+
+def test_rebalance_by_type_splits_weight_by_value(portfolio):
+    orders = rebalance_portfolios([portfolio], {'equity': 0.5, 'bond': 0.5}, PRICES, by='type',
+                                  constraints=RebalanceConstraints(whole_units=False))
+
+    # equity 800 -> 500 split 3:1, bond 200 -> 500
+    assert _trades(orders) == pytest.approx({11: -2.25, 12: -0.75, 13: 30.0})
+
+
+def test_constraints_no_sell_min_trade_and_whole_units(portfolio):
+    targets = {'E1': 0.4, 'E2': 0.4, 'B1': 0.2}
+    no_sell = rebalance_portfolios([portfolio], targets, PRICES, RebalanceConstraints(allow_sells=False), cash={1: 250.0})
+    # E2 wants +200 + 0.4 * 250 = 300, B1 wants +50; 250 cash scales buys by 250/350 then truncates
+    assert _trades(no_sell) == {12: 2.0, 13: 3.0}
+
+    assert rebalance_portfolios([portfolio], targets, PRICES, RebalanceConstraints(allow_sells=False)) == {}
+    assert rebalance_portfolios([portfolio], targets, PRICES, RebalanceConstraints(min_trade_value=250)) == {}
+
+
+def test_batch_of_portfolios_with_per_portfolio_targets():
+    portfolios = [PortfolioEntity(pid, f'P{pid}', None, None, [_inv(pid * 10 + 1, pid, 'A', 'equity', 10),
+                                                               _inv(pid * 10 + 2, pid, 'B', 'bond', 0.0)][:1 + pid % 2])
+                  for pid in range(1, 2001)]
+    targets = {pid: {'A': 0.5, 'B': 0.5} for pid in range(1, 2001)}
+    targets[1] = {}  # no target -> untouched
+
+    orders = rebalance_portfolios(portfolios, targets, {'A': 10.0, 'B': 5.0})
+
+    assert 1 not in orders
+    assert _trades(orders, 3) == {31: -5.0, 32: 10.0}
+    assert 2 not in orders  # only holds A: 100% after normalisation
+    assert len(orders) == 999
+
+
+def test_rebalance_cli_persists_orders(app, db, investment_factory, portfolio_factory, monkeypatch, tmp_path):
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'AAA': 10.0, 'BBB': 10.0}))
+    p = portfolio_factory()
+    a = investment_factory(portfolio=p, symbol='AAA', isin='AAA', quantity=10.0, purchase_price=10.0,
+                           purchase_date=datetime(2020, 1, 1))
+    b = investment_factory(portfolio=p, symbol='BBB', isin='BBB', quantity=0.0, purchase_price=10.0,
+                           purchase_date=datetime(2020, 1, 1))
+    a_id, b_id = a.id, b.id
+    targets = tmp_path / 'targets.json'
+    targets.write_text(json.dumps({'targets': {'AAA': 0.5, 'BBB': 0.5}}))
+
+    dry = app.test_cli_runner().invoke(args=['rebalance', str(targets)])
+    assert dry.exit_code == 0, dry.output
+    assert '2 orders for 1 portfolios' in dry.output
+    assert Transaction.query.count() == 0
+
+    result = app.test_cli_runner().invoke(args=['rebalance', str(targets), '--persist'])
+    assert result.exit_code == 0, result.output
+    # The ledger-less holding of 10 gets an opening row, so the sell leaves 5 (not -5)
+    positions = app_module.repo.get_position_totals([a_id, b_id])
+    assert {inv_id: totals.quantity for inv_id, totals in positions.items()} == {a_id: 5.0, b_id: 5.0}
+    assert positions[a_id].cost_basis == 50.0
+    assert app_module.repo.get_position_totals([a_id])[a_id].transaction_count == 2
+
+    # A second run sees the ledger and has nothing left to do
+    again = app.test_cli_runner().invoke(args=['rebalance', str(targets), '--persist'])
+    assert '0 orders' in again.output
+
+
+def test_rebalance_cli_pages_portfolios_from_ledger_totals(app, db, investment_factory, portfolio_factory,
+                                                          statements, monkeypatch, tmp_path):
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'AAA': 10.0, 'BBB': 10.0}))
+    ids = {}
+    for name in ('field', 'ledger'):
+        p = portfolio_factory()
+        a = investment_factory(portfolio=p, symbol='AAA', isin='AAA', quantity=10.0 if name == 'field' else 99.0,
+                               purchase_price=10.0, purchase_date=datetime(2020, 1, 1))
+        b = investment_factory(portfolio=p, symbol='BBB', isin='BBB', quantity=0.0, purchase_price=10.0,
+                               purchase_date=datetime(2020, 1, 1))
+        ids[name] = (a.id, b.id)
+    app_module.repo.add_transactions([TransactionEntity(None, ids['ledger'][0], 10.0, 10.0, datetime(2020, 1, 1))])
+    targets = tmp_path / 'targets.json'
+    targets.write_text(json.dumps({'targets': {'AAA': 0.5, 'BBB': 0.5}}))
+
+    statements.clear()
+    dry = app.test_cli_runner().invoke(args=['rebalance', str(targets), '--batch-size', '1'])
+    assert dry.exit_code == 0, dry.output
+    assert '4 orders for 2 portfolios' in dry.output
+    assert all('sum(' in s for s in statements if 'FROM "transaction"' in s)
+
+    result = app.test_cli_runner().invoke(args=['rebalance', str(targets), '--persist', '--batch-size', '1'])
+    assert result.exit_code == 0, result.output
+    assert '5 orders for 2 portfolios recorded' in result.output  # one opening row, for the ledger-less holding
+    positions = app_module.repo.get_position_totals([*ids['field'], *ids['ledger']])
+    assert [positions[i].quantity for i in (*ids['field'], *ids['ledger'])] == [5.0, 5.0, 5.0, 5.0]
+
+
+@pytest.fixture()
+def west_of_utc(monkeypatch):
+    # UTC-12: the local date is behind the UTC date for half of every day
+    monkeypatch.setenv('TZ', 'Etc/GMT+12')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_orders_are_dated_on_the_local_clock(west_of_utc, app, db, investment_factory, monkeypatch, tmp_path):
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'AAA': 10.0, 'BBB': 10.0}))
+    a = investment_factory(symbol='AAA', isin='AAA', quantity=10.0, purchase_price=10.0,
+                           purchase_date=datetime(2020, 1, 1))
+    investment_factory(portfolio=a.portfolio, symbol='BBB', isin='BBB', quantity=0.0, purchase_price=10.0,
+                       purchase_date=datetime(2020, 1, 1))
+    targets = tmp_path / 'targets.json'
+    targets.write_text(json.dumps({'targets': {'AAA': 0.5, 'BBB': 0.5}}))
+
+    orders = rebalance_portfolios(app_module.repo.list_portfolios(), {'AAA': 0.5, 'BBB': 0.5}, {'AAA': 10.0, 'BBB': 10.0})
+    assert {tx.transaction_date.date() for txs in orders.values() for tx in txs} == {datetime.now().date()}
+
+    result = app.test_cli_runner().invoke(args=['rebalance', str(targets), '--persist'])
+    assert result.exit_code == 0, result.output
+    assert Transaction.query.count() == 3
@@ -0,0 +1,59 @@
+"""Tests for the multi-process revaluation job."""
+from datetime import datetime
+
+import pytest
+
+import sinvest.app as app_module
+from sinvest.domain.price_provider import MockPriceProvider
+from sinvest.domain.services import snapshot_portfolios
+from sinvest.models.portfolio import Investment, PortfolioSnapshot
+from sinvest.repositories.sqlalchemy_impl import SQLAlchemyPortfolioRepository
+from sinvest.revaluation import PriceSnapshot, run_revaluation, shard_ranges
+
+
+def test_shard_ranges_cover_ids_once():
+    assert shard_ranges(1, 10, 3) == [(1, 5), (5, 9), (9, 11)]
+    assert shard_ranges(7, 7, 4) == [(7, 8)]
+    assert shard_ranges(5, 4, 2) == []
+
+
+def test_price_snapshot_round_trips_through_mmap(tmp_path):
+    PriceSnapshot.from_mapping({'B': 2.5, 'A': 1.0}).save(tmp_path)
+
+    loaded = PriceSnapshot.load(tmp_path)
+
+    assert dict(loaded) == {'A': 1.0, 'B': 2.5}
+    assert loaded.get('C', 0.0) == 0.0
+    assert loaded.prices.filename  # memory-mapped, not copied into the process
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_run_revaluation_matches_single_process_snapshots(db, synthetic_data, workers):
+    synthetic_data(portfolios=7, investments=3, transactions=4, seed=3)
+    symbols = {s for (s,) in db.session.query(Investment.symbol).distinct()}
+    prices = {s: 10.0 + i for i, s in enumerate(sorted(symbols))}
+    at = datetime(2025, 6, 30)
+    expected = snapshot_portfolios(SQLAlchemyPortfolioRepository().list_portfolios(), at, prices=prices)
+    db.session.remove()
+
+    stats = run_revaluation(db.engine.url.render_as_string(hide_password=False), prices, at,
+                            workers=workers, shards=3, batch_size=2)
+
+    assert (stats.portfolios, stats.snapshots, stats.shards) == (7, len(expected), 3)
+    rows = db.session.query(PortfolioSnapshot).order_by(PortfolioSnapshot.portfolio_id, PortfolioSnapshot.currency).all()
+    assert [(r.portfolio_id, r.currency, r.taken_at) for r in rows] == [(s.portfolio_id, s.currency, s.taken_at) for s in expected]
+    for row, snap in zip(rows, expected):
+        assert row.total_value == pytest.approx(snap.total_value, abs=1e-6)
+        assert row.gain_loss == pytest.approx(snap.gain_loss, abs=1e-6)
+
+
+def test_revalue_all_cli(app, db, investment_factory, monkeypatch):
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'AAPL': 12.5}))
+    portfolio_id = investment_factory(symbol='AAPL', isin='US0378331005', quantity=4.0, purchase_price=10.0).portfolio_id
+
+    result = app.test_cli_runner().invoke(args=['revalue-all', '--at', '2025-01-31', '--workers', '1'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Wrote 1 snapshot rows for 1 portfolios (1 distinct symbols)' in result.output
+    snap = PortfolioSnapshot.query.filter_by(portfolio_id=portfolio_id).one()
+    assert (snap.total_value, snap.gain_loss) == (50.0, 10.0)
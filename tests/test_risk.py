@@ -0,0 +1,122 @@
+"""Tests for the vectorised portfolio risk analytics."""
+import json
+from datetime import date, datetime
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+import sinvest.app as app_module
+from benchmarks.risk import run_risk_benchmark, synthetic_returns
+from sinvest.domain.entities import InvestmentEntity, PortfolioEntity, PriceSeries
+from sinvest.domain.price_provider import MockPriceProvider
+from sinvest.domain.risk import (align_closes, covariance_matrix, portfolio_risk, portfolio_risk_batch,
+                                 portfolio_weights, returns_matrix)
+from sinvest.price_store import PriceHistoryStore
+
+
+def _series(symbol, days, closes):
+    return PriceSeries(symbol, np.array(days, dtype='datetime64[D]'), np.array(closes, dtype=float))
+
+
+def test_align_closes_forward_fills_and_trims():
+    a = _series('A', ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04'], [1, 2, 3, 4])
+    b = _series('B', ['2024-01-02', '2024-01-04'], [20, 40])
+
+    dates, closes = align_closes([a, b])
+
+    assert dates.tolist() == [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4)]
+    assert closes.tolist() == [[2, 20], [3, 20], [4, 40]]
+    assert returns_matrix(closes) == pytest.approx(np.array([[0.5, 0.0], [1 / 3, 1.0]]))
+
+
+def test_metrics_match_direct_computation():
+    returns = synthetic_returns(1000, 4, seed=3)
+    weights = np.array([0.4, 0.3, 0.2, 0.1])
+    port = returns @ weights
+
+    report = portfolio_risk(returns, weights, confidence=0.95)
+
+    sigma = port.std(ddof=1)
+    assert report.volatility == pytest.approx(sigma * np.sqrt(252))
+    assert report.volatility == pytest.approx(np.sqrt(weights @ covariance_matrix(returns) @ weights))
+    assert report.var_historical == pytest.approx(-np.quantile(port, 0.05))
+    assert report.cvar_historical == pytest.approx(-np.sort(port)[:50].mean())
+    assert report.var_parametric == pytest.approx(-(port.mean() + NormalDist().inv_cdf(0.05) * sigma))
+    assert report.cvar_parametric > report.var_parametric > 0
+    assert report.observations == 1000
+
+
+def test_max_drawdown_and_batch_rows():
+    returns = np.array([[0.10], [-0.50], [0.20], [0.50]])
+    metrics = portfolio_risk_batch(np.hstack([returns, -returns]), np.array([[1.0, 0.0], [0.0, 1.0]]))
+
+    assert metrics['max_drawdown'][0] == pytest.approx(0.5)
+    assert metrics['max_drawdown'][1] == pytest.approx(1 - 0.9 * 1.5 * 0.8 * 0.5 / 1.35)
+    assert metrics['volatility'].shape == (2,)
+
+
+def test_portfolio_weights_use_current_values():
+    portfolio = PortfolioEntity(1, 'P', None, None, [
+        InvestmentEntity(None, 1, 'B', 'XX0000000001', 'USD', 'equity', 2, 5.0, datetime(2020, 1, 1)),
+        InvestmentEntity(None, 1, 'A', 'XX0000000002', 'USD', 'equity', 1, 10.0, datetime(2020, 1, 1)),
+        InvestmentEntity(None, 1, 'A', 'XX0000000003', 'EUR', 'equity', 1, 10.0, datetime(2020, 1, 1)),
+    ])
+
+    symbols, weights = portfolio_weights(portfolio, {'A': 15.0})  # B unpriced -> purchase price
+
+    assert symbols == ['A', 'B']
+    assert weights.tolist() == pytest.approx([0.75, 0.25])
+
+
+def test_risk_benchmark_smoke():
+    report = run_risk_benchmark(holdings=20, days=100, portfolios=3, repeat=1)
+    assert set(report['results']) == {'risk.align_closes', 'risk.covariance_matrix',
+                                      'risk.portfolio_risk', 'risk.portfolio_risk_batch'}
+
+
+def test_risk_report_cli(app, tmp_path, investment_factory, monkeypatch):
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'AAPL': 12.0}))
+    monkeypatch.setitem(app.config, 'PRICE_HISTORY_DIR', str(tmp_path))
+    pid = investment_factory(symbol='AAPL', isin='US0378331005', quantity=1.0, purchase_price=10.0).portfolio_id
+    today = np.datetime64(date.today())
+    PriceHistoryStore(tmp_path).append('AAPL', today - np.arange(30)[::-1], 100 + np.sin(np.arange(30)))
+
+    result = app.test_cli_runner().invoke(args=['risk-report', '--years', '1'])
+
+    assert result.exit_code == 0, result.output
+    row = json.loads(result.output.splitlines()[0])
+    assert row['portfolio_id'] == pid and row['observations'] == 29
+    assert row['volatility'] > 0
+
+
+def test_risk_report_cli_batches_pages_and_matches_per_portfolio_metrics(app, tmp_path, investment_factory,
+                                                                         monkeypatch):
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'AAPL': 12.0, 'MSFT': 30.0}))
+    monkeypatch.setitem(app.config, 'PRICE_HISTORY_DIR', str(tmp_path))
+    today = np.datetime64(date.today())
+    store = PriceHistoryStore(tmp_path)
+    store.append('AAPL', today - np.arange(40)[::-1], 100 + np.sin(np.arange(40)))
+    store.append('MSFT', today - np.arange(25)[::-1], 50 + np.cos(np.arange(25)))
+    expected = {}
+    for qty_a, qty_m in ((1.0, 1.0), (3.0, 1.0), (2.0, 0.0), (0.0, 0.0)):
+        pid = investment_factory(symbol='AAPL', isin='US0378331005', quantity=qty_a, purchase_price=10.0).portfolio_id
+        portfolio = app_module.repo.get_portfolio(pid)
+        investment_factory(portfolio=portfolio, symbol='MSFT', isin='US5949181045', quantity=qty_m, purchase_price=10.0)
+        expected[pid] = (qty_a * 12.0, qty_m * 30.0)
+
+    result = app.test_cli_runner().invoke(args=['risk-report', '--years', '1', '--batch-size', '3'])
+
+    assert result.exit_code == 0, result.output
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    assert [row['portfolio_id'] for row in rows] == list(expected)
+    for row in rows:
+        a, m = expected[row['portfolio_id']]
+        if not a + m:
+            assert row['error'] == 'no price history'
+            continue
+        _, closes = align_closes([store.read('AAPL'), store.read('MSFT')])
+        report = portfolio_risk(returns_matrix(closes), np.array([a, m]) / (a + m))
+        assert row['observations'] == report.observations == 24
+        assert row['volatility'] == pytest.approx(report.volatility)
+        assert row['cvar_historical'] == pytest.approx(report.cvar_historical)
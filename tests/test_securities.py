@@ -0,0 +1,110 @@
+"""Tests for the shared security table keyed by ISIN."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, insert, select
+
+import sinvest.app as app_module
+from sinvest.domain.entities import InvestmentEntity
+from sinvest.domain.price_provider import MockPriceProvider
+from sinvest.models.portfolio import Investment, PortfolioSnapshot, Security
+from sinvest.models.securities import ensure_securities
+from sinvest.repositories.abstract import SecurityConflictError
+from sinvest.repositories.sqlalchemy_impl import SQLAlchemyPortfolioRepository
+from sinvest.revaluation import distinct_symbols
+
+
+def test_investments_of_one_isin_share_a_security(db, portfolio_factory, investment_factory):
+    first = investment_factory(isin='US0378331005', symbol='AAPL')
+    second = investment_factory(isin='US0378331005', symbol='AAPL', portfolio=portfolio_factory(name='Other'))
+    repo = SQLAlchemyPortfolioRepository()
+    third = repo.add_investment(InvestmentEntity(
+        id=None, portfolio_id=first.portfolio_id, symbol='MSFT', isin='US5949181045', currency='USD',
+        type='equity', quantity=1.0, purchase_price=300.0, purchase_date=datetime(2024, 1, 2)))
+
+    assert first.security_id == second.security_id != third.security_id
+    assert [(s.isin, s.symbol) for s in repo.list_securities()] == [('US0378331005', 'AAPL'), ('US5949181045', 'MSFT')]
+
+    repo.delete_investment(third.id)
+    assert [s.symbol for s in repo.list_securities()] == ['AAPL']
+    assert len(repo.list_securities(held_only=False)) == 2
+
+
+def test_synthetic_holdings_are_linked(db, synthetic_data):
+    synthetic_data(portfolios=3, investments=4, transactions=2, seed=8)
+    synthetic_data(portfolios=1, investments=4, transactions=2, seed=8)  # same instruments again
+
+    unlinked = db.session.execute(select(Investment.id).where(Investment.security_id.is_(None))).all()
+    assert unlinked == []
+    held = sorted({symbol for (symbol,) in db.session.execute(select(Investment.symbol))})
+    assert distinct_symbols(db.session) == held
+    isins = db.session.execute(select(Investment.isin).distinct()).all()
+    assert db.session.query(Security).count() == len(isins)
+
+
+def test_concurrent_first_add_of_an_isin_reuses_the_winner(client, db, portfolio_factory):
+    pid = portfolio_factory().id
+
+    raced = []
+
+    # Another request creates the security between our lookup and our insert
+    def _racing_insert(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO security') and not raced:
+            raced.append(statement)
+            cursor.execute("INSERT INTO security (isin, symbol, currency, type) "
+                           "VALUES ('US0378331005', 'AAPL', 'USD', 'equity')")
+
+    event.listen(db.engine, 'before_cursor_execute', _racing_insert)
+    resp = client.post(f'/portfolio/{pid}/add_investment', data={
+        'symbol': 'AAPL', 'isin': 'US0378331005', 'currency': 'USD', 'type': 'equity',
+        'quantity': 1.0, 'purchase_price': 150.0, 'purchase_date': '2025-01-01'})
+    event.remove(db.engine, 'before_cursor_execute', _racing_insert)
+
+    assert raced and resp.status_code == 302
+    [security] = db.session.execute(select(Security)).scalars().all()
+    assert Investment.query.filter_by(portfolio_id=pid).one().security_id == security.id
+
+
+def test_conflicting_listing_of_a_known_isin_is_rejected(client, db, portfolio_factory, investment_factory):
+    first = investment_factory(isin='IE00B4L5Y983', symbol='SWDA.L', currency='USD')
+    other = portfolio_factory(name='Other')
+
+    with pytest.raises(SecurityConflictError, match='IE00B4L5Y983 is SWDA.L'):
+        ensure_securities(db.session.connection(), [{'isin': 'IE00B4L5Y983', 'symbol': 'IWDA.AS', 'type': 'etf'}])
+    with pytest.raises(SecurityConflictError):
+        ensure_securities(db.session.connection(), [
+            {'isin': 'US5949181045', 'symbol': 'MSFT', 'currency': 'USD', 'type': 'equity'},
+            {'isin': 'US5949181045', 'symbol': 'MSFT', 'currency': 'EUR', 'type': 'equity'}])
+    assert db.session.query(Security).count() == 1
+
+    resp = client.post(f'/portfolio/{other.id}/add_investment', data={
+        'symbol': 'IWDA.AS', 'isin': 'IE00B4L5Y983', 'currency': 'USD', 'type': 'etf',
+        'quantity': 1.0, 'purchase_price': 80.0, 'purchase_date': '2025-01-01'})
+    assert resp.status_code == 302
+    assert Investment.query.filter_by(portfolio_id=other.id).count() == 0
+    assert Investment.query.one().security_id == first.security_id
+
+
+def test_every_held_listing_is_priced(app, db, portfolio_factory, investment_factory, monkeypatch):
+    # Holdings linked before listings were checked: two symbols for one ISIN
+    first = investment_factory(isin='IE00B4L5Y983', symbol='SWDA.L', quantity=10.0, purchase_price=10.0)
+    db.session.execute(insert(Investment), [{
+        'portfolio_id': portfolio_factory(name='Other').id, 'security_id': first.security_id, 'symbol': 'IWDA.AS',
+        'isin': 'IE00B4L5Y983', 'currency': 'USD', 'type': 'etf', 'quantity': 50.0, 'purchase_price': 8.0,
+        'purchase_date': datetime(2024, 1, 2)}])
+    db.session.commit()
+
+    assert distinct_symbols(db.session) == ['IWDA.AS', 'SWDA.L']
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'SWDA.L': 40.0, 'IWDA.AS': 10.0}))
+    result = app.test_cli_runner().invoke(args=['revalue-all', '--at', '2025-01-31', '--workers', '1'])
+    assert result.exit_code == 0, result.output
+    assert sorted(s.total_value for s in PortfolioSnapshot.query) == [400.0, 500.0]
+
+
+def test_symbol_enumeration_walks_the_symbol_index(db, query_plan, statements):
+    distinct_symbols(db.session)
+    [sql] = [s for s in statements if 'FROM investment' in s]
+
+    plan = query_plan(db.text(sql))
+    assert 'SCAN investment USING COVERING INDEX ix_investment_symbol' in plan
+    assert 'TEMP B-TREE' not in plan
@@ -0,0 +1,117 @@
+"""Tests for portfolio valuation snapshots."""
+from datetime import date, datetime
+
+import sinvest.app as app_module
+from sinvest.domain.entities import InvestmentEntity, PortfolioEntity, PortfolioSnapshotEntity
+from sinvest.domain.price_provider import MockPriceProvider
+from sinvest.domain.services import snapshot_portfolio, snapshot_portfolios
+from sinvest.models.portfolio import PortfolioSnapshot
+from sinvest.repositories.sqlalchemy_impl import SQLAlchemyPortfolioRepository
+
+
+def test_snapshot_portfolio_has_one_row_per_currency():
+    provider = MockPriceProvider({'A': 5.0, 'B': 2.0})
+    portfolio = PortfolioEntity(1, 'P', None, None, [
+        InvestmentEntity(None, 1, 'A', 'AA0000000001', 'USD', 'equity', 10, 3.0, datetime(2020, 1, 1)),
+        InvestmentEntity(None, 1, 'B', 'BB0000000002', 'EUR', 'etf', 5, 1.0, datetime(2020, 1, 1)),
+    ])
+    at = datetime(2025, 1, 31)
+
+    snaps = snapshot_portfolio(portfolio, at, provider)
+
+    assert [(s.currency, s.total_value, s.gain_loss) for s in snaps] == [('EUR', 10.0, 5.0), ('USD', 50.0, 20.0)]
+    assert all(s.taken_at == at and s.portfolio_id == 1 for s in snaps)
+
+
+def test_snapshot_cli_and_range_reads(app, client, db, investment_factory, monkeypatch):
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'AAPL': 12.5}))
+    inv = investment_factory(symbol='AAPL', isin='US0378331005', quantity=4.0, purchase_price=10.0)
+    runner = app.test_cli_runner()
+
+    for month_end in ('2025-01-31', '2025-02-28', '2025-03-31'):
+        result = runner.invoke(args=['snapshot-portfolios', '--at', month_end])
+        assert result.exit_code == 0, result.output
+        assert 'Wrote 1 snapshot rows for 1 portfolios' in result.output
+    assert PortfolioSnapshot.query.count() == 3
+
+    repo = SQLAlchemyPortfolioRepository()
+    february = repo.list_snapshots(inv.portfolio_id, start=datetime(2025, 2, 1), end=datetime(2025, 2, 28))
+    assert [(s.total_value, s.gain_loss) for s in february] == [(50.0, 10.0)]
+
+    resp = client.get(f'/portfolio/{inv.portfolio_id}/snapshots?start=2025-02-01')
+    assert resp.status_code == 200
+    assert [row['taken_at'] for row in resp.get_json()] == ['2025-02-28T00:00:00', '2025-03-31T00:00:00']
+    assert client.get(f'/portfolio/{inv.portfolio_id}/snapshots?start=nope').status_code == 400
+
+
+class BatchRecordingProvider(MockPriceProvider):
+    def __init__(self, mapping):
+        super().__init__(mapping)
+        self.batches = []
+
+    def get_prices(self, symbols):
+        self.batches.append(sorted(symbols))
+        return super().get_prices(symbols)
+
+
+def test_snapshot_cli_prices_once_and_replaces_a_rerun_at_the_same_instant(app, db, investment_factory, monkeypatch):
+    aapl = investment_factory(symbol='AAPL', isin='US0378331005', quantity=4.0, purchase_price=10.0)
+    msft = investment_factory(symbol='MSFT', isin='US5949181045', quantity=1.0, purchase_price=10.0)
+    runner = app.test_cli_runner()
+
+    for price in (12.5, 15.0):
+        provider = BatchRecordingProvider({'AAPL': price, 'MSFT': 20.0})
+        monkeypatch.setattr(app_module, 'price_provider', provider)
+        result = runner.invoke(args=['snapshot-portfolios', '--at', '2025-01-31', '--batch-size', '1'])
+        assert result.exit_code == 0, result.output
+        assert 'Wrote 2 snapshot rows for 2 portfolios' in result.output
+        assert provider.batches == [['AAPL', 'MSFT']]
+
+    repo = SQLAlchemyPortfolioRepository()
+    assert [(s.taken_at, s.total_value) for s in repo.list_snapshots(aapl.portfolio_id)] == [(datetime(2025, 1, 31), 60.0)]
+    assert [s.total_value for s in repo.list_snapshots(msft.portfolio_id)] == [20.0]
+
+
+def test_date_only_end_includes_the_whole_day(client, db, portfolio_factory):
+    pid = portfolio_factory().id
+    repo = SQLAlchemyPortfolioRepository()
+    repo.add_snapshots([PortfolioSnapshotEntity(None, pid, datetime(2025, 3, 31, hour), 'USD', float(hour), 0.0)
+                        for hour in (0, 18)] + [PortfolioSnapshotEntity(None, pid, datetime(2025, 4, 1), 'USD', 1.0, 0.0)])
+
+    def taken(query):
+        return [row['taken_at'] for row in client.get(f'/portfolio/{pid}/snapshots?{query}').get_json()]
+
+    assert taken('end=2025-03-31') == ['2025-03-31T00:00:00', '2025-03-31T18:00:00']
+    assert taken('end=2025-03-31T12:00:00') == ['2025-03-31T00:00:00']
+    assert taken('end=2025-03-31T18:00:00') == ['2025-03-31T00:00:00', '2025-03-31T18:00:00']
+    assert len(repo.list_snapshots(pid, end=date(2025, 3, 31))) == 2
+
+
+def test_snapshot_range_is_an_index_scan(db, query_plan):
+    stmt = (
+        db.select(PortfolioSnapshot)
+        .where(PortfolioSnapshot.portfolio_id == 1, PortfolioSnapshot.taken_at >= datetime(2025, 1, 1))
+        .order_by(PortfolioSnapshot.taken_at)
+    )
+    plan = query_plan(stmt)
+    assert 'USING INDEX sqlite_autoindex_portfolio_snapshot_1 (portfolio_id=? AND taken_at>?)' in plan
+
+
+def test_snapshot_cli_pages_portfolios_without_loading_ledgers(app, db, synthetic_data, statements, monkeypatch):
+    stats = synthetic_data(portfolios=7, investments=3, transactions=20, seed=4)
+    repo = SQLAlchemyPortfolioRepository()
+    symbols = {inv.symbol for p in repo.list_portfolios() for inv in p.investments}
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({s: 10.0 for s in symbols}))
+    at = datetime(2025, 6, 30)
+    expected = sorted((s.portfolio_id, s.currency, round(s.total_value, 6))
+                      for s in snapshot_portfolios(repo.list_portfolios(), at, prices={s: 10.0 for s in symbols}))
+
+    statements.clear()
+    result = app.test_cli_runner().invoke(args=['snapshot-portfolios', '--at', '2025-06-30', '--batch-size', '3'])
+    assert result.exit_code == 0, result.output
+    assert f'for {len(stats.portfolio_ids)} portfolios' in result.output
+
+    ledger_reads = [s for s in statements if s.startswith('SELECT') and 'FROM "transaction"' in s]
+    assert ledger_reads and all('sum(' in s for s in ledger_reads)  # aggregates only
+    assert len([s for s in statements if s.startswith('SELECT')]) <= 3 * 4  # per page: portfolios, investments, totals
+    assert sorted((s.portfolio_id, s.currency, round(s.total_value, 6)) for s in PortfolioSnapshot.query) == expected
@@ -0,0 +1,47 @@
+"""Tests for the synthetic dataset generator."""
+import random
+
+from sinvest.models.portfolio import Portfolio, Investment, Transaction
+from sinvest.synthetic import generate_isin, isin_check_digit
+
+
+def test_isin_check_digit_matches_known_isins():
+    assert isin_check_digit('US037833100') == '5'  # Apple
+    assert isin_check_digit('US594918104') == '5'  # Microsoft
+    assert isin_check_digit('IE00B4L5Y98') == '3'  # iShares Core MSCI World
+
+
+def test_generated_isins_are_valid():
+    rng = random.Random(1)
+    for _ in range(50):
+        isin = generate_isin(rng, 'DE')
+        assert len(isin) == 12 and isin.startswith('DE')
+        assert isin_check_digit(isin[:11]) == isin[-1]
+
+
+def test_seed_synthetic_creates_requested_shape(synthetic_data):
+    stats = synthetic_data(portfolios=3, investments=4, transactions=6, seed=7)
+
+    assert (stats.portfolios, stats.investments, stats.transactions) == (3, 4 * 3, 4 * 3 * 6)
+    assert Portfolio.query.count() == 3
+    assert Investment.query.count() == 12
+    assert Transaction.query.count() == 72
+    for pid in stats.portfolio_ids:
+        isins = [i.isin for i in Investment.query.filter_by(portfolio_id=pid)]
+        assert len(isins) == len(set(isins))
+
+
+def test_seed_synthetic_is_deterministic(db, synthetic_data):
+    def snapshot():
+        return [
+            (i.isin, i.currency, [(t.quantity, t.unit_price, t.transaction_date) for t in i.transactions])
+            for i in Investment.query.order_by(Investment.id)
+        ]
+
+    synthetic_data(portfolios=2, investments=3, transactions=5, seed=11)
+    first = snapshot()
+    db.drop_all()
+    db.create_all()
+    synthetic_data(portfolios=2, investments=3, transactions=5, seed=11)
+
+    assert snapshot() == first
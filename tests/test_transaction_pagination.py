@@ -0,0 +1,70 @@
+"""Tests for keyset-paginated transaction listing on the investment detail page."""
+from datetime import datetime
+
+import sinvest.app as app_module
+from sinvest.domain.price_provider import MockPriceProvider
+from sinvest.models.portfolio import Transaction
+from sinvest.repositories.sqlalchemy_impl import MAX_PAGE_SIZE, SQLAlchemyPortfolioRepository
+
+
+def _ledger(db, investment_factory, count):
+    inv = investment_factory(symbol='AAPL', isin='US0378331005', quantity=1.0, purchase_price=10.0)
+    for i in range(count):
+        # Three transactions per day so the id tie-breaker matters
+        db.session.add(Transaction(investment_id=inv.id, quantity=1.0, unit_price=10.0 + i,
+                                   transaction_date=datetime(2024, 1, 1 + i // 3)))
+    db.session.commit()
+    return inv
+
+
+def test_list_transactions_walks_every_row_once(db, investment_factory):
+    inv = _ledger(db, investment_factory, 10)
+    repo = SQLAlchemyPortfolioRepository()
+
+    seen = []
+    after = None
+    pages = 0
+    while True:
+        page = repo.list_transactions(inv.id, after=after, limit=4)
+        seen.extend(page.items)
+        pages += 1
+        if page.next_after is None:
+            break
+        after = page.next_after
+
+    assert pages == 3
+    keys = [(t.transaction_date, t.id) for t in seen]
+    assert keys == sorted(keys)
+    assert len(set(t.id for t in seen)) == 10
+
+
+def test_list_transactions_clamps_page_size(db, investment_factory):
+    inv = _ledger(db, investment_factory, 3)
+    repo = SQLAlchemyPortfolioRepository()
+    assert len(repo.list_transactions(inv.id, limit=0).items) == 1
+    assert MAX_PAGE_SIZE >= 3
+    assert len(repo.list_transactions(inv.id, limit=MAX_PAGE_SIZE * 10).items) == 3
+
+
+def test_investment_detail_paginates_and_uses_aggregate_totals(client, db, investment_factory, monkeypatch):
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'AAPL': 20.0}))
+    inv = _ledger(db, investment_factory, 5)
+
+    first = client.get(f'/investment/{inv.id}?limit=2')
+    assert first.status_code == 200
+    html = first.get_data(as_text=True)
+    assert 'Next page' in html
+    assert '(5)' in html  # total transaction count from the aggregate
+    assert 'USD 60.00' in html  # cost basis: 10 + 11 + 12 + 13 + 14
+
+    page = SQLAlchemyPortfolioRepository().list_transactions(inv.id, limit=2)
+    cursor = app_module._format_cursor(page.next_after)
+    second = client.get(f'/investment/{inv.id}?limit=2&after={cursor}')
+    assert second.status_code == 200
+    assert 'First page' in second.get_data(as_text=True)
+
+
+def test_investment_detail_rejects_malformed_cursor(client, db, investment_factory, monkeypatch):
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'AAPL': 20.0}))
+    inv = _ledger(db, investment_factory, 1)
+    assert client.get(f'/investment/{inv.id}?after=garbage').status_code == 400
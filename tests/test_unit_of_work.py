@@ -0,0 +1,94 @@
+"""Tests for the repository unit of work and batched transaction writes."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from sinvest.domain.entities import InvestmentEntity, TransactionEntity
+from sinvest.models.portfolio import Portfolio, Transaction
+from sinvest.repositories.sqlalchemy_impl import SQLAlchemyPortfolioRepository
+
+
+@pytest.fixture()
+def commits(db):
+    """Record every session commit while the test runs."""
+    seen = []
+
+    def _on_commit(session):
+        seen.append(session)
+
+    session = db.session()
+    event.listen(session, 'after_commit', _on_commit)
+    yield seen
+    event.remove(session, 'after_commit', _on_commit)
+
+
+def _investment(portfolio_id, transactions=None):
+    return InvestmentEntity(None, portfolio_id, 'AAPL', 'US0378331005', 'USD', 'equity', 1.0, 100.0,
+                            datetime(2024, 1, 1), transactions=transactions)
+
+
+def _history(investment_id, count):
+    return [TransactionEntity(None, investment_id, 1.0, 100.0 + i, datetime(2024, 1, 1) + timedelta(days=i))
+            for i in range(count)]
+
+
+def test_add_investment_commits_once(db, commits, portfolio_factory):
+    p = portfolio_factory()
+    commits.clear()
+    repo = SQLAlchemyPortfolioRepository()
+
+    inv = repo.add_investment(_investment(p.id, transactions=_history(None, 3)))
+
+    assert len(commits) == 1
+    assert len(inv.transactions) == 3
+
+
+def test_unit_of_work_commits_once_for_many_operations(db, commits, statements):
+    repo = SQLAlchemyPortfolioRepository()
+
+    with repo.unit_of_work():
+        p = repo.add_portfolio(name='Batched', description=None)
+        inv = repo.add_investment(_investment(p.id))
+        statements.clear()
+        inserted = repo.add_transactions(_history(inv.id, 100))
+
+    assert inserted == 100
+    assert len(commits) == 1
+    inserts = [s for s in statements if s.startswith('INSERT INTO "transaction"')]
+    assert len(inserts) == 1  # one executemany round-trip for the whole batch
+    assert Transaction.query.filter_by(investment_id=inv.id).count() == 100
+
+
+def test_unit_of_work_rolls_back_on_error(db, commits):
+    repo = SQLAlchemyPortfolioRepository()
+
+    with pytest.raises(RuntimeError):
+        with repo.unit_of_work():
+            repo.add_portfolio(name='Rolled back', description=None)
+            with repo.unit_of_work():  # nested blocks join the outer one
+                repo.add_portfolio(name='Also rolled back', description=None)
+            raise RuntimeError('boom')
+
+    assert commits == []
+    assert Portfolio.query.count() == 0
+
+
+@pytest.mark.parametrize('bad', [
+    TransactionEntity(None, None, 0.0, 10.0, datetime(2024, 1, 1)),
+    TransactionEntity(None, None, 1.0, -1.0, datetime(2024, 1, 1)),
+    TransactionEntity(None, None, 1.0, 10.0, datetime.now() + timedelta(days=2)),
+])
+def test_add_transactions_rejects_whole_batch(db, investment_factory, bad):
+    inv = investment_factory()
+    bad.investment_id = inv.id
+    repo = SQLAlchemyPortfolioRepository()
+
+    with pytest.raises(ValueError):
+        repo.add_transactions(_history(inv.id, 2) + [bad])
+    assert Transaction.query.count() == 0
+
+
+def test_add_transactions_rejects_unknown_investment(db):
+    with pytest.raises(ValueError, match='Unknown investment'):
+        SQLAlchemyPortfolioRepository().add_transactions(_history(999, 1))
@@ -0,0 +1,92 @@
+"""Tests for multi-portfolio valuation with shared price resolution."""
+from collections import Counter
+from datetime import datetime
+
+import sinvest.app as app_module
+from sinvest.domain.entities import InvestmentEntity, PortfolioEntity
+from sinvest.domain.price_provider import MockPriceProvider
+from sinvest.domain.services import aggregate_portfolio, collect_symbols, value_portfolios
+from sinvest.repositories.sqlalchemy_impl import SQLAlchemyPortfolioRepository
+
+
+class CountingProvider(MockPriceProvider):
+    def __init__(self, mapping):
+        super().__init__(mapping)
+        self.calls = Counter()
+
+    def get_price(self, symbol):
+        self.calls[symbol] += 1
+        return super().get_price(symbol)
+
+
+def _portfolio(pid, *holdings):
+    return PortfolioEntity(pid, f'P{pid}', None, None, [
+        InvestmentEntity(None, pid, symbol, f'XX000000000{i}', currency, 'equity', qty, 1.0, datetime(2020, 1, 1))
+        for i, (symbol, currency, qty) in enumerate(holdings)
+    ])
+
+
+def test_value_portfolios_prices_each_symbol_once():
+    portfolios = [_portfolio(pid, ('A', 'USD', 2), ('B', 'EUR', 1)) for pid in range(1, 201)]
+    provider = CountingProvider({'A': 5.0, 'B': 3.0})
+
+    valuations = value_portfolios(portfolios, provider)
+
+    assert provider.calls == Counter({'A': 1, 'B': 1})
+    assert len(valuations) == 200
+    assert valuations[0].portfolio_id == 1
+    assert valuations[0].totals_by_currency == {'USD': 10.0, 'EUR': 3.0}
+    assert valuations[0].gains_by_currency == {'USD': 8.0, 'EUR': 2.0}
+
+
+def test_value_portfolios_matches_per_portfolio_aggregation():
+    portfolios = [_portfolio(1, ('A', 'USD', 2), ('C', 'USD', 1)), _portfolio(2, ('C', 'usd', 4))]
+    provider = MockPriceProvider({'A': 5.0, 'C': 0.0})  # C unpriced: falls back to purchase price
+
+    for portfolio, valuation in zip(portfolios, value_portfolios(portfolios, provider)):
+        assert (valuation.totals_by_currency, valuation.gains_by_currency) == aggregate_portfolio(portfolio, provider)
+    assert collect_symbols(portfolios) == {'A', 'C'}
+
+
+def test_value_all_cli_reports_throughput(app, investment_factory, monkeypatch):
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider({'AAPL': 12.5}))
+    investment_factory(symbol='AAPL', isin='US0378331005', quantity=4.0, purchase_price=10.0)
+
+    result = app.test_cli_runner().invoke(args=['value-all'])
+
+    assert result.exit_code == 0, result.output
+    assert 'USD: 50.00' in result.output
+    assert 'Valued 1 portfolios (1 distinct symbols)' in result.output
+    assert 'portfolios/s' in result.output
+
+
+def test_value_all_cli_values_pages_from_ledger_totals(app, db, synthetic_data, statements, monkeypatch):
+    stats = synthetic_data(portfolios=5, investments=2, transactions=15, seed=9)
+    portfolios = SQLAlchemyPortfolioRepository().list_portfolios()
+    prices = {inv.symbol: 7.0 for p in portfolios for inv in p.investments}
+    monkeypatch.setattr(app_module, 'price_provider', MockPriceProvider(prices))
+    expected = {}
+    for valuation in value_portfolios(portfolios, prices=prices):
+        for cur, value in valuation.totals_by_currency.items():
+            expected[cur] = expected.get(cur, 0.0) + value
+
+    statements.clear()
+    result = app.test_cli_runner().invoke(args=['value-all', '--batch-size', '2'])
+
+    assert result.exit_code == 0, result.output
+    assert f'Valued {len(stats.portfolio_ids)} portfolios' in result.output
+    assert all(f'{cur}: {value:,.2f}' in result.output for cur, value in expected.items())
+    assert all('sum(' in s for s in statements if 'FROM "transaction"' in s)
+
+
+def test_value_all_cli_prices_each_symbol_once_across_pages(app, synthetic_data, monkeypatch):
+    synthetic_data(portfolios=6, investments=3, transactions=2, seed=4)
+    symbols = {inv.symbol for p in SQLAlchemyPortfolioRepository().list_portfolios() for inv in p.investments}
+    provider = CountingProvider({symbol: 2.0 for symbol in symbols})
+    monkeypatch.setattr(app_module, 'price_provider', provider)
+
+    result = app.test_cli_runner().invoke(args=['value-all', '--batch-size', '2'])
+
+    assert result.exit_code == 0, result.output
+    assert provider.calls == Counter(dict.fromkeys(symbols, 1))
+    assert f'Valued 6 portfolios ({len(symbols)} distinct symbols)' in result.output